@@ -1,11 +1,12 @@
-import os
-import joblib
-import pandas as pd
+import numpy as np
 
-# Load model
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-model_path = os.path.join(BASE_DIR,'models', 'isolation_forest_model.pkl')
-anomaly_model = joblib.load(model_path)
+from .baselines import compare_with_baselines
+from .metrics import model_stage
+from .registry import get_model
+from .utils.feature_matrix import as_feature_frame, as_feature_row, unnamed_features
+
+# Model is loaded lazily by the registry on first prediction
+MODEL_NAME = 'anomaly_detection'
 
 # Features used in training
 anomaly_features = [
@@ -16,6 +17,47 @@ anomaly_features = [
 ]
 
 def detect_anomaly(input_data: dict):
-    df = pd.DataFrame([input_data])
-    prediction = anomaly_model.predict(df[anomaly_features])
+    with model_stage(MODEL_NAME, 'frame'):
+        row = as_feature_row(input_data, anomaly_features)
+    with model_stage(MODEL_NAME, 'predict'), unnamed_features():
+        prediction = get_model(MODEL_NAME).predict(row)
     return prediction[0] == -1  # True if anomaly
+
+def detect_anomaly_batch(rows):
+    df = as_feature_frame(rows, anomaly_features)
+    return get_model(MODEL_NAME).predict(df) == -1
+
+
+def anomaly_scores(rows):
+    """
+    IsolationForest.decision_function of a batch of feature rows: negative
+    scores are the ones detect_anomaly flags, and lower is more anomalous.
+    """
+    with model_stage(MODEL_NAME, 'frame'):
+        df = as_feature_frame(rows, anomaly_features)
+    with model_stage(MODEL_NAME, 'predict'):
+        return get_model(MODEL_NAME).decision_function(df)
+
+
+def score_anomalies(user_ids, rows):
+    """
+    Score a batch of users in one decision_function call and compare every
+    score with its user's rolling baseline (see baselines.py), which the
+    scores are then added to. Rows of the same user must be in time order.
+    Returns: one result dict per row.
+    """
+    scores = anomaly_scores(rows)
+    count, mean, deviation, unusual = compare_with_baselines(user_ids, scores)
+    return [
+        {
+            'Anomaly_Score': score,
+            'Anomaly_Detection': score < 0,
+            'Baseline_Score': baseline if n else None,
+            'Baseline_Inputs': n,
+            'Deviation': None if np.isnan(z) else z,
+            'Unusual_For_User': flagged,
+        }
+        for score, n, baseline, z, flagged in zip(
+            scores.tolist(), count.tolist(), mean.tolist(), deviation.tolist(), unusual.tolist(),
+        )
+    ]
@@ -0,0 +1,216 @@
+"""
+Async versions of the /api/predict/ endpoints, mounted under /api/async/predict/.
+
+DRF views are synchronous, so these are plain Django async views: JWT
+validation happens in-process, the user is fetched with the async ORM and
+model inference runs on the bounded PREDICTION_EXECUTOR. Anything that may
+touch model files (feature clustering, artifact hashes for Model_Versions)
+or the history buffer runs off the event loop as well. Served by an ASGI
+server (e.g. `gunicorn Project.asgi -k uvicorn.workers.UvicornWorker`), a
+worker keeps accepting requests while inference is in flight.
+"""
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .utils.feature_engineering import compute_feature_sets
+
+from .expense_prediction import predict_expense_breakdown
+from .overspending_alert import predict_overspending_alert
+from .anomaly_detection import detect_anomaly
+from .savings_efficiency_predictor import predict_savings_efficiency
+from .financial_score_predictor import predict_financial_health_score
+from .personalized_recommender import generate_spending_recommendation
+from .batch import run_unified_columns
+from .executor import arun, arun_models
+from .history import record_prediction
+from .registry import registry
+from .validation import unified_input
+from .views import MAX_BATCH_SIZE
+from . import cache as prediction_cache
+from . import coalescer
+
+logger = logging.getLogger(__name__)
+
+_jwt = JWTAuthentication()
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+async def authenticate(request):
+    """
+    The active user for the request's Bearer token, or None. Token checks are
+    pure CPU; only the user lookup touches the database.
+    """
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        token = _jwt.get_validated_token(raw_token)
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+    User = get_user_model()
+    try:
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        return None
+    return user if user.is_active else None
+
+
+@sync_to_async(thread_sensitive=False)
+def record_and_version(endpoint, records, user):
+    """
+    Buffer (user_input, result, latency_ms) history records and return the
+    active model versions. Both may read and hash artifact files on a cold
+    registry, so they run in a worker thread rather than on the event loop.
+    """
+    for user_input, result, latency_ms in records:
+        record_prediction(endpoint, user_input, result, latency_ms, user=user)
+    return registry.active_versions()
+
+
+aactive_versions = sync_to_async(registry.active_versions, thread_sensitive=False)
+
+
+def parse_json(request):
+    try:
+        return json.loads(request.body or b'null')
+    except ValueError:
+        return None
+
+
+def async_prediction_view(view):
+    """Authentication (401) and JSON parsing shared by every async endpoint."""
+    @csrf_exempt
+    @require_POST
+    async def wrapper(request):
+        user = await authenticate(request)
+        if user is None:
+            return json_response({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+        data = parse_json(request)
+        if data is None:
+            return json_response({"detail": "Request body must be JSON."}, status=400)
+        return await view(request, user, data)
+    return wrapper
+
+
+# === UNIFIED VIEW ===
+async def arun_unified_prediction(user_input):
+    # Cluster assignment may load the clustering artifact on first use.
+    model_inputs = await arun(compute_feature_sets, user_input)
+
+    results, errors = await arun_models({
+        "Expense_Prediction": (predict_expense_breakdown, model_inputs['expense_prediction']),
+        "Overspending_Alert": (predict_overspending_alert, model_inputs['overspending_alert']),
+        "Anomaly_Detection": (detect_anomaly, model_inputs['anomaly_detection']),
+        "Savings_Target_Result": (predict_savings_efficiency, model_inputs['savings_efficiency']),
+        "Financial_Health_Score": (predict_financial_health_score, model_inputs['financial_health_score']),
+        "Personalized_Recommendations": (generate_spending_recommendation, model_inputs['personalized_spending']),
+    })
+    if errors:
+        results["errors"] = errors
+    return results
+
+
+@async_prediction_view
+async def unified_prediction_view(request, user, data):
+    user_input, errors = unified_input.validate(data)
+    if errors is not None:
+        return json_response(errors, status=400)
+
+    start = time.perf_counter()
+    try:
+        results, _ = await prediction_cache.aget_or_compute(
+            'unified', user_input, lambda: arun_unified_prediction(user_input),
+            cacheable=lambda result: "errors" not in result,
+        )
+    except Exception as e:
+        logger.exception("Unified prediction failed")
+        return json_response({"error": f"Prediction failed: {str(e)}"}, status=500)
+    latency_ms = (time.perf_counter() - start) * 1000
+    versions = await record_and_version('unified', [(user_input, results, latency_ms)], user)
+
+    errors = results.get("errors", {})
+    if errors and len(errors) == len(results) - 1:
+        logger.error("Unified prediction failed: %s", errors)
+        return json_response({"error": "Prediction failed", "errors": errors}, status=500)
+    return json_response({**results, "Model_Versions": versions})
+
+
+# === BATCH VIEW ===
+@async_prediction_view
+async def batch_prediction_view(request, user, data):
+    if not isinstance(data, list) or not data:
+        return json_response({"error": "Expected a non-empty list of inputs."}, status=400)
+    if len(data) > MAX_BATCH_SIZE:
+        return json_response({"error": f"At most {MAX_BATCH_SIZE} inputs per batch."}, status=400)
+
+    user_inputs, columns, errors = unified_input.validate_many(data)
+    if errors is not None:
+        return json_response(errors, status=400)
+
+    start = time.perf_counter()
+    try:
+        results = await arun(run_unified_columns, columns)
+    except Exception as e:
+        logger.exception("Batch prediction failed")
+        return json_response({"error": f"Prediction failed: {str(e)}"}, status=500)
+
+    latency_ms = (time.perf_counter() - start) * 1000 / len(results)
+    versions = await record_and_version(
+        'batch', [(user_input, result, latency_ms) for user_input, result in zip(user_inputs, results)], user,
+    )
+    return json_response({"results": results, "Model_Versions": versions})
+
+
+# === INDIVIDUAL MODEL ENDPOINTS ===
+def predict_single(feature_key, predictor_func, user_input):
+    return predictor_func(compute_feature_sets(user_input, keys=(feature_key,))[feature_key])
+
+
+async def apredict_single(feature_key, predictor_func, user_input):
+    if coalescer.enabled_for(feature_key):
+        return await coalescer.apredict(feature_key, user_input)
+    return await arun(predict_single, feature_key, predictor_func, user_input)
+
+
+def model_view(feature_key, predictor_func, label):
+    @async_prediction_view
+    async def view(request, user, data):
+        user_input, errors = unified_input.validate(data)
+        if errors is not None:
+            return json_response(errors, status=400)
+
+        try:
+            result, _ = await prediction_cache.aget_or_compute(
+                feature_key, user_input,
+                lambda: apredict_single(feature_key, predictor_func, user_input),
+            )
+            return json_response({label: result, "Model_Versions": await aactive_versions()})
+        except Exception as e:
+            logger.exception(f"{label} prediction failed")
+            return json_response({"error": f"{label} prediction failed: {str(e)}"}, status=500)
+    return view
+
+
+expense_prediction_view = model_view('expense_prediction', predict_expense_breakdown, "Expense_Prediction")
+overspending_alert_view = model_view('overspending_alert', predict_overspending_alert, "Overspending_Alert")
+anomaly_detection_view = model_view('anomaly_detection', detect_anomaly, "Anomaly_Detection")
+savings_efficiency_view = model_view('savings_efficiency', predict_savings_efficiency, "Savings_Target_Result")
+financial_score_view = model_view('financial_health_score', predict_financial_health_score, "Financial_Health_Score")
+personalized_recommendation_view = model_view('personalized_spending', generate_spending_recommendation, "Personalized_Recommendations")
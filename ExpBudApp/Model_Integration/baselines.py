@@ -0,0 +1,139 @@
+"""
+Rolling per-user baselines of the anomaly score.
+
+Every scored input of a user is folded into an exponentially weighted mean
+and variance of that user's scores (the first 1/ALPHA inputs are averaged
+evenly). A new score is compared with the baseline of the inputs before it,
+so an input can be unusual for its user even when the Isolation Forest
+finds it normal for the population, and the other way round.
+
+The baselines are stored as one AnomalyBaseline row per user (count, mean,
+variance), so every worker process folds scores into the same history and
+it survives restarts. A batch locks and reads the rows of its users, applies
+the recurrence with a few vectorized operations on arrays (ScoreBaselines)
+and writes the rows back: three queries, with no scan of earlier inputs.
+"""
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+DEFAULT_CONFIG = {
+    'ALPHA': 0.1,          # weight of the newest score once a user has 1/ALPHA inputs
+    'MIN_HISTORY': 5,      # inputs a user needs before deviations are reported
+    'Z_THRESHOLD': 3.0,    # standard deviations below the baseline that count as unusual
+    'MIN_STD': 0.01,       # floor of the baseline deviation, for users with near-constant scores
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'PREDICTION_ANOMALY_BASELINE', {})}
+
+
+class ScoreBaselines:
+    """Exponentially weighted mean/variance of a score per user id, in arrays indexed by the id."""
+
+    def __init__(self, capacity=1024):
+        self.count = np.zeros(capacity, dtype=np.int32)
+        self.mean = np.zeros(capacity, dtype=np.float64)
+        self.var = np.zeros(capacity, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def _reserve(self, size):
+        used = len(self.count)
+        if size <= used:
+            return
+        capacity = max(size, 2 * used)
+        for name in ('count', 'mean', 'var'):
+            grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+            grown[:used] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def observe(self, user_ids, scores, alpha):
+        """
+        Fold scores into their users' baselines, rows of the same user in order.
+        Returns: (count, mean, std) of the baseline each row was compared with,
+        i.e. before that row was added.
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64).reshape(-1)
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        if user_ids.size and user_ids.min() < 0:
+            raise ValueError("user ids must be non-negative")
+
+        count = np.empty(len(user_ids), dtype=np.int64)
+        mean = np.empty(len(user_ids))
+        var = np.empty(len(user_ids))
+        with self._lock:
+            self._reserve(int(user_ids.max()) + 1 if user_ids.size else 0)
+            # Each round updates the earliest remaining row of every user, so a
+            # user never appears twice in one fancy-indexed assignment.
+            pending = np.arange(len(user_ids))
+            while pending.size:
+                _, first = np.unique(user_ids[pending], return_index=True)
+                rows, ids = pending[first], user_ids[pending[first]]
+                c, m, v = self.count[ids], self.mean[ids], self.var[ids]
+                count[rows], mean[rows], var[rows] = c, m, v
+
+                weight = np.maximum(alpha, 1.0 / (c + 1))
+                diff = scores[rows] - m
+                step = weight * diff
+                self.mean[ids] = m + step
+                self.var[ids] = (1 - weight) * (v + diff * step)
+                self.count[ids] = c + 1
+                pending = np.delete(pending, first)
+        return count, mean, np.sqrt(var)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': int(np.count_nonzero(self.count)),
+                'bytes': self.count.nbytes + self.mean.nbytes + self.var.nbytes,
+            }
+
+
+def observe_stored(user_ids, scores, alpha):
+    """
+    ScoreBaselines.observe over the users' stored baselines, which it updates.
+    The rows stay locked until the update is written, so concurrent batches of
+    the same user (in any worker) are applied one after the other.
+    """
+    from ExpBudApp.models import AnomalyBaseline
+
+    user_ids = np.asarray(user_ids, dtype=np.int64).reshape(-1)
+    ids, local_ids = np.unique(user_ids, return_inverse=True)
+    ids = ids.tolist()
+    with transaction.atomic():
+        AnomalyBaseline.objects.bulk_create([AnomalyBaseline(user_id=i) for i in ids], ignore_conflicts=True)
+        # Locked in user id order, so two batches cannot deadlock on each other's rows
+        stored = list(AnomalyBaseline.objects.select_for_update().filter(user_id__in=ids).order_by('user_id'))
+
+        baselines = ScoreBaselines(capacity=len(stored))
+        for name in ('count', 'mean', 'var'):
+            getattr(baselines, name)[:] = [getattr(row, name) for row in stored]
+        result = baselines.observe(local_ids, scores, alpha)
+
+        now = timezone.now()
+        for row, count, mean, var in zip(stored, baselines.count.tolist(), baselines.mean.tolist(), baselines.var.tolist()):
+            row.count, row.mean, row.var, row.updated_at = count, mean, var, now
+        AnomalyBaseline.objects.bulk_update(stored, ['count', 'mean', 'var', 'updated_at'])
+    return result
+
+
+def compare_with_baselines(user_ids, scores):
+    """
+    Deviation of each score from its user's baseline, updating the baselines.
+    Returns: (count, mean, deviation, unusual) arrays, one entry per row;
+    deviation is NaN while the user has fewer than MIN_HISTORY earlier inputs.
+    """
+    config = get_config()
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    count, mean, std = observe_stored(user_ids, scores, config['ALPHA'])
+
+    established = count >= config['MIN_HISTORY']
+    deviation = np.where(established, (scores - mean) / np.maximum(std, config['MIN_STD']), np.nan)
+    # Lower scores are more anomalous; only drops below the baseline are flagged.
+    unusual = established & (deviation < -config['Z_THRESHOLD'])
+    return count, mean, deviation, unusual
+
@@ -0,0 +1,50 @@
+import numpy as np
+
+from .utils.feature_engineering import compute_feature_batch, to_columns
+
+from .expense_prediction import predict_expense_breakdown_batch
+from .overspending_alert import predict_overspending_alert_batch
+from .anomaly_detection import detect_anomaly_batch
+from .savings_efficiency_predictor import predict_savings_efficiency_batch
+from .financial_score_predictor import predict_financial_health_score_batch
+from .personalized_recommender import generate_spending_recommendation_batch
+
+# Unified response key -> (feature set, batch predictor), in response order
+BATCH_MODELS = {
+    "Expense_Prediction": ('expense_prediction', predict_expense_breakdown_batch),
+    "Overspending_Alert": ('overspending_alert', predict_overspending_alert_batch),
+    "Anomaly_Detection": ('anomaly_detection', detect_anomaly_batch),
+    "Savings_Target_Result": ('savings_efficiency', predict_savings_efficiency_batch),
+    "Financial_Health_Score": ('financial_health_score', predict_financial_health_score_batch),
+    "Personalized_Recommendations": ('personalized_spending', generate_spending_recommendation_batch),
+}
+
+
+def run_unified_batch(user_inputs):
+    """
+    Score many validated UnifiedFinancialInputSerializer payloads at once.
+    Each model is called a single time for the whole batch.
+    Returns: one result dict per input, shaped like the unified view's response.
+    """
+    return run_unified_columns(to_columns(user_inputs))
+
+
+def run_unified_columns(columns):
+    """run_unified_batch for inputs already in column form (see to_columns)."""
+    predictions = run_model_columns(columns)
+    return [dict(zip(predictions, row)) for row in zip(*predictions.values())]
+
+
+def run_model_columns(columns, labels=tuple(BATCH_MODELS)):
+    """
+    Batched predictions of the requested models over a column-oriented batch.
+    labels: unified response keys (see BATCH_MODELS); only their feature sets are built.
+    Returns: {label: list of per-row results}, each model called once.
+    """
+    features = compute_feature_batch(columns, keys=tuple(dict.fromkeys(BATCH_MODELS[label][0] for label in labels)))
+    predictions = {}
+    for label in labels:
+        feature_key, predict = BATCH_MODELS[label]
+        results = predict(features[feature_key])
+        predictions[label] = results.tolist() if isinstance(results, np.ndarray) else list(results)
+    return predictions
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'ALIAS': 'default',  # entry in CACHES to store predictions in
+    'TIMEOUT': 600,      # seconds a cached prediction stays valid
+}
+
+_counters = {'hits': 0, 'misses': 0}
+_counters_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'PREDICTION_CACHE', {})}
+
+
+def model_fingerprint():
+    # Memoized per release, so a model swap starts a fresh key space.
+    return registry.fingerprint()
+
+
+def input_digest(validated_data):
+    """sha256 of the canonical JSON form of a validated input."""
+    canonical = json.dumps(validated_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def make_key(namespace, validated_data):
+    """
+    Cache key for a prediction: the endpoint namespace, the model fingerprint
+    and the digest of the validated input.
+    """
+    return f"prediction:{namespace}:{model_fingerprint()}:{input_digest(validated_data)}"
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def get_or_compute(namespace, validated_data, compute, cacheable=lambda result: True):
+    """
+    Return (prediction, hit): the cached prediction for `validated_data` and
+    True, or the result of `compute()` and False, cached when
+    `cacheable(result)` holds (e.g. no per-model errors).
+    When the key cannot be built (unreadable model files) or the cache backend
+    fails, the prediction is computed without the cache.
+    """
+    config = get_config()
+    try:
+        cache = caches[config['ALIAS']]
+        key = make_key(namespace, validated_data)
+        result = cache.get(key)
+    except Exception:
+        logger.warning("Prediction cache unavailable; computing %s without it", namespace, exc_info=True)
+        _count('misses')
+        return compute(), False
+    if result is not None:
+        _count('hits')
+        return result, True
+
+    _count('misses')
+    result = compute()
+    if cacheable(result):
+        try:
+            cache.set(key, result, timeout=config['TIMEOUT'])
+        except Exception:
+            logger.warning("Could not cache the %s prediction", namespace, exc_info=True)
+    return result, False
+
+
+async def aget_or_compute(namespace, validated_data, compute, cacheable=lambda result: True):
+    """get_or_compute for async views; `compute` is a coroutine function."""
+    config = get_config()
+    try:
+        cache = caches[config['ALIAS']]
+        # The model fingerprint hashes every artifact on first use; keep that off the event loop.
+        key = await sync_to_async(make_key, thread_sensitive=False)(namespace, validated_data)
+        result = await cache.aget(key)
+    except Exception:
+        logger.warning("Prediction cache unavailable; computing %s without it", namespace, exc_info=True)
+        _count('misses')
+        return await compute(), False
+    if result is not None:
+        _count('hits')
+        return result, True
+
+    _count('misses')
+    result = await compute()
+    if cacheable(result):
+        try:
+            await cache.aset(key, result, timeout=config['TIMEOUT'])
+        except Exception:
+            logger.warning("Could not cache the %s prediction", namespace, exc_info=True)
+    return result, False
+
+
+def stats():
+    """Hit/miss counters for this process."""
+    with _counters_lock:
+        hits, misses = _counters['hits'], _counters['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
@@ -0,0 +1,137 @@
+import logging
+import threading
+
+import numpy as np
+
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Registry artifact holding the cluster centroids (see `manage.py train_spending_clusters`)
+MODEL_NAME = 'spending_clusters'
+
+# The model whose training labels the centroids reproduce
+RECOMMENDER = 'personalized_spending'
+
+# Label used while no clustering artifact matches the active recommender
+FALLBACK_CLUSTER = 1
+
+# Derived features the users are clustered on (scale-free spending shares)
+CLUSTER_FEATURES = [
+    "Rent_to_Income_Ratio",
+    "Groceries_to_Income_Ratio",
+    "Discretionary_to_Income_Ratio",
+    "Debt_to_Income_Ratio",
+    "Total_Expenses_to_Income_Ratio",
+]
+
+_prepared = None
+_prepared_lock = threading.Lock()
+
+
+class NearestCentroid:
+    """
+    Assigns rows the label of the closest centroid in standardized feature space.
+    Distances use ||x||^2 - 2 x.c + ||c||^2, so a batch costs one (n, d) x (d, k)
+    matrix product and each row O(k*d).
+    """
+
+    def __init__(self, artifact):
+        self.source = artifact
+        self.mean = np.asarray(artifact['mean'], dtype=np.float64)
+        self.inv_scale = 1.0 / np.asarray(artifact['scale'], dtype=np.float64)
+        self.centroids_t = np.ascontiguousarray(np.asarray(artifact['centroids'], dtype=np.float64).T)
+        self.centroid_sq = np.einsum('ij,ij->j', self.centroids_t, self.centroids_t)
+        self.labels = np.asarray(artifact['labels'])
+
+    def assign(self, X):
+        """Cluster label per row of the (n, d) matrix X of CLUSTER_FEATURES."""
+        Z = (np.asarray(X, dtype=np.float64) - self.mean) * self.inv_scale
+        # ||z||^2 is the same for every centroid of a row, so it drops out of the argmin.
+        distances = self.centroid_sq - 2.0 * (Z @ self.centroids_t)
+        return self.labels[np.argmin(distances, axis=1)]
+
+
+def centroid_artifact(X, labels, recommender=None):
+    """
+    Clustering artifact with one centroid per label: the mean of that label's
+    rows of X (CLUSTER_FEATURES) in standardized space. `recommender` is the
+    version of the recommender trained on these labels.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    labels = np.asarray(labels)
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = (X - mean) / scale
+    classes = np.unique(labels)
+    return {
+        'features': list(CLUSTER_FEATURES),
+        'mean': mean,
+        'scale': scale,
+        'centroids': np.stack([Z[labels == label].mean(axis=0) for label in classes]),
+        'labels': classes,
+        'recommender': recommender,
+        'n_samples': len(X),
+    }
+
+
+def _prepare(artifact, model_set):
+    if list(artifact['features']) != CLUSTER_FEATURES:
+        raise ValueError(f"{MODEL_NAME} was trained on {list(artifact['features'])}, expected {CLUSTER_FEATURES}")
+    recommender = model_set.versions()[RECOMMENDER]
+    if artifact.get('recommender') != recommender:
+        # Labels the recommender was never trained on would pick arbitrary tiers.
+        logger.warning(
+            "Ignoring %s: trained for %s version %s, the release serves %s; using cluster %s",
+            MODEL_NAME, RECOMMENDER, artifact.get('recommender'), recommender, FALLBACK_CLUSTER,
+        )
+        return None
+    return NearestCentroid(artifact)
+
+
+def get_assigner():
+    """
+    The assigner for the active model release, or None when the release has
+    no clustering artifact or one trained for a different recommender.
+    Centroids are prepared once and rebuilt only when the registry serves a
+    different artifact (e.g. after a release swap).
+    """
+    global _prepared
+    model_set = registry.active
+    if not model_set.has(MODEL_NAME):
+        return None
+
+    artifact = model_set.get(MODEL_NAME)
+    prepared = _prepared
+    if prepared is None or prepared[0] is not artifact:
+        with _prepared_lock:
+            if _prepared is None or _prepared[0] is not artifact:
+                _prepared = (artifact, _prepare(artifact, model_set))
+            prepared = _prepared
+    return prepared[1]
+
+
+def assign_cluster(derived):
+    """Cluster label for one input's derived features (see feature_engineering._derive)."""
+    assigner = get_assigner()
+    if assigner is None:
+        return FALLBACK_CLUSTER
+    row = np.array([[derived[name] for name in CLUSTER_FEATURES]], dtype=np.float64)
+    return int(assigner.assign(row)[0])
+
+
+def cluster_matrix(derived):
+    """(n, d) matrix of CLUSTER_FEATURES from column-oriented derived features."""
+    X = np.empty((len(derived[CLUSTER_FEATURES[0]]), len(CLUSTER_FEATURES)), dtype=np.float64)
+    for j, name in enumerate(CLUSTER_FEATURES):
+        X[:, j] = derived[name]
+    return X
+
+
+def assign_clusters(derived):
+    """Vectorized assign_cluster over column-oriented derived features."""
+    assigner = get_assigner()
+    if assigner is None:
+        return np.full(len(derived[CLUSTER_FEATURES[0]]), FALLBACK_CLUSTER)
+    return assigner.assign(cluster_matrix(derived))
@@ -0,0 +1,207 @@
+"""
+Micro-batching for the single-model /api/predict/<model>/ endpoints.
+
+With PREDICTION_COALESCING enabled, concurrent requests for the same model
+are queued instead of each calling model.predict on one row. A background
+thread per model takes the first queued request, collects whatever else
+arrives within WINDOW_MS (up to MAX_BATCH requests), runs the model's
+vectorized *_batch predictor once and hands every caller its own row.
+
+Only requests served by the same worker process can share a batch, so this
+pays off with threaded (gthread) or ASGI workers under bursty load.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+import numpy as np
+from django.conf import settings
+
+from . import metrics
+from .utils.feature_engineering import compute_feature_batch, to_columns
+
+from .expense_prediction import predict_expense_breakdown_batch
+from .overspending_alert import predict_overspending_alert_batch
+from .anomaly_detection import detect_anomaly_batch
+from .savings_efficiency_predictor import predict_savings_efficiency_batch
+from .financial_score_predictor import predict_financial_health_score_batch
+from .personalized_recommender import generate_spending_recommendation_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'ENABLED': False,
+    'MODELS': None,      # feature keys to coalesce (None: every single-model endpoint)
+    'WINDOW_MS': 2.0,    # how long a batch waits for more requests after its first one
+    'MAX_BATCH': 64,     # requests per model.predict call
+    'TIMEOUT': 2.0,      # seconds a caller waits for its batch before failing
+}
+
+BATCH_PREDICTORS = {
+    'expense_prediction': predict_expense_breakdown_batch,
+    'overspending_alert': predict_overspending_alert_batch,
+    'anomaly_detection': detect_anomaly_batch,
+    'savings_efficiency': predict_savings_efficiency_batch,
+    'financial_health_score': predict_financial_health_score_batch,
+    'personalized_spending': generate_spending_recommendation_batch,
+}
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+BATCH_SIZES = metrics.HistogramFamily(
+    'prediction_coalescer_batch_size',
+    "Requests answered by each coalesced model.predict call.",
+    ('model',), buckets=BATCH_SIZE_BUCKETS,
+)
+QUEUE_WAIT = metrics.HistogramFamily(
+    'prediction_coalescer_wait_seconds',
+    "Time a request spends queued before its batch starts.",
+    ('model',),
+)
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'PREDICTION_COALESCING', {})}
+
+
+def predict_batch(feature_key, user_inputs):
+    """One vectorized prediction for validated inputs; returns one plain-Python result per input."""
+    features = compute_feature_batch(to_columns(user_inputs), keys=(feature_key,))[feature_key]
+    results = BATCH_PREDICTORS[feature_key](features)
+    return results.tolist() if isinstance(results, np.ndarray) else list(results)
+
+
+class _Pending:
+    __slots__ = ('item', 'future', 'enqueued')
+
+    def __init__(self, item):
+        self.item = item
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Coalesces submit()ted items into calls of batch_func(items), which must
+    return one result per item, in order.
+    """
+
+    def __init__(self, name, batch_func):
+        self.name = name
+        self.batch_func = batch_func
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, item):
+        """Queue an item; returns a concurrent.futures.Future for its result."""
+        pending = _Pending(item)
+        self._queue.put(pending)
+        self._ensure_thread()
+        return pending.future
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _ensure_thread(self):
+        # Started on first use rather than import, so forked workers each get their own.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'coalescer-{self.name}', daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        first = self._queue.get()
+        config = get_config()
+        batch = [first]
+        deadline = first.enqueued + config['WINDOW_MS'] / 1000
+        while len(batch) < config['MAX_BATCH']:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the window, still take whatever is already queued.
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Callers that gave up (timed out) have cancelled their futures; skip them.
+            batch = [pending for pending in self._collect() if pending.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            wait = QUEUE_WAIT.labels(self.name)
+            for pending in batch:
+                wait.observe(started - pending.enqueued)
+            BATCH_SIZES.labels(self.name).observe(len(batch))
+
+            try:
+                results = self.batch_func([pending.item for pending in batch])
+            except Exception as e:
+                logger.exception("Coalesced %s batch of %d failed", self.name, len(batch))
+                for pending in batch:
+                    pending.future.set_exception(e)
+                continue
+            for pending, result in zip(batch, results):
+                pending.future.set_result(result)
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(feature_key):
+    batcher = _batchers.get(feature_key)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(feature_key)
+            if batcher is None:
+                batcher = _batchers[feature_key] = MicroBatcher(
+                    feature_key, lambda user_inputs: predict_batch(feature_key, user_inputs),
+                )
+    return batcher
+
+
+def enabled_for(feature_key):
+    config = get_config()
+    return config['ENABLED'] and (config['MODELS'] is None or feature_key in config['MODELS'])
+
+
+def predict(feature_key, user_input):
+    """The coalesced prediction of one model for one validated input (blocks until its batch ran)."""
+    timeout = get_config()['TIMEOUT']
+    future = get_batcher(feature_key).submit(user_input)
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        future.cancel()
+        raise TimeoutError(f"no result from the {feature_key} batch queue within {timeout}s")
+
+
+async def apredict(feature_key, user_input):
+    """predict() for async views; the event loop keeps running while the batch is pending."""
+    timeout = get_config()['TIMEOUT']
+    future = asyncio.wrap_future(get_batcher(feature_key).submit(user_input))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"no result from the {feature_key} batch queue within {timeout}s")
+
+
+def collect_metrics():
+    lines = [
+        "# HELP prediction_coalescer_queue_depth Requests waiting for a coalesced batch in this worker.",
+        "# TYPE prediction_coalescer_queue_depth gauge",
+    ]
+    for name, batcher in sorted(_batchers.items()):
+        lines.append(f'prediction_coalescer_queue_depth{{model="{name}"}} {batcher.depth()}')
+    return lines + BATCH_SIZES.render() + QUEUE_WAIT.render()
+
+
+metrics.register_collector(collect_metrics)
@@ -0,0 +1,350 @@
+"""
+Tree ensembles flattened into plain NumPy arrays.
+
+compile_estimator() turns a fitted DecisionTree, RandomForest, IsolationForest,
+XGBRegressor or binary XGBClassifier into a CompiledModel: every tree's nodes
+concatenated into shared feature/threshold/left/right/value arrays. predict()
+walks all trees for a whole batch at once, one vectorized step per tree level,
+and needs neither scikit-learn nor xgboost at inference time. A StandardScaler
+compiles to a CompiledScaler holding its mean and scale.
+
+Artifacts are a directory of .npy files plus meta.json; loading them with
+mmap_mode='r' lets every worker process share the same pages of the OS page
+cache instead of holding a private unpickled copy.
+"""
+import json
+import os
+
+import numpy as np
+
+# Rows traversed per step; bounds the (rows x trees) node-index matrix.
+CHUNK_ROWS = 8192
+
+ARRAY_NAMES = ('roots', 'feature', 'threshold', 'left', 'right', 'missing_left', 'value')
+
+# XGBoost objectives whose prediction is the raw margin
+IDENTITY_OBJECTIVES = (
+    'reg:squarederror', 'reg:squaredlogerror', 'reg:pseudohubererror',
+    'reg:absoluteerror', 'reg:quantileerror',
+)
+
+
+def _node_depths(left, right):
+    depth = np.zeros(len(left), dtype=np.int32)
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        if left[node] != -1:
+            for child in (left[node], right[node]):
+                depth[child] = depth[node] + 1
+                stack.append(child)
+    return depth
+
+
+def _flatten(trees):
+    """
+    trees: list of dicts with per-node arrays feature, threshold, left, right
+    (-1 for leaves), missing_left and value. Leaves point to themselves so a
+    fixed number of traversal steps always ends on a leaf.
+    """
+    arrays = {name: [] for name in ARRAY_NAMES if name != 'roots'}
+    roots, offset, max_depth = [], 0, 0
+    for tree in trees:
+        left, right = np.asarray(tree['left']), np.asarray(tree['right'])
+        n_nodes = len(left)
+        index = np.arange(n_nodes)
+        is_leaf = left == -1
+
+        arrays['feature'].append(np.where(is_leaf, 0, tree['feature']))
+        arrays['threshold'].append(np.where(is_leaf, 0, tree['threshold']))
+        arrays['left'].append(np.where(is_leaf, index, left) + offset)
+        arrays['right'].append(np.where(is_leaf, index, right) + offset)
+        arrays['missing_left'].append(np.asarray(tree['missing_left'], dtype=bool) & ~is_leaf)
+        arrays['value'].append(np.asarray(tree['value']))
+
+        roots.append(offset)
+        offset += n_nodes
+        max_depth = max(max_depth, int(_node_depths(left, right).max()))
+
+    return {
+        'roots': np.asarray(roots, dtype=np.int64),
+        'feature': np.concatenate(arrays['feature']).astype(np.int64),
+        'threshold': np.concatenate(arrays['threshold']),
+        'left': np.concatenate(arrays['left']).astype(np.int64),
+        'right': np.concatenate(arrays['right']).astype(np.int64),
+        'missing_left': np.concatenate(arrays['missing_left']),
+        'value': np.concatenate(arrays['value']),
+    }, max_depth
+
+
+def _sklearn_tree(tree, feature_map=None, value=None):
+    is_leaf = tree.children_left == -1
+    feature = np.where(is_leaf, 0, tree.feature)
+    if feature_map is not None:
+        feature = np.asarray(feature_map)[feature]
+    return {
+        'feature': feature,
+        'threshold': tree.threshold,
+        'left': tree.children_left,
+        'right': tree.children_right,
+        # The models are trained and served without missing values; NaN goes right.
+        'missing_left': np.zeros(tree.node_count, dtype=bool),
+        'value': tree.value[:, 0, 0] if value is None else value,
+    }
+
+
+def _compile_sklearn_forest(estimator):
+    from sklearn.base import is_classifier
+
+    estimators = getattr(estimator, 'estimators_', [estimator])
+    meta = {'comparison': 'le', 'n_features': int(estimator.n_features_in_)}
+
+    if is_classifier(estimator):
+        trees = []
+        for est in estimators:
+            proba = est.tree_.value[:, 0, :]
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            trees.append(_sklearn_tree(est.tree_, value=proba / normalizer))
+        meta.update(kind='forest_classifier', classes=estimator.classes_.tolist())
+    else:
+        trees = [_sklearn_tree(est.tree_) for est in estimators]
+        meta.update(kind='forest_regressor')
+    return trees, meta
+
+
+def _compile_isolation_forest(estimator):
+    from sklearn.ensemble._iforest import _average_path_length
+
+    subsample_features = estimator._max_features != estimator.n_features_in_
+    trees = []
+    for est, features in zip(estimator.estimators_, estimator.estimators_features_):
+        tree = est.tree_
+        # Same per-leaf path length as IsolationForest._compute_score_samples
+        path_length = _node_depths(tree.children_left, tree.children_right) + 1.0
+        value = path_length + _average_path_length(tree.n_node_samples) - 1.0
+        trees.append(_sklearn_tree(tree, features if subsample_features else None, value))
+
+    meta = {
+        'kind': 'isolation_forest',
+        'comparison': 'le',
+        'n_features': int(estimator.n_features_in_),
+        'offset': float(estimator.offset_),
+        'path_length_normalizer': float(_average_path_length([estimator._max_samples])[0]),
+    }
+    return trees, meta
+
+
+def _parse_base_score(raw):
+    # Stored as "5E-1" by older releases and "[5E-1]" by newer ones.
+    return float(raw.strip('[]').split(',')[0])
+
+
+def _compile_xgboost(estimator):
+    booster = estimator.get_booster()
+    learner = json.loads(booster.save_raw('json'))['learner']
+    objective = learner['objective']['name']
+    base_score = _parse_base_score(learner['learner_model_param']['base_score'])
+
+    model = learner['gradient_booster']['model']
+    if int(model['gbtree_model_param'].get('num_parallel_tree', 1)) != 1 or any(model['tree_info']):
+        raise ValueError("Only single-output XGBoost models can be compiled")
+
+    raw_trees = model['trees']
+    best_iteration = booster.attributes().get('best_iteration')
+    if best_iteration is not None:
+        raw_trees = raw_trees[:int(best_iteration) + 1]
+
+    trees = []
+    for tree in raw_trees:
+        left = np.asarray(tree['left_children'])
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        trees.append({
+            'feature': np.asarray(tree['split_indices']),
+            'threshold': conditions,
+            'left': left,
+            'right': np.asarray(tree['right_children']),
+            'missing_left': np.asarray(tree['default_left'], dtype=bool),
+            # Leaves keep their weight in split_conditions
+            'value': np.where(left == -1, conditions, 0).astype(np.float32),
+        })
+
+    if objective in ('binary:logistic', 'reg:logistic'):
+        base_margin = float(np.log(base_score / (1 - base_score)))
+        transform = 'logistic'
+    elif objective in IDENTITY_OBJECTIVES:
+        base_margin, transform = base_score, 'identity'
+    else:
+        raise ValueError(f"Unsupported XGBoost objective: {objective}")
+
+    meta = {
+        'comparison': 'lt',
+        'n_features': int(estimator.n_features_in_),
+        'base_margin': base_margin,
+        'transform': transform,
+    }
+    if hasattr(estimator, 'classes_'):
+        meta.update(kind='xgb_classifier', classes=np.asarray(estimator.classes_).tolist())
+    else:
+        meta.update(kind='xgb_regressor')
+    return trees, meta
+
+
+def compile_estimator(estimator):
+    """Flatten a fitted tree ensemble (or StandardScaler) into a compiled artifact."""
+    module = type(estimator).__module__
+    if type(estimator).__name__ == 'StandardScaler':
+        return CompiledScaler.from_estimator(estimator)
+    if module.startswith('xgboost'):
+        trees, meta = _compile_xgboost(estimator)
+    elif type(estimator).__name__ == 'IsolationForest':
+        trees, meta = _compile_isolation_forest(estimator)
+    elif module.startswith('sklearn.tree') or module.startswith('sklearn.ensemble'):
+        trees, meta = _compile_sklearn_forest(estimator)
+    else:
+        raise TypeError(f"Cannot compile {type(estimator).__name__}")
+
+    arrays, max_depth = _flatten(trees)
+    meta.update(source=type(estimator).__name__, n_trees=len(trees), max_depth=max_depth)
+    return CompiledModel(arrays, meta)
+
+
+class _ArrayArtifact:
+    array_names = ()
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        self.kind = meta['kind']
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in self.array_names:
+            np.save(os.path.join(directory, f'{name}.npy'), self.arrays[name])
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load_arrays(cls, directory, meta, mmap_mode=None):
+        return cls({
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in cls.array_names
+        }, meta)
+
+
+def load_compiled(directory, mmap_mode=None):
+    """Load a compiled artifact; mmap_mode='r' maps the arrays read-only instead of copying them."""
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    cls = CompiledScaler if meta['kind'] == 'standard_scaler' else CompiledModel
+    return cls.load_arrays(directory, meta, mmap_mode)
+
+
+class CompiledScaler(_ArrayArtifact):
+    """Drop-in transform() for a fitted StandardScaler."""
+    array_names = ('mean', 'scale')
+
+    def __init__(self, arrays, meta):
+        super().__init__(arrays, meta)
+        self.mean_ = arrays['mean']
+        self.scale_ = arrays['scale']
+
+    @classmethod
+    def from_estimator(cls, scaler):
+        n_features = scaler.n_features_in_
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+        meta = {'kind': 'standard_scaler', 'source': type(scaler).__name__, 'n_features': int(n_features)}
+        return cls({'mean': np.asarray(mean, dtype=np.float64), 'scale': np.asarray(scale, dtype=np.float64)}, meta)
+
+    def transform(self, X):
+        # Out-of-place on purpose: np.array() over a DataFrame may hand back its own buffer.
+        X = np.asarray(X, dtype=np.float64)
+        return (X - self.mean_) / self.scale_
+
+
+class CompiledModel(_ArrayArtifact):
+    """Drop-in predict() for a compiled tree ensemble."""
+    array_names = ARRAY_NAMES
+
+    def __init__(self, arrays, meta):
+        super().__init__(arrays, meta)
+        self.n_trees = meta['n_trees']
+        self.max_depth = meta['max_depth']
+        self.has_missing = bool(arrays['missing_left'].any())
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        if 'classes' in meta:
+            self.classes_ = np.asarray(meta['classes'])
+
+    # --- inference ---
+
+    def _leaf_values(self, X):
+        """(rows, trees) leaf values for a float32 batch."""
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            if self.meta['comparison'] == 'le':
+                go_left = x <= self.threshold[nodes]
+            else:
+                go_left = x < self.threshold[nodes]
+            if self.has_missing:
+                go_left |= np.isnan(x) & self.missing_left[nodes]
+            next_nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            if np.array_equal(next_nodes, nodes):
+                break
+            nodes = next_nodes
+        return self.value[nodes]
+
+    def _accumulate(self, X):
+        """Sum leaf values tree by tree (same order as the original libraries)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        chunks = []
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            values = self._leaf_values(X[start:start + CHUNK_ROWS])
+            if self.kind.startswith('xgb'):
+                total = np.full(values.shape[0], self.meta['base_margin'], dtype=np.float32)
+            else:
+                total = np.zeros(values.shape[:1] + values.shape[2:], dtype=np.float64)
+            for t in range(self.n_trees):
+                total += values[:, t]
+            chunks.append(total)
+        return np.concatenate(chunks)
+
+    def predict(self, X):
+        total = self._accumulate(X)
+        if self.kind == 'forest_regressor':
+            return total / self.n_trees
+        if self.kind == 'forest_classifier':
+            return self.classes_.take(np.argmax(total / self.n_trees, axis=1))
+        if self.kind == 'isolation_forest':
+            return np.where(self.decision_function(X) < 0, -1, 1)
+        if self.meta['transform'] == 'logistic':
+            total = 1.0 / (1.0 + np.exp(-total))
+        if self.kind == 'xgb_classifier':
+            return self.classes_[(total > 0.5).astype(np.int64)]
+        return total
+
+    def predict_proba(self, X):
+        if self.kind == 'forest_classifier':
+            return self._accumulate(X) / self.n_trees
+        if self.kind == 'xgb_classifier':
+            positive = 1.0 / (1.0 + np.exp(-self._accumulate(X)))
+            return np.column_stack([1 - positive, positive])
+        raise AttributeError(f"{self.kind} has no predict_proba")
+
+    def score_samples(self, X):
+        if self.kind != 'isolation_forest':
+            raise AttributeError(f"{self.kind} has no score_samples")
+        denominator = self.n_trees * self.meta['path_length_normalizer']
+        depths = self._accumulate(X)
+        scores = 2 ** (-np.divide(depths, denominator, out=np.ones_like(depths), where=denominator != 0))
+        return -scores
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.meta['offset']
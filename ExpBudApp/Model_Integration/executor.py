@@ -0,0 +1,209 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'MODE': 'thread',       # 'thread', 'process' or 'serial'
+    'MAX_WORKERS': 8,
+    'TIMEOUT': 2.0,         # seconds each model may run before its result is dropped
+    'QUEUE_TIMEOUT': 10.0,  # seconds a model may wait for a free worker
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class QueueTimeout(Exception):
+    """A model waited longer than QUEUE_TIMEOUT for a free worker."""
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'PREDICTION_EXECUTOR', {})}
+
+
+def _preload_models():
+    # Process-pool initializer: every worker loads all models before taking work.
+    registry.warm_up()
+
+
+def build_executor(mode, max_workers):
+    if mode == 'serial':
+        return None
+    if mode == 'thread':
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prediction')
+    if mode == 'process':
+        return ProcessPoolExecutor(max_workers=max_workers, initializer=_preload_models)
+    raise ValueError(f"Unknown PREDICTION_EXECUTOR mode: {mode!r}")
+
+
+def get_executor():
+    """The process-wide executor configured by PREDICTION_EXECUTOR (None in serial mode)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                config = get_config()
+                _executor = build_executor(config['MODE'], config['MAX_WORKERS'])
+    return _executor
+
+
+class StartTime:
+    """
+    When a submitted task started running on its worker thread, so timeouts
+    leave out the time it spent queued behind other requests' tasks.
+    on_start, if given, is called from the worker as the task starts.
+    """
+
+    def __init__(self, on_start=None):
+        self.at = None
+        self._started = threading.Event()
+        self._on_start = on_start
+
+    def mark(self):
+        self.at = time.monotonic()
+        self._started.set()
+        if self._on_start is not None:
+            self._on_start()
+
+    def wait(self, timeout):
+        return self._started.wait(timeout)
+
+
+def _run_started(start, func, arg):
+    start.mark()
+    return func(arg)
+
+
+def _submit(executor, func, arg, start):
+    # Carry the request's context (e.g. its metrics.RequestTimer) into the worker thread.
+    return executor.submit(contextvars.copy_context().run, _run_started, start, func, arg)
+
+
+def run_models(tasks, executor=None, timeout=None, queue_timeout=None):
+    """
+    Run independent predictors concurrently.
+    tasks: {label: (predictor_func, model_input)}
+    Returns: (results, errors). A model that raises, runs longer than
+    `timeout` or waits longer than `queue_timeout` for a worker gets None in
+    results and a message in errors, without failing the others. On a thread
+    pool `timeout` counts from the moment the model starts running; a process
+    pool does not report that, so there it counts from submission.
+    """
+    config = get_config()
+    if executor is None:
+        executor = get_executor()
+    if timeout is None:
+        timeout = config['TIMEOUT']
+    if queue_timeout is None:
+        queue_timeout = config['QUEUE_TIMEOUT']
+
+    results, errors = {}, {}
+
+    if executor is None:
+        for label, (func, arg) in tasks.items():
+            try:
+                results[label] = func(arg)
+            except Exception as e:
+                logger.exception("%s prediction failed", label)
+                results[label], errors[label] = None, str(e)
+        return results, errors
+
+    submitted = time.monotonic()
+    if isinstance(executor, ThreadPoolExecutor):
+        starts = {label: StartTime() for label in tasks}
+        futures = {label: _submit(executor, func, arg, starts[label]) for label, (func, arg) in tasks.items()}
+    else:
+        starts = {}
+        futures = {label: executor.submit(func, arg) for label, (func, arg) in tasks.items()}
+    for label, future in futures.items():
+        start = starts.get(label)
+        try:
+            began = submitted
+            if start is not None:
+                if not start.wait(max(0, submitted + queue_timeout - time.monotonic())) and future.cancel():
+                    logger.warning("%s prediction waited more than %ss for a worker", label, queue_timeout)
+                    results[label], errors[label] = None, f"no free worker within {queue_timeout}s"
+                    continue
+                # Not yet marked only when it started just as the queue wait ran out
+                began = start.at if start.at is not None else time.monotonic()
+            results[label] = future.result(timeout=max(0, began + timeout - time.monotonic()))
+        except TimeoutError:
+            # A running thread cannot be interrupted; its result is simply discarded.
+            future.cancel()
+            logger.warning("%s prediction timed out after %ss", label, timeout)
+            results[label], errors[label] = None, f"timed out after {timeout}s"
+        except Exception as e:
+            logger.exception("%s prediction failed", label)
+            results[label], errors[label] = None, str(e)
+    return results, errors
+
+
+async def arun_models(tasks, executor=None, timeout=None, queue_timeout=None):
+    """
+    Async counterpart of run_models for ASGI views: each predictor runs on the
+    bounded executor and is awaited without blocking the event loop, with the
+    same timeouts.
+    """
+    config = get_config()
+    if executor is None:
+        executor = get_executor()
+    if timeout is None:
+        timeout = config['TIMEOUT']
+    if queue_timeout is None:
+        queue_timeout = config['QUEUE_TIMEOUT']
+
+    if executor is None:
+        # Serial mode: keep the six models on one worker thread, off the loop.
+        return await asyncio.to_thread(run_models, tasks, None, timeout)
+
+    loop = asyncio.get_running_loop()
+    submitted = time.monotonic()
+
+    async def run(func, arg):
+        if not isinstance(executor, ThreadPoolExecutor):
+            future = asyncio.wrap_future(executor.submit(func, arg))
+            return await asyncio.wait_for(future, timeout)
+        started = asyncio.Event()
+        start = StartTime(on_start=lambda: loop.call_soon_threadsafe(started.set))
+        future = _submit(executor, func, arg, start)
+        try:
+            await asyncio.wait_for(started.wait(), max(0, submitted + queue_timeout - time.monotonic()))
+        except asyncio.TimeoutError:
+            if future.cancel():
+                raise QueueTimeout
+        began = start.at if start.at is not None else time.monotonic()
+        return await asyncio.wait_for(asyncio.wrap_future(future), max(0, began + timeout - time.monotonic()))
+
+    outcomes = await asyncio.gather(*(run(func, arg) for func, arg in tasks.values()), return_exceptions=True)
+
+    results, errors = {}, {}
+    for label, outcome in zip(tasks, outcomes):
+        if isinstance(outcome, QueueTimeout):
+            logger.warning("%s prediction waited more than %ss for a worker", label, queue_timeout)
+            results[label], errors[label] = None, f"no free worker within {queue_timeout}s"
+        elif isinstance(outcome, asyncio.TimeoutError):
+            logger.warning("%s prediction timed out after %ss", label, timeout)
+            results[label], errors[label] = None, f"timed out after {timeout}s"
+        elif isinstance(outcome, BaseException):
+            logger.error("%s prediction failed", label, exc_info=outcome)
+            results[label], errors[label] = None, str(outcome)
+        else:
+            results[label] = outcome
+    return results, errors
+
+
+async def arun(func, *args):
+    """Run one CPU-bound call on the bounded executor (a worker thread in serial mode)."""
+    executor = get_executor()
+    if executor is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.wrap_future(executor.submit(func, *args))
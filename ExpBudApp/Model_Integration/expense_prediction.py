@@ -1,14 +1,12 @@
-import os
-import joblib
 import numpy as np
-import pandas as pd
 
-# Get the absolute path to the directory this file is in
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+from .metrics import model_stage
+from .registry import get_model
+from .utils.feature_matrix import as_feature_frame, as_feature_row, unnamed_features
 
-# Load model and scaler
-model = joblib.load(os.path.join(BASE_DIR, 'models','expense_prediction_model.pkl'))
-scaler = joblib.load(os.path.join(BASE_DIR,'models', 'feature_scaler.pkl'))
+# Model and scaler are loaded lazily by the registry on first prediction
+MODEL_NAME = 'expense_prediction'
+SCALER_NAME = 'feature_scaler'
 
 # Features expected by the model
 selected_features = [
@@ -25,17 +23,28 @@ expense_columns = [
 ]
 
 def predict_disposable_income(input_data: dict):
-    input_df = pd.DataFrame([input_data])
-    scaled_input = scaler.transform(input_df[selected_features])
-    disposable_income = model.predict(scaled_input)[0]
+    with model_stage(MODEL_NAME, 'frame'):
+        row = as_feature_row(input_data, selected_features)
+    with model_stage(MODEL_NAME, 'transform'), unnamed_features():
+        scaled_input = get_model(SCALER_NAME).transform(row)
+    with model_stage(MODEL_NAME, 'predict'), unnamed_features():
+        disposable_income = get_model(MODEL_NAME).predict(scaled_input)[0]
     return disposable_income
 
+def predict_disposable_income_batch(rows):
+    """
+    rows: list of feature dicts, dict of column arrays, or 2-D array ordered like `selected_features`.
+    Returns: array of disposable income predictions, one per row.
+    """
+    input_df = as_feature_frame(rows, selected_features)
+    return get_model(MODEL_NAME).predict(get_model(SCALER_NAME).transform(input_df))
+
 def calculate_spending_ratios(input_data: dict):
-    input_df = pd.DataFrame([input_data])
-    total_expenses = input_df[expense_columns].sum(axis=1).values[0]
+    expenses = as_feature_row(input_data, expense_columns)[0]
+    total_expenses = expenses.sum()
     spending_ratios = {
-        category: input_df[category].values[0] / total_expenses
-        for category in expense_columns
+        category: expense / total_expenses
+        for category, expense in zip(expense_columns, expenses)
     }
     return spending_ratios
 
@@ -55,3 +64,22 @@ def predict_expense_breakdown(input_data: dict):
             k: round(v, 2) for k, v in category_expenses.items()
         }
     }
+
+def predict_expense_breakdown_batch(rows):
+    input_df = as_feature_frame(rows, selected_features)
+    disposable_income = get_model(MODEL_NAME).predict(get_model(SCALER_NAME).transform(input_df))
+    total_expenses = input_df['Income'].to_numpy() - disposable_income
+    expenses = input_df[expense_columns].to_numpy()
+    spending_ratios = expenses / expenses.sum(axis=1, keepdims=True)
+    category_expenses = spending_ratios * total_expenses[:, None]
+
+    return [
+        {
+            'Disposable_Income': round(disposable_income[i], 2),
+            'Total_Expenses': round(total_expenses[i], 2),
+            'Category_Expenses': {
+                k: round(v, 2) for k, v in zip(expense_columns, category_expenses[i])
+            }
+        }
+        for i in range(len(input_df))
+    ]
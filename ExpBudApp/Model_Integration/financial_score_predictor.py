@@ -1,10 +1,10 @@
-import os
-import joblib
-import pandas as pd
+import numpy as np
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+from .metrics import model_stage
+from .registry import get_model
+from .utils.feature_matrix import as_feature_frame, as_feature_row, unnamed_features
 
-model = joblib.load(os.path.join(BASE_DIR, 'models','xgboost_fhs_model.pkl'))
+MODEL_NAME = 'financial_health_score'
 
 features = [
     'Income', 'Disposable_Income', 'Essential_Expenses',
@@ -13,6 +13,12 @@ features = [
 ]
 
 def predict_financial_health_score(input_data: dict):
-    input_df = pd.DataFrame([input_data])
-    score = model.predict(input_df[features])[0]
+    with model_stage(MODEL_NAME, 'frame'):
+        row = as_feature_row(input_data, features)
+    with model_stage(MODEL_NAME, 'predict'), unnamed_features():
+        score = get_model(MODEL_NAME).predict(row)[0]
     return round(score, 2)
+
+def predict_financial_health_score_batch(rows):
+    input_df = as_feature_frame(rows, features)
+    return np.round(get_model(MODEL_NAME).predict(input_df), 2)
@@ -0,0 +1,132 @@
+import atexit
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connections
+from django.utils import timezone
+
+from .cache import input_digest
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'BATCH_SIZE': 200,       # rows per bulk_create
+    'FLUSH_INTERVAL': 2.0,   # seconds between background flushes
+    'MAX_PENDING': 10000,    # buffered rows kept while the database is unreachable
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'PREDICTION_HISTORY', {})}
+
+
+class PredictionHistoryBuffer:
+    """
+    Collects PredictionRecord rows in memory and writes them with bulk_create
+    from a background thread, every FLUSH_INTERVAL seconds or as soon as
+    BATCH_SIZE rows are waiting. record() never touches the database.
+    When the database is unreachable a flush puts its rows back; past
+    MAX_PENDING the oldest are dropped.
+    """
+
+    def __init__(self):
+        self._pending = deque(maxlen=get_config()['MAX_PENDING'])
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._dropped = 0
+
+    def record(self, endpoint, validated_data, outputs, latency_ms, user=None):
+        config = get_config()
+        if not config['ENABLED']:
+            return
+
+        row = {
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'endpoint': endpoint,
+            'inputs_hash': input_digest(validated_data),
+            'model_versions': registry.active_versions(),
+            'outputs': outputs,
+            'latency_ms': latency_ms,
+            'created_at': timezone.now(),
+        }
+        with self._lock:
+            if self._pending.maxlen != config['MAX_PENDING']:
+                self._requeue([])
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(row)
+            backlog = len(self._pending)
+
+        self._ensure_thread()
+        if backlog >= config['BATCH_SIZE']:
+            self._wake.set()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written."""
+        from ExpBudApp.models import PredictionRecord
+
+        with self._lock:
+            rows = list(self._pending)
+            self._pending.clear()
+        if not rows:
+            return 0
+
+        try:
+            PredictionRecord.objects.bulk_create(
+                [PredictionRecord(**row) for row in rows],
+                batch_size=get_config()['BATCH_SIZE'],
+            )
+        except (OperationalError, InterfaceError):
+            # Database unreachable: retry on the next flush.
+            logger.exception("Could not write %d prediction records; keeping them for the next flush", len(rows))
+            with self._lock:
+                self._requeue(rows)
+            return 0
+        except Exception:
+            # Rows the database rejects would fail every retry.
+            logger.exception("Could not write %d prediction records; they are dropped", len(rows))
+            with self._lock:
+                self._dropped += len(rows)
+            return 0
+        return len(rows)
+
+    def _requeue(self, rows):
+        """Put rows back ahead of anything recorded since; the caller holds the lock."""
+        pending = deque(rows, maxlen=get_config()['MAX_PENDING'])
+        pending.extend(self._pending)
+        self._dropped += len(rows) + len(self._pending) - len(pending)
+        self._pending = pending
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'dropped': self._dropped}
+
+    def _ensure_thread(self):
+        # Started on first use rather than import, so forked workers each get their own.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='prediction-history', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(get_config()['FLUSH_INTERVAL'])
+            self._wake.clear()
+            self.flush()
+            # Release this thread's connection between flushes.
+            connections.close_all()
+
+
+history = PredictionHistoryBuffer()
+atexit.register(history.flush)
+
+
+def record_prediction(endpoint, validated_data, outputs, latency_ms, user=None):
+    history.record(endpoint, validated_data, outputs, latency_ms, user=user)
@@ -0,0 +1,243 @@
+"""
+Per-stage latency histograms for the prediction endpoints, exported in the
+Prometheus text format by /api/metrics/.
+
+Histograms live in process memory, so every WSGI/ASGI worker reports its own
+series; scrape each worker or aggregate with sum by (le) in PromQL.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from . import cache as prediction_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'SLOW_REQUEST_MS': 250,  # requests slower than this are logged at WARNING, the rest at DEBUG
+    'PUBLIC': False,         # let unauthenticated scrapers read /api/metrics/ (otherwise staff only)
+}
+
+# Bucket upper bounds in seconds, from 50us to 2.5s
+BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# RequestTimer of the request being served, so predictors can add their stages to it
+_current_request = contextvars.ContextVar('prediction_request_timer', default=None)
+
+# Functions returning extra exposition lines for render() (see register_collector)
+_collectors = []
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'PREDICTION_METRICS', {})}
+
+
+def enabled():
+    return getattr(settings, 'PREDICTION_METRICS', {}).get('ENABLED', DEFAULT_CONFIG['ENABLED'])
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'lock')
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class HistogramFamily:
+    """A named histogram with one child per combination of label values."""
+
+    def __init__(self, name, documentation, labelnames, buckets=BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.children = {}
+        self.lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            children = sorted(self.children.items())
+        for values, histogram in children:
+            counts, total = histogram.snapshot()
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total!r}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+REQUEST_STAGES = HistogramFamily(
+    'prediction_request_stage_seconds',
+    "Time spent in each stage of a prediction request (stage=\"total\" is the whole request).",
+    ('endpoint', 'stage'),
+)
+MODEL_STAGES = HistogramFamily(
+    'prediction_model_stage_seconds',
+    "Time each model spends building its feature row, scaling it and predicting.",
+    ('model', 'stage'),
+)
+
+
+class _Timed:
+    """Context manager adding its elapsed time to a histogram and, optionally, to a request's breakdown."""
+    __slots__ = ('histogram', 'timer', 'key', 'start')
+
+    def __init__(self, histogram, timer, key):
+        self.histogram = histogram
+        self.timer = timer
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.histogram.observe(elapsed)
+        if self.timer is not None:
+            self.timer.add(self.key, elapsed)
+
+
+class _NotTimed:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NOT_TIMED = _NotTimed()
+
+
+class RequestTimer:
+    """
+    Times the stages of one prediction request:
+
+        with RequestTimer('unified') as timer:
+            with timer.stage('validate'):
+                ...
+
+    Each stage goes into REQUEST_STAGES. Code called within the block can
+    report further stages through stage() and model_stage() without being
+    handed the timer. The whole breakdown is logged when the block exits.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.enabled = enabled()
+        self.stages = {}
+        self.notes = {}
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._token = _current_request.set(self) if self.enabled else None
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.enabled:
+            return
+        _current_request.reset(self._token)
+        elapsed = time.perf_counter() - self.started
+        REQUEST_STAGES.labels(self.endpoint, 'total').observe(elapsed)
+
+        level = logging.WARNING if elapsed * 1000 > get_config()['SLOW_REQUEST_MS'] else logging.DEBUG
+        if logger.isEnabledFor(level):
+            # A timed-out model may still report into self.stages from its thread, so iterate over a copy.
+            breakdown = ' '.join(f"{name}={seconds * 1000:.2f}ms" for name, seconds in list(self.stages.items()))
+            notes = ''.join(f" {name}={value}" for name, value in self.notes.items())
+            logger.log(level, "%s prediction %.2fms: %s%s", self.endpoint, elapsed * 1000, breakdown, notes)
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NOT_TIMED
+        return _Timed(REQUEST_STAGES.labels(self.endpoint, name), self, name)
+
+    def add(self, name, seconds):
+        # Model stages may arrive from executor threads; distinct keys keep this safe under the GIL.
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def note(self, name, value):
+        """Extra context for the log line, e.g. whether the cache was hit."""
+        self.notes[name] = value
+
+
+def stage(name):
+    """Time a stage of the request being served (a no-op outside a RequestTimer)."""
+    timer = _current_request.get()
+    if timer is None:
+        return _NOT_TIMED
+    return timer.stage(name)
+
+
+def note(name, value):
+    """Add context to the log line of the request being served (a no-op outside a RequestTimer)."""
+    timer = _current_request.get()
+    if timer is not None:
+        timer.note(name, value)
+
+
+def model_stage(model, stage):
+    """Time one stage (frame, transform, predict) of a model's prediction."""
+    if not enabled():
+        return _NOT_TIMED
+    return _Timed(MODEL_STAGES.labels(model, stage), _current_request.get(), f"{model}.{stage}")
+
+
+def register_collector(collect):
+    """Add a function returning exposition lines of its own to render()."""
+    _collectors.append(collect)
+
+
+def render():
+    """All prediction metrics in the Prometheus text exposition format."""
+    lines = REQUEST_STAGES.render() + MODEL_STAGES.render()
+    for collect in _collectors:
+        lines += collect()
+    counters = prediction_cache.stats()
+    for name in ('hits', 'misses'):
+        lines += [
+            f"# HELP prediction_cache_{name}_total Prediction cache {name} in this worker.",
+            f"# TYPE prediction_cache_{name}_total counter",
+            f"prediction_cache_{name}_total {counters[name]}",
+        ]
+    return '\n'.join(lines) + '\n'
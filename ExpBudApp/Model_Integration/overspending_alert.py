@@ -1,12 +1,9 @@
-import os
-import joblib
-import pandas as pd
+from .metrics import model_stage
+from .registry import get_model
+from .utils.feature_matrix import as_feature_frame, as_feature_row, unnamed_features
 
-# Get the absolute path to this file's directory
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-# Load the trained XGBoost model
-overspending_model = joblib.load(os.path.join(BASE_DIR, 'models','overspending_alert_model.pkl'))
+# The trained XGBoost model is loaded lazily by the registry
+MODEL_NAME = 'overspending_alert'
 
 # Features used by the model
 alert_features = [
@@ -19,6 +16,15 @@ def predict_overspending_alert(input_data: dict) -> bool:
     """
     Predict whether the user is overspending.
     """
-    input_df = pd.DataFrame([input_data])
-    prediction = overspending_model.predict(input_df[alert_features])
+    with model_stage(MODEL_NAME, 'frame'):
+        row = as_feature_row(input_data, alert_features)
+    with model_stage(MODEL_NAME, 'predict'), unnamed_features():
+        prediction = get_model(MODEL_NAME).predict(row)
     return bool(prediction[0])
+
+def predict_overspending_alert_batch(rows):
+    """
+    Predict overspending for many users in one call.
+    """
+    input_df = as_feature_frame(rows, alert_features)
+    return get_model(MODEL_NAME).predict(input_df).astype(bool)
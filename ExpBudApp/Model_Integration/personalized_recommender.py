@@ -1,45 +1,64 @@
-import joblib
-import pandas as pd
-import os
+import numpy as np
 
-# Define model path
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'models','personalized_spending_recommender.pkl')
+from .metrics import model_stage
+from .registry import get_model
+from .utils.feature_matrix import as_feature_frame, as_feature_row, unnamed_features
 
-# Load the model
-model = joblib.load(MODEL_PATH)
+# Model is loaded lazily by the registry on first use
+MODEL_NAME = 'personalized_spending'
 
 # Define features used by the model
 FEATURE_COLUMNS = ['Income', 'Essential_Expenses', 'Discretionary_vs_Essential', 'Savings_Gap', 'Cluster_Label']
 
-# Define recommendation logic
+# Recommendation categories, in the order of the allocation table columns
+CATEGORIES = ['Rent', 'Groceries', 'Savings', 'Discretionary']
+SAVINGS = CATEGORIES.index('Savings')
+
+# Share of income per category for clusters 0, 1 and 2 (any other label uses the
+# last row). The Savings column is a placeholder: it comes from the model.
+CLUSTER_ALLOCATIONS = np.array([
+    [0.20, 0.15, 0.0, 0.10],
+    [0.25, 0.15, 0.0, 0.10],
+    [0.30, 0.20, 0.0, 0.15],
+])
+
+
+def allocate(income, cluster, predicted_savings_percentage):
+    """
+    Recommended amounts for a batch of users as an (n, len(CATEGORIES)) array,
+    rounded to cents: one table lookup and one broadcast multiply.
+    """
+    income = np.asarray(income, dtype=np.float64).reshape(-1)
+    cluster = np.asarray(cluster).reshape(-1)
+    rows = np.where((cluster == 0) | (cluster == 1), cluster, len(CLUSTER_ALLOCATIONS) - 1).astype(np.intp)
+    shares = CLUSTER_ALLOCATIONS[rows]  # fancy indexing copies, so the table is untouched
+    shares[:, SAVINGS] = np.asarray(predicted_savings_percentage, dtype=np.float64).reshape(-1) / 100
+    amounts = income[:, None] * shares
+    # Python's round(), as the per-row code used: np.round scales by 100 first and
+    # lands on the other cent at half-cent ties (e.g. 40504.1 * 0.15).
+    return np.array([round(x, 2) for x in amounts.ravel().tolist()]).reshape(amounts.shape)
+
+
 def generate_spending_recommendation(user_input):
-    user_df = pd.DataFrame([user_input], columns=FEATURE_COLUMNS)
-    predicted_savings_percentage = model.predict(user_df)[0]
-
-    income = user_input['Income']
-    cluster = user_input['Cluster_Label']
-
-    if cluster == 0:
-        recommendations = {
-            'Rent': income * 0.20,
-            'Groceries': income * 0.15,
-            'Savings': income * (predicted_savings_percentage / 100),
-            'Discretionary': income * 0.10
-        }
-    elif cluster == 1:
-        recommendations = {
-            'Rent': income * 0.25,
-            'Groceries': income * 0.15,
-            'Savings': income * (predicted_savings_percentage / 100),
-            'Discretionary': income * 0.10
-        }
-    else:
-        recommendations = {
-            'Rent': income * 0.30,
-            'Groceries': income * 0.20,
-            'Savings': income * (predicted_savings_percentage / 100),
-            'Discretionary': income * 0.15
-        }
-
-    # Round and return
-    return {k: round(float(v), 2) for k, v in recommendations.items()}
\ No newline at end of file
+    with model_stage(MODEL_NAME, 'frame'):
+        row = as_feature_row(user_input, FEATURE_COLUMNS)
+    with model_stage(MODEL_NAME, 'predict'), unnamed_features():
+        predicted_savings_percentage = get_model(MODEL_NAME).predict(row)[0]
+    amounts = allocate(user_input['Income'], user_input['Cluster_Label'], predicted_savings_percentage)
+    return dict(zip(CATEGORIES, amounts[0].tolist()))
+
+
+def generate_spending_recommendation_columns(rows):
+    """
+    Columnar batch API: {category: float64 array of rounded amounts}, one
+    entry per input row, for exports and other array consumers.
+    """
+    user_df = as_feature_frame(rows, FEATURE_COLUMNS)
+    predicted_savings_percentage = get_model(MODEL_NAME).predict(user_df)
+    amounts = allocate(user_df['Income'].to_numpy(), user_df['Cluster_Label'].to_numpy(), predicted_savings_percentage)
+    return {category: amounts[:, j] for j, category in enumerate(CATEGORIES)}
+
+
+def generate_spending_recommendation_batch(rows):
+    columns = generate_spending_recommendation_columns(rows)
+    return [dict(zip(CATEGORIES, values)) for values in zip(*(columns[c].tolist() for c in CATEGORIES))]
@@ -0,0 +1,374 @@
+import hashlib
+import importlib
+import logging
+import os
+import threading
+import time
+
+import joblib
+from django.conf import settings
+
+from .compiled import load_compiled
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+# Registry name -> artifact file inside the models directory
+ARTIFACTS = {
+    'expense_prediction': 'expense_prediction_model.pkl',
+    'feature_scaler': 'feature_scaler.pkl',
+    'overspending_alert': 'overspending_alert_model.pkl',
+    'anomaly_detection': 'isolation_forest_model.pkl',
+    'savings_efficiency': 'decision_tree_model.pkl',
+    'financial_health_score': 'xgboost_fhs_model.pkl',
+    'personalized_spending': 'personalized_spending_recommender.pkl',
+    'spending_clusters': 'spending_clusters.pkl',
+}
+
+# Artifacts a release may lack; their consumers fall back to a default
+OPTIONAL_ARTIFACTS = {'spending_clusters'}
+
+# Releases live in models/versions/<release>/; models/CURRENT names the active one.
+VERSIONS_DIR = 'versions'
+CURRENT_FILE = 'CURRENT'
+
+# Libraries the pickled estimators are defined in
+MODEL_LIBRARIES = ('sklearn.ensemble', 'sklearn.tree', 'sklearn.preprocessing', 'xgboost')
+
+_import_lock = threading.Lock()
+_libraries_imported = False
+
+
+def _import_model_libraries():
+    """
+    Import MODEL_LIBRARIES once per process, one thread at a time: concurrent
+    first imports of sklearn/xgboost (as unpickling does) can deadlock on
+    Python's module locks. Later loads unpickle in parallel.
+    """
+    global _libraries_imported
+    if _libraries_imported:
+        return
+    with _import_lock:
+        if not _libraries_imported:
+            for module in MODEL_LIBRARIES:
+                try:
+                    importlib.import_module(module)
+                except ImportError:
+                    # Compiled-only deployments may not ship every library.
+                    pass
+            _libraries_imported = True
+
+
+def _current_rss():
+    """Resident set size of this process in bytes, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def file_version(path):
+    """Short content hash of an artifact file, as reported in Model_Versions."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _model_format():
+    return getattr(settings, 'PREDICTION_MODEL_FORMAT', 'joblib')
+
+
+def _mmap_mode():
+    return 'r' if getattr(settings, 'PREDICTION_MODEL_MMAP', False) else None
+
+
+class ModelSet:
+    """
+    The artifacts of one release directory, loaded on first use.
+    Concurrent first requests for the same model wait on a per-model lock, so
+    each artifact is unpickled exactly once per process. Different models, and
+    the models of different releases, load in parallel.
+    """
+
+    def __init__(self, artifacts, directory, release):
+        self.artifacts = artifacts
+        self.directory = directory
+        self.release = release
+        self._models = {}
+        self._stats = {}
+        self._versions = None
+        self._fingerprint = None
+        self._present = {}
+        self._locks = {name: threading.Lock() for name in artifacts}
+
+    def path(self, name):
+        return os.path.join(self.directory, self.artifacts[name])
+
+    def has(self, name):
+        # Checked once: published releases never change in place (the flat
+        # layout picks up a new artifact on restart).
+        if name not in OPTIONAL_ARTIFACTS:
+            return True
+        present = self._present.get(name)
+        if present is None:
+            present = self._present[name] = os.path.isfile(self.path(name))
+        return present
+
+    def compiled_path(self, name):
+        return os.path.join(self.directory, 'compiled', name)
+
+    def _artifact_path(self, name):
+        """Compiled artifact directory when enabled and present, else the pickle."""
+        if _model_format() == 'compiled':
+            compiled = self.compiled_path(name)
+            if os.path.isfile(os.path.join(compiled, 'meta.json')):
+                return compiled
+        return self.path(name)
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+        return model
+
+    def _load(self, name):
+        path = self._artifact_path(name)
+        rss_before = _current_rss()
+        start = time.perf_counter()
+        if os.path.isdir(path):
+            model = load_compiled(path, mmap_mode=_mmap_mode())
+            file_bytes = sum(entry.stat().st_size for entry in os.scandir(path))
+        else:
+            _import_model_libraries()
+            model = joblib.load(path)
+            file_bytes = os.path.getsize(path)
+        elapsed = time.perf_counter() - start
+        rss_after = _current_rss()
+
+        # RSS deltas are approximate when other models load concurrently.
+        self._stats[name] = {
+            'path': path,
+            'file_bytes': file_bytes,
+            'load_seconds': elapsed,
+            'rss_delta_bytes': rss_after - rss_before if rss_before is not None else None,
+        }
+        self._models[name] = model
+        logger.info("Loaded model '%s' from %s in %.3fs", name, path, elapsed)
+        return model
+
+    def versions(self):
+        """
+        Short content hash of each artifact ({name: version}), computed once
+        and identical on every host serving the same files. Missing optional
+        artifacts are reported as None.
+        """
+        if self._versions is None:
+            versions = {}
+            for name in sorted(self.artifacts):
+                if not self.has(name):
+                    versions[name] = None
+                    continue
+                versions[name] = file_version(self.path(name))
+            self._versions = versions
+        return dict(self._versions)
+
+    def fingerprint(self):
+        """
+        Short hash over every artifact version, so anything derived from model
+        output can be keyed on it.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for name, version in sorted(self.versions().items()):
+                if version is None:
+                    continue
+                digest.update(f"{name}:{version};".encode())
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def loaded(self):
+        return list(self._models)
+
+    def stats(self):
+        return {name: dict(stat) for name, stat in self._stats.items()}
+
+
+class ModelRegistry:
+    """
+    Serves models from the active release. When models/CURRENT changes, the
+    new release is loaded in the background and swapped in as one reference
+    assignment, so requests keep using the old models until the new ones are
+    ready and never wait on a load. Without a CURRENT file the artifacts are
+    read straight from the models directory.
+    """
+
+    def __init__(self, artifacts):
+        self.artifacts = artifacts
+        self._active = None
+        self._active_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._watcher = None
+
+    @property
+    def models_dir(self):
+        return getattr(settings, 'PREDICTION_MODELS_DIR', DEFAULT_MODELS_DIR)
+
+    @property
+    def model_format(self):
+        return _model_format()
+
+    @property
+    def mmap_mode(self):
+        return _mmap_mode()
+
+    @property
+    def reload_interval(self):
+        return getattr(settings, 'PREDICTION_MODEL_RELOAD_INTERVAL', 0)
+
+    def release_dir(self, release):
+        if release is None:
+            return self.models_dir
+        return os.path.join(self.models_dir, VERSIONS_DIR, release)
+
+    def current_release(self):
+        """Release named by models/CURRENT, or None for the flat layout."""
+        try:
+            with open(os.path.join(self.models_dir, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def releases(self):
+        try:
+            return sorted(entry.name for entry in os.scandir(os.path.join(self.models_dir, VERSIONS_DIR))
+                          if entry.is_dir() and not entry.name.startswith('.'))
+        except FileNotFoundError:
+            return []
+
+    def activate(self, release):
+        """Point models/CURRENT at `release`, atomically (write + os.replace)."""
+        if not os.path.isdir(self.release_dir(release)):
+            raise ValueError(f"No such model release: {release}")
+        current = os.path.join(self.models_dir, CURRENT_FILE)
+        tmp = f"{current}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(release + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, current)
+
+    def _open(self, release):
+        return ModelSet(self.artifacts, self.release_dir(release), release)
+
+    @property
+    def active(self):
+        model_set = self._active
+        if model_set is None:
+            with self._active_lock:
+                if self._active is None:
+                    self._active = self._open(self.current_release())
+                model_set = self._active
+            self._ensure_watcher()
+        return model_set
+
+    def refresh(self):
+        """
+        Swap to the release named by models/CURRENT if it changed. Every
+        artifact of the new release is loaded first, so no request pays for a
+        load after the swap.
+        Returns True when a swap happened.
+        """
+        with self._refresh_lock:
+            old = self.active
+            release = self.current_release()
+            if release == old.release:
+                return False
+
+            new = self._open(release)
+            start = time.perf_counter()
+            for name in self.artifacts:
+                if new.has(name):
+                    new.get(name)
+            new.fingerprint()
+            self._active = new
+            logger.info(
+                "Switched models from release %s to %s (%d models preloaded in %.3fs)",
+                old.release, release, len(new.loaded()), time.perf_counter() - start,
+            )
+            return True
+
+    def _ensure_watcher(self):
+        # Started on first use rather than import, so forked workers each get their own.
+        if not self.reload_interval or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        with self._active_lock:
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(target=self._watch, name='model-release-watcher', daemon=True)
+                self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the current release; the next check retries.
+                logger.exception("Could not switch to model release %s", self.current_release())
+
+    # The methods below act on the active release.
+
+    def path(self, name):
+        return self.active.path(name)
+
+    def compiled_path(self, name):
+        return self.active.compiled_path(name)
+
+    def has(self, name):
+        return self.active.has(name)
+
+    def get(self, name):
+        return self.active.get(name)
+
+    def versions(self):
+        return self.active.versions()
+
+    def fingerprint(self):
+        return self.active.fingerprint()
+
+    def active_versions(self):
+        """Release name and per-model versions, as reported in prediction responses."""
+        model_set = self.active
+        return {'release': model_set.release, 'models': model_set.versions()}
+
+    def is_loaded(self, name):
+        return self.active.is_loaded(name)
+
+    def warm_up(self, names=None):
+        """Load the given models (all by default) and return their load stats."""
+        model_set = self.active
+        for name in names or self.artifacts:
+            if model_set.has(name):
+                model_set.get(name)
+        return model_set.stats()
+
+    def stats(self):
+        return self.active.stats()
+
+
+registry = ModelRegistry(ARTIFACTS)
+
+
+def get_model(name):
+    return registry.get(name)
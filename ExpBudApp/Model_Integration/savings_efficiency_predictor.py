@@ -1,11 +1,9 @@
-import joblib
-import numpy as np
-import os
+from .metrics import model_stage
+from .registry import get_model
+from .utils.feature_matrix import as_feature_matrix, as_feature_row, unnamed_features
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'models','decision_tree_model.pkl')
-
-# Load model once
-model = joblib.load(MODEL_PATH)
+# Model is loaded once, lazily, by the registry
+MODEL_NAME = 'savings_efficiency'
 
 FEATURE_COLUMNS = [
     'Income', 'Disposable_Income', 'Essential_Expenses', 'Non_Essential_Expenses',
@@ -19,6 +17,17 @@ def predict_savings_efficiency(data_dict):
     data_dict: Dictionary of user financial inputs matching FEATURE_COLUMNS.
     Returns: 0 or 1 (whether savings target is achieved)
     """
-    X = np.array([[data_dict[col] for col in FEATURE_COLUMNS]])
-    prediction = model.predict(X)[0]
+    with model_stage(MODEL_NAME, 'frame'):
+        X = as_feature_row(data_dict, FEATURE_COLUMNS)
+    with model_stage(MODEL_NAME, 'predict'), unnamed_features():
+        prediction = get_model(MODEL_NAME).predict(X)[0]
     return int(prediction)
+
+def predict_savings_efficiency_batch(rows):
+    """
+    rows: list of dicts, dict of column arrays, or 2-D array ordered like FEATURE_COLUMNS.
+    Returns: array of 0/1 predictions, one per row.
+    """
+    X = as_feature_matrix(rows, FEATURE_COLUMNS)
+    with unnamed_features():
+        return get_model(MODEL_NAME).predict(X).astype(int)
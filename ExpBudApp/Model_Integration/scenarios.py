@@ -0,0 +1,61 @@
+"""
+What-if sweeps for /api/predict/scenarios/: one base input, a grid of
+perturbations, every combination scored in one batched call per model.
+"""
+import math
+
+import numpy as np
+
+from . import metrics
+from .batch import BATCH_MODELS, run_model_columns
+from .utils.feature_engineering import INPUT_FIELDS
+
+# Upper bound on grid combinations scored by one request
+MAX_SCENARIOS = 1000
+
+
+def grid_size(grid):
+    return math.prod(len(next(iter(axis.values()))) for axis in grid.values())
+
+
+def expand_grid(base, grid):
+    """
+    Column-oriented batch of the base input followed by every grid combination.
+    base: validated UnifiedFinancialInputSerializer data.
+    grid: {input field: {'scale': [factors]} or {'values': [absolute values]}};
+    combinations vary the last field fastest.
+    Returns: {field: float64 array of length 1 + grid_size(grid)}; row 0 is the base.
+    """
+    axes = []
+    for field, axis in grid.items():
+        if 'scale' in axis:
+            axes.append(float(base[field]) * np.asarray(axis['scale'], dtype=np.float64))
+        else:
+            axes.append(np.asarray(axis['values'], dtype=np.float64))
+
+    n = 1 + grid_size(grid)
+    columns = {field: np.full(n, float(base[field])) for field in INPUT_FIELDS}
+    for field, values in zip(grid, np.meshgrid(*axes, indexing='ij')):
+        columns[field][1:] = values.ravel()
+    return columns
+
+
+def run_scenarios(base, grid, labels=tuple(BATCH_MODELS)):
+    """
+    Score the base input and every grid combination with the requested models.
+    Returns: {'baseline': {label: result}, 'scenarios': [{'inputs': {field: value}, label: result, ...}]}
+    """
+    with metrics.stage('expand'):
+        columns = expand_grid(base, grid)
+    with metrics.stage('models'):
+        predictions = run_model_columns(columns, labels)
+
+    swept = {field: columns[field].tolist() for field in grid}
+    rows = [dict(zip(predictions, row)) for row in zip(*predictions.values())]
+    return {
+        'baseline': rows[0],
+        'scenarios': [
+            {'inputs': {field: values[i] for field, values in swept.items()}, **rows[i]}
+            for i in range(1, len(rows))
+        ],
+    }
@@ -0,0 +1,51 @@
+"""
+Offline scoring of saved UserInputProfiles (see `manage.py score_all_users`).
+Functions here run inside worker processes, so they take and return plain
+NumPy/Python data and never touch the database.
+"""
+import numpy as np
+
+from .batch import run_unified_columns
+from .registry import registry
+
+# UserInputProfile column -> UnifiedFinancialInputSerializer field
+PROFILE_FIELDS = {
+    'income': 'Income',
+    'rent': 'Rent',
+    'loan_repayment': 'Loan_Repayment',
+    'groceries': 'Groceries',
+    'transport': 'Transport',
+    'eating_out': 'Eating_Out',
+    'entertainment': 'Entertainment',
+    'utilities': 'Utilities',
+    'healthcare': 'Healthcare',
+    'education': 'Education',
+    'miscellaneous': 'Miscellaneous',
+}
+
+# Savings goal assumed for profiles, which do not store one (the frontend's default)
+DEFAULT_DESIRED_SAVINGS = 20.0
+
+
+def profile_columns(values, desired_savings=DEFAULT_DESIRED_SAVINGS):
+    """
+    Column-oriented unified inputs from an (n, len(PROFILE_FIELDS)) matrix of
+    profile values. Profiles have no insurance, so it is taken as 0.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(-1, len(PROFILE_FIELDS))
+    columns = {field: values[:, j] for j, field in enumerate(PROFILE_FIELDS.values())}
+    columns['Insurance'] = np.zeros(len(values))
+    columns['Desired_Savings_Percentage'] = np.full(len(values), float(desired_savings))
+    return columns
+
+
+def init_worker():
+    # Process-pool initializer: configure Django and load every model up front.
+    import django
+    django.setup()
+    registry.warm_up()
+
+
+def score_profiles(values, desired_savings=DEFAULT_DESIRED_SAVINGS):
+    """Unified predictions for a chunk of profile values, one dict per row."""
+    return run_unified_columns(profile_columns(values, desired_savings))
@@ -1,5 +1,9 @@
 from rest_framework import serializers
 
+from .batch import BATCH_MODELS
+from .scenarios import MAX_SCENARIOS, grid_size
+from .utils.feature_engineering import INPUT_FIELDS
+
 # 🔄 Unified input serializer to collect all user input in one go
 class UnifiedFinancialInputSerializer(serializers.Serializer):
     Income = serializers.FloatField()
@@ -25,6 +29,46 @@ class UnifiedFinancialInputSerializer(serializers.Serializer):
     Desired_Savings_Percentage = serializers.FloatField()
 
 
+# 🔀 What-if sweep: one axis of the perturbation grid
+class ScenarioAxisSerializer(serializers.Serializer):
+    scale = serializers.ListField(
+        child=serializers.FloatField(min_value=0), required=False, allow_empty=False,
+        help_text="Factors applied to the base value, e.g. [0.9, 0.8, 0.7] for 10-30% cuts",
+    )
+    values = serializers.ListField(
+        child=serializers.FloatField(), required=False, allow_empty=False,
+        help_text="Absolute values replacing the base value",
+    )
+
+    def validate(self, attrs):
+        if len(attrs) != 1:
+            raise serializers.ValidationError("Give exactly one of 'scale' or 'values'.")
+        return attrs
+
+
+# 🔀 What-if sweep over a base input
+class ScenarioSweepSerializer(serializers.Serializer):
+    base = UnifiedFinancialInputSerializer()
+    grid = serializers.DictField(
+        child=ScenarioAxisSerializer(), allow_empty=False,
+        help_text="Numeric input field -> axis; every combination of the axes is scored",
+    )
+    models = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(BATCH_MODELS)), required=False, allow_empty=False,
+        help_text="Models to run (default: all six)",
+    )
+
+    def validate_grid(self, grid):
+        unknown = [field for field in grid if field not in INPUT_FIELDS]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Not sweepable: {', '.join(unknown)}. Choose from {', '.join(INPUT_FIELDS)}."
+            )
+        if grid_size(grid) > MAX_SCENARIOS:
+            raise serializers.ValidationError(f"At most {MAX_SCENARIOS} scenarios per request.")
+        return grid
+
+
 # 🎯 Expense Prediction Model (RandomForestRegressor)
 class ExpensePredictionInputSerializer(serializers.Serializer):
     Income = serializers.FloatField()
@@ -1,117 +1,212 @@
-def compute_feature_sets(user_input):
-    # Basic derived values
-    total_expenses = sum([
-        user_input["Rent"],
-        user_input["Loan_Repayment"],
-        user_input["Insurance"],
-        user_input["Groceries"],
-        user_input["Transport"],
-        user_input["Eating_Out"],
-        user_input["Entertainment"],
-        user_input["Utilities"],
-        user_input["Healthcare"],
-        user_input["Education"],
-        user_input["Miscellaneous"],
-    ])
-    
-    disposable_income = user_input["Income"] - total_expenses
-    desired_savings = (user_input["Desired_Savings_Percentage"] / 100) * user_input["Income"]
-    savings_efficiency = (disposable_income / desired_savings) if desired_savings != 0 else 0
-    calculated_efficiency = (disposable_income / user_input["Income"]) * 100 if user_input["Income"] != 0 else 0
-
-    # Potential savings (can be estimated, mocked, or calculated via logic if needed)
-    potential_savings = {
-        "Groceries": user_input["Groceries"] * 0.1,
-        "Transport": user_input["Transport"] * 0.1,
-        "Eating_Out": user_input["Eating_Out"] * 0.1,
-        "Entertainment": user_input["Entertainment"] * 0.1,
-        "Utilities": user_input["Utilities"] * 0.05,
-        "Healthcare": user_input["Healthcare"] * 0.05,
-        "Education": user_input["Education"] * 0.05,
-        "Miscellaneous": user_input["Miscellaneous"] * 0.05,
+import numpy as np
+
+from ..clustering import assign_cluster, assign_clusters
+
+# Every expense field of UnifiedFinancialInputSerializer, in summation order
+EXPENSE_FIELDS = [
+    "Rent", "Loan_Repayment", "Insurance", "Groceries", "Transport", "Eating_Out",
+    "Entertainment", "Utilities", "Healthcare", "Education", "Miscellaneous",
+]
+
+# Numeric inputs the feature sets are derived from
+INPUT_FIELDS = ["Income", "Desired_Savings_Percentage"] + EXPENSE_FIELDS
+
+FEATURE_SETS = (
+    "expense_prediction",
+    "overspending_alert",
+    "anomaly_detection",
+    "savings_efficiency",
+    "financial_health_score",
+    "personalized_spending",
+)
+
+
+def _ratio(numerator, income, has_income):
+    return numerator / income if has_income else 0
+
+
+def _derive(u):
+    """Compute every derived quantity once from a single validated input."""
+    income = u["Income"]
+    has_income = income != 0
+
+    total_expenses = sum(u[field] for field in EXPENSE_FIELDS)
+    disposable_income = income - total_expenses
+    desired_savings = (u["Desired_Savings_Percentage"] / 100) * income
+    essential = u["Groceries"] + u["Transport"] + u["Utilities"] + u["Healthcare"]
+    discretionary = u["Eating_Out"] + u["Entertainment"] + u["Miscellaneous"]
+    calculated_efficiency = (disposable_income / income) * 100 if has_income else 0
+
+    return {
+        "Total_Expenses": total_expenses,
+        "Disposable_Income": disposable_income,
+        "Savings_Efficiency": (disposable_income / desired_savings) if desired_savings != 0 else 0,
+        "Calculated_Savings_Efficiency": calculated_efficiency,
+        "Essential_Expenses": essential,
+        "Non_Essential_Expenses": discretionary,
+        "Rent_to_Income_Ratio": _ratio(u["Rent"], income, has_income),
+        "Groceries_to_Income_Ratio": _ratio(u["Groceries"], income, has_income),
+        "Total_Expenses_to_Income_Ratio": _ratio(total_expenses, income, has_income),
+        "Discretionary_to_Income_Ratio": _ratio(discretionary, income, has_income),
+        "Debt_to_Income_Ratio": _ratio(u["Loan_Repayment"] + u["Insurance"], income, has_income),
+        # Potential savings (can be estimated, mocked, or calculated via logic if needed)
+        "Potential_Savings_Groceries": u["Groceries"] * 0.1,
+        "Potential_Savings_Transport": u["Transport"] * 0.1,
+        "Potential_Savings_Eating_Out": u["Eating_Out"] * 0.1,
+        "Potential_Savings_Entertainment": u["Entertainment"] * 0.1,
+        "Discretionary_vs_Essential": discretionary / (essential + 1e-5),
+        "Savings_Gap": u["Desired_Savings_Percentage"] - calculated_efficiency,
     }
 
-    # Ratios
-    rent_ratio = user_input["Rent"] / user_input["Income"] if user_input["Income"] != 0 else 0
-    groceries_ratio = user_input["Groceries"] / user_input["Income"] if user_input["Income"] != 0 else 0
-    expenses_ratio = total_expenses / user_input["Income"] if user_input["Income"] != 0 else 0
-    discretionary = sum([
-        user_input["Eating_Out"],
-        user_input["Entertainment"],
-        user_input["Miscellaneous"]
-    ])
-    discretionary_ratio = discretionary / user_input["Income"] if user_input["Income"] != 0 else 0
-    debt_ratio = (user_input["Loan_Repayment"] + user_input["Insurance"]) / user_input["Income"] if user_input["Income"] != 0 else 0
-
-    # Clustering - can be mocked for now
-    cluster_label = 1  # optional k-means clustering prediction
+
+def _derive_batch(u):
+    """Vectorized `_derive` over a column-oriented batch of float64 arrays."""
+    income = u["Income"]
+    has_income = income != 0
+
+    def ratio(numerator):
+        return np.divide(numerator, income, out=np.zeros_like(income), where=has_income)
+
+    total_expenses = 0
+    for field in EXPENSE_FIELDS:
+        total_expenses = total_expenses + u[field]
+    disposable_income = income - total_expenses
+    desired_savings = (u["Desired_Savings_Percentage"] / 100) * income
+    essential = u["Groceries"] + u["Transport"] + u["Utilities"] + u["Healthcare"]
+    discretionary = u["Eating_Out"] + u["Entertainment"] + u["Miscellaneous"]
+    calculated_efficiency = ratio(disposable_income) * 100
 
     return {
-        "expense_prediction": {
-            "Income": user_input["Income"],
-            "Rent": user_input["Rent"],
-            "Loan_Repayment": user_input["Loan_Repayment"],
-            "Groceries": user_input["Groceries"],
-            "Transport": user_input["Transport"],
-            "Eating_Out": user_input["Eating_Out"],
-            "Entertainment": user_input["Entertainment"],
-            "Utilities": user_input["Utilities"],
-            "Healthcare": user_input["Healthcare"],
-            "Education": user_input["Education"],
-            "Miscellaneous": user_input["Miscellaneous"],
-            "Savings_Efficiency": savings_efficiency,
-            "Rent_to_Income_Ratio": rent_ratio,
-            "Groceries_to_Income_Ratio": groceries_ratio,
-            "Total_Expenses_to_Income_Ratio": expenses_ratio
-        },
-        "overspending_alert": {
-            "Income": user_input["Income"],
-            "Total_Expenses": total_expenses,
-            "Rent_to_Income_Ratio": rent_ratio,
-            "Groceries_to_Income_Ratio": groceries_ratio,
-            "Total_Expenses_to_Income_Ratio": expenses_ratio,
-            "Savings_Efficiency": savings_efficiency,
-            "Essential_Expenses": user_input["Groceries"] + user_input["Transport"] + user_input["Utilities"] + user_input["Healthcare"],
-            "Non_Essential_Expenses": discretionary,
-        },
-        "anomaly_detection": {
-            "Income": user_input["Income"],
-            "Total_Expenses": total_expenses,
-            "Rent_to_Income_Ratio": rent_ratio,
-            "Groceries_to_Income_Ratio": groceries_ratio,
-            "Total_Expenses_to_Income_Ratio": expenses_ratio,
-            "Savings_Efficiency": savings_efficiency,
-            "Discretionary_to_Income_Ratio": discretionary_ratio,
-            "Savings_Target_Efficiency": calculated_efficiency
-        },
-        "savings_efficiency": {
-            "Income": user_input["Income"],
-            "Disposable_Income": disposable_income,
-            "Essential_Expenses": user_input["Groceries"] + user_input["Transport"] + user_input["Utilities"] + user_input["Healthcare"],
-            "Non_Essential_Expenses": discretionary,
-            "Total_Expenses_to_Income_Ratio": expenses_ratio,
-            "Desired_Savings_Percentage": user_input["Desired_Savings_Percentage"],
-            "Calculated_Savings_Efficiency": calculated_efficiency,
-            "Potential_Savings_Groceries": potential_savings["Groceries"],
-            "Potential_Savings_Transport": potential_savings["Transport"],
-            "Potential_Savings_Eating_Out": potential_savings["Eating_Out"],
-            "Potential_Savings_Entertainment": potential_savings["Entertainment"],
-        },
-        "financial_health_score": {
-            "Income": user_input["Income"],
-            "Disposable_Income": disposable_income,
-            "Essential_Expenses": user_input["Groceries"] + user_input["Transport"] + user_input["Utilities"] + user_input["Healthcare"],
-            "Non_Essential_Expenses": discretionary,
-            "Total_Expenses_to_Income_Ratio": expenses_ratio,
-            "Desired_Savings_Percentage": user_input["Desired_Savings_Percentage"],
-            "Savings_Efficiency": savings_efficiency,
-            "Debt_to_Income_Ratio": debt_ratio
-        },
-        "personalized_spending": {
-            "Income": user_input["Income"],
-            "Essential_Expenses": user_input["Groceries"] + user_input["Transport"] + user_input["Utilities"] + user_input["Healthcare"],
-            "Discretionary_vs_Essential": discretionary / (user_input["Groceries"] + user_input["Transport"] + user_input["Utilities"] + user_input["Healthcare"] + 1e-5),
-            "Savings_Gap": user_input["Desired_Savings_Percentage"] - calculated_efficiency,
-            "Cluster_Label": cluster_label
+        "Total_Expenses": total_expenses,
+        "Disposable_Income": disposable_income,
+        "Savings_Efficiency": np.divide(
+            disposable_income, desired_savings,
+            out=np.zeros_like(disposable_income), where=desired_savings != 0,
+        ),
+        "Calculated_Savings_Efficiency": calculated_efficiency,
+        "Essential_Expenses": essential,
+        "Non_Essential_Expenses": discretionary,
+        "Rent_to_Income_Ratio": ratio(u["Rent"]),
+        "Groceries_to_Income_Ratio": ratio(u["Groceries"]),
+        "Total_Expenses_to_Income_Ratio": ratio(total_expenses),
+        "Discretionary_to_Income_Ratio": ratio(discretionary),
+        "Debt_to_Income_Ratio": ratio(u["Loan_Repayment"] + u["Insurance"]),
+        "Potential_Savings_Groceries": u["Groceries"] * 0.1,
+        "Potential_Savings_Transport": u["Transport"] * 0.1,
+        "Potential_Savings_Eating_Out": u["Eating_Out"] * 0.1,
+        "Potential_Savings_Entertainment": u["Entertainment"] * 0.1,
+        "Discretionary_vs_Essential": discretionary / (essential + 1e-5),
+        "Savings_Gap": u["Desired_Savings_Percentage"] - calculated_efficiency,
+    }
+
+
+def _build(key, u, d, cluster_label):
+    if key == "expense_prediction":
+        return {
+            "Income": u["Income"],
+            "Rent": u["Rent"],
+            "Loan_Repayment": u["Loan_Repayment"],
+            "Groceries": u["Groceries"],
+            "Transport": u["Transport"],
+            "Eating_Out": u["Eating_Out"],
+            "Entertainment": u["Entertainment"],
+            "Utilities": u["Utilities"],
+            "Healthcare": u["Healthcare"],
+            "Education": u["Education"],
+            "Miscellaneous": u["Miscellaneous"],
+            "Savings_Efficiency": d["Savings_Efficiency"],
+            "Rent_to_Income_Ratio": d["Rent_to_Income_Ratio"],
+            "Groceries_to_Income_Ratio": d["Groceries_to_Income_Ratio"],
+            "Total_Expenses_to_Income_Ratio": d["Total_Expenses_to_Income_Ratio"],
+        }
+    if key == "overspending_alert":
+        return {
+            "Income": u["Income"],
+            "Total_Expenses": d["Total_Expenses"],
+            "Rent_to_Income_Ratio": d["Rent_to_Income_Ratio"],
+            "Groceries_to_Income_Ratio": d["Groceries_to_Income_Ratio"],
+            "Total_Expenses_to_Income_Ratio": d["Total_Expenses_to_Income_Ratio"],
+            "Savings_Efficiency": d["Savings_Efficiency"],
+            "Essential_Expenses": d["Essential_Expenses"],
+            "Non_Essential_Expenses": d["Non_Essential_Expenses"],
+        }
+    if key == "anomaly_detection":
+        return {
+            "Income": u["Income"],
+            "Total_Expenses": d["Total_Expenses"],
+            "Rent_to_Income_Ratio": d["Rent_to_Income_Ratio"],
+            "Groceries_to_Income_Ratio": d["Groceries_to_Income_Ratio"],
+            "Total_Expenses_to_Income_Ratio": d["Total_Expenses_to_Income_Ratio"],
+            "Savings_Efficiency": d["Savings_Efficiency"],
+            "Discretionary_to_Income_Ratio": d["Discretionary_to_Income_Ratio"],
+            "Savings_Target_Efficiency": d["Calculated_Savings_Efficiency"],
+        }
+    if key == "savings_efficiency":
+        return {
+            "Income": u["Income"],
+            "Disposable_Income": d["Disposable_Income"],
+            "Essential_Expenses": d["Essential_Expenses"],
+            "Non_Essential_Expenses": d["Non_Essential_Expenses"],
+            "Total_Expenses_to_Income_Ratio": d["Total_Expenses_to_Income_Ratio"],
+            "Desired_Savings_Percentage": u["Desired_Savings_Percentage"],
+            "Calculated_Savings_Efficiency": d["Calculated_Savings_Efficiency"],
+            "Potential_Savings_Groceries": d["Potential_Savings_Groceries"],
+            "Potential_Savings_Transport": d["Potential_Savings_Transport"],
+            "Potential_Savings_Eating_Out": d["Potential_Savings_Eating_Out"],
+            "Potential_Savings_Entertainment": d["Potential_Savings_Entertainment"],
         }
+    if key == "financial_health_score":
+        return {
+            "Income": u["Income"],
+            "Disposable_Income": d["Disposable_Income"],
+            "Essential_Expenses": d["Essential_Expenses"],
+            "Non_Essential_Expenses": d["Non_Essential_Expenses"],
+            "Total_Expenses_to_Income_Ratio": d["Total_Expenses_to_Income_Ratio"],
+            "Desired_Savings_Percentage": u["Desired_Savings_Percentage"],
+            "Savings_Efficiency": d["Savings_Efficiency"],
+            "Debt_to_Income_Ratio": d["Debt_to_Income_Ratio"],
+        }
+    if key == "personalized_spending":
+        return {
+            "Income": u["Income"],
+            "Essential_Expenses": d["Essential_Expenses"],
+            "Discretionary_vs_Essential": d["Discretionary_vs_Essential"],
+            "Savings_Gap": d["Savings_Gap"],
+            "Cluster_Label": cluster_label,
+        }
+    raise KeyError(f"Unknown feature set: {key}")
+
+
+def compute_feature_sets(user_input, keys=FEATURE_SETS):
+    """
+    Build the model input dicts for one validated user input.
+    keys: the feature sets to build (all six by default).
+    """
+    derived = _derive(user_input)
+    # Only the recommender uses the spending cluster of the input.
+    cluster_label = assign_cluster(derived) if "personalized_spending" in keys else None
+    return {key: _build(key, user_input, derived, cluster_label) for key in keys}
+
+
+def to_columns(user_inputs):
+    """Turn a list of validated user inputs into a column-oriented batch."""
+    return {
+        field: np.fromiter((u[field] for u in user_inputs), dtype=np.float64, count=len(user_inputs))
+        for field in INPUT_FIELDS
     }
+
+
+def compute_derived_batch(columns):
+    """Derived quantities (totals, ratios, gaps) for a column-oriented batch."""
+    return _derive_batch(columns)
+
+
+def compute_feature_batch(columns, keys=FEATURE_SETS):
+    """
+    Vectorized compute_feature_sets.
+    columns: dict of equal-length float64 arrays keyed by INPUT_FIELDS (see to_columns).
+    Returns: {feature set: {feature name: array}}, ready for the *_batch predictors.
+    """
+    derived = _derive_batch(columns)
+    cluster_label = assign_clusters(derived) if "personalized_spending" in keys else None
+    return {key: _build(key, columns, derived, cluster_label) for key in keys}
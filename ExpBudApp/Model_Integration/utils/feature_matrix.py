@@ -0,0 +1,77 @@
+import threading
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# The estimators were fitted on DataFrames; fed plain arrays in the same column
+# order they predict identically but warn on every call.
+UNNAMED_FEATURES_WARNING = 'X does not have valid feature names'
+
+_unnamed_lock = threading.Lock()
+_unnamed_depth = 0
+_unnamed_filter = None
+
+
+@contextmanager
+def unnamed_features():
+    """
+    Silence the estimators' missing-feature-names warning inside the block,
+    for arrays built by as_feature_row/as_feature_matrix in fitted column order.
+    The unified view predicts from several threads at once, and
+    warnings.catch_warnings() restores the filter list it saw on entry, which
+    can leave another thread's filter installed for good. Here the first
+    block to enter adds the filter and the last to leave removes it.
+    """
+    global _unnamed_depth, _unnamed_filter
+    with _unnamed_lock:
+        if _unnamed_depth == 0:
+            warnings.filterwarnings('ignore', message=UNNAMED_FEATURES_WARNING, category=UserWarning)
+            _unnamed_filter = warnings.filters[0]
+        _unnamed_depth += 1
+    try:
+        yield
+    finally:
+        with _unnamed_lock:
+            _unnamed_depth -= 1
+            if _unnamed_depth == 0:
+                try:
+                    warnings.filters.remove(_unnamed_filter)
+                except ValueError:
+                    pass  # the filter list was reset meanwhile, e.g. by resetwarnings()
+                _unnamed_filter = None
+
+
+def as_feature_frame(rows, columns):
+    """
+    Build one DataFrame for a whole batch of feature rows.
+    rows: list of feature dicts, a dict of column arrays, or a 2-D array
+    already ordered like `columns`.
+    """
+    if isinstance(rows, np.ndarray):
+        return pd.DataFrame(np.atleast_2d(rows), columns=columns)
+    if isinstance(rows, dict):
+        return pd.DataFrame(rows, columns=columns)
+    return pd.DataFrame(list(rows), columns=columns)
+
+
+def as_feature_matrix(rows, columns):
+    """Same inputs as as_feature_frame, but returns a plain 2-D float64 array."""
+    if isinstance(rows, np.ndarray):
+        return np.atleast_2d(rows)
+    if isinstance(rows, dict):
+        return np.column_stack([np.asarray(rows[col], dtype=np.float64) for col in columns])
+    return np.array([[row[col] for col in columns] for row in rows], dtype=np.float64)
+
+
+def as_feature_row(input_data, columns):
+    """
+    Copy one feature dict into a preallocated (1, len(columns)) float64 array,
+    in `columns` order, so estimators can be called without pandas.
+    """
+    row = np.empty((1, len(columns)), dtype=np.float64)
+    values = row[0]
+    for i, col in enumerate(columns):
+        values[i] = input_data[col]
+    return row
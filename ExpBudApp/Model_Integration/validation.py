@@ -0,0 +1,148 @@
+"""
+Fast validation of prediction payloads.
+
+CompiledValidator turns a flat DRF serializer of Float/Integer/Char fields
+into a plan that checks every field's type and range in one loop over the
+payload. Payloads the plan accepts come back as the exact validated_data the
+serializer would produce. Anything it is not sure about (a missing field, a
+numeric string, a value out of range, ...) goes through the serializer
+itself, so invalid input gets DRF's own error messages, codes and shape.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+from django.core.validators import (
+    MaxLengthValidator, MaxValueValidator, MinLengthValidator, MinValueValidator, ProhibitNullCharactersValidator,
+)
+from rest_framework import serializers
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
+
+from .serializers import UnifiedFinancialInputSerializer
+from .utils.feature_engineering import INPUT_FIELDS
+
+FLOAT, INTEGER, STRING = 'float', 'integer', 'string'
+
+_MISSING = object()
+
+# Validators each field kind enforces through its own plan entries
+_KNOWN_VALIDATORS = {
+    FLOAT: (MinValueValidator, MaxValueValidator),
+    INTEGER: (MinValueValidator, MaxValueValidator),
+    STRING: (MinLengthValidator, MaxLengthValidator, ProhibitNullCharactersValidator,
+             ProhibitSurrogateCharactersValidator),
+}
+
+
+def _kind(field):
+    # Exact types only: a subclass may parse values differently.
+    if type(field) is serializers.FloatField:
+        return FLOAT
+    if type(field) is serializers.IntegerField:
+        return INTEGER
+    if type(field) is serializers.CharField:
+        return STRING
+    return None
+
+
+def _plan_entry(serializer, name, field):
+    kind = _kind(field)
+    if kind is None:
+        raise TypeError(f"{name}: {type(field).__name__} cannot be compiled")
+    if not field.required or field.allow_null or field.read_only or field.source != name:
+        raise TypeError(f"{name}: only required, non-null fields without a source can be compiled")
+    if getattr(serializer, f'validate_{name}', None) is not None:
+        raise TypeError(f"{name}: validate_{name}() cannot be compiled")
+    unknown = [v for v in field.validators if not isinstance(v, _KNOWN_VALIDATORS[kind])]
+    if unknown:
+        raise TypeError(f"{name}: validators {unknown} cannot be compiled")
+
+    if kind == STRING:
+        low, high = field.min_length, field.max_length
+        return name, kind, low, high, field.trim_whitespace
+    return name, kind, field.min_value, field.max_value, False
+
+
+class CompiledValidator:
+    """
+    validate()/validate_many() counterparts of serializer_class(data=...).is_valid()
+    and serializer_class(data=..., many=True).is_valid().
+    """
+
+    def __init__(self, serializer_class, vector_fields=()):
+        serializer = serializer_class()
+        if type(serializer).validate is not serializers.Serializer.validate:
+            raise TypeError(f"{serializer_class.__name__}.validate() cannot be compiled")
+        self.serializer_class = serializer_class
+        self.plan = [_plan_entry(serializer, name, field) for name, field in serializer.fields.items()]
+        self.vector_fields = list(vector_fields)
+
+    def _accept(self, data):
+        """validated_data for data, or None unless every field passes the plan."""
+        if not isinstance(data, Mapping):
+            return None
+        get = data.get
+        validated = {}
+        for name, kind, low, high, trim in self.plan:
+            value = get(name, _MISSING)
+            value_type = type(value)
+            if kind is FLOAT:
+                if value_type is int:
+                    try:
+                        value = float(value)
+                    except OverflowError:
+                        return None
+                elif value_type is not float:
+                    return None
+            elif kind is INTEGER:
+                if value_type is not int:
+                    return None
+            else:
+                # ASCII excludes surrogates; NUL, blanks and lengths are checked here.
+                if value_type is not str or not value.isascii() or '\x00' in value:
+                    return None
+                if trim:
+                    value = value.strip()
+                if not value:
+                    return None
+                if low is not None and len(value) < low or high is not None and len(value) > high:
+                    return None
+                validated[name] = value
+                continue
+            if low is not None and value < low or high is not None and value > high:
+                return None
+            validated[name] = value
+        return validated
+
+    def validate(self, data):
+        """(validated_data, None) for a valid payload, else (None, DRF-shaped errors)."""
+        validated = self._accept(data)
+        if validated is not None:
+            return validated, None
+        serializer = self.serializer_class(data=data)
+        if serializer.is_valid():
+            return serializer.validated_data, None
+        return None, serializer.errors
+
+    def validate_many(self, rows):
+        """
+        (validated list, columns, None) for a valid list of payloads, else
+        (None, None, DRF-shaped errors). columns holds one float64 array per
+        vector field, filled from the same pass.
+        """
+        accepted = [self._accept(row) for row in rows] if isinstance(rows, list) else [None]
+        if any(validated is None for validated in accepted):
+            serializer = self.serializer_class(data=rows, many=True)
+            if not serializer.is_valid():
+                return None, None, serializer.errors
+            accepted = serializer.validated_data
+
+        matrix = np.array(
+            [[validated[field] for field in self.vector_fields] for validated in accepted], dtype=np.float64,
+        ).reshape(len(accepted), len(self.vector_fields))
+        # One contiguous array per field, as to_columns() builds them
+        columns = dict(zip(self.vector_fields, np.ascontiguousarray(matrix.T)))
+        return accepted, columns, None
+
+
+# Validator of the /api/predict/ payloads; columns are the inputs the feature sets derive from
+unified_input = CompiledValidator(UnifiedFinancialInputSerializer, vector_fields=INPUT_FIELDS)
@@ -1,26 +1,63 @@
 import logging
-from rest_framework.decorators import api_view
+import time
+from rest_framework.decorators import api_view, permission_classes
+from django.http import HttpResponse
+from rest_framework.permissions import BasePermission, IsAdminUser
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from .serializers import UnifiedFinancialInputSerializer
-from .utils.feature_engineering import compute_feature_sets
+from .serializers import ScenarioSweepSerializer, UnifiedFinancialInputSerializer
+from .utils.feature_engineering import compute_feature_batch, compute_feature_sets
 
 from .expense_prediction import predict_expense_breakdown
 from .overspending_alert import predict_overspending_alert
-from .anomaly_detection import detect_anomaly
+from .anomaly_detection import detect_anomaly, score_anomalies
 from .savings_efficiency_predictor import predict_savings_efficiency
 from .financial_score_predictor import predict_financial_health_score
 from .personalized_recommender import generate_spending_recommendation
+from .batch import BATCH_MODELS, run_unified_columns
+from .executor import run_models
+from . import cache as prediction_cache
+from . import coalescer
+from . import metrics
+from .history import record_prediction
+from .registry import registry
+from .scenarios import MAX_SCENARIOS, run_scenarios
+from .validation import unified_input
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on payloads accepted by a single batch request
+MAX_BATCH_SIZE = 1000
+
 # === UNIFIED VIEW ===
+def run_unified_prediction(user_input):
+    with metrics.stage('features'):
+        model_inputs = compute_feature_sets(user_input)
+
+    with metrics.stage('models'):
+        results, errors = run_models({
+            "Expense_Prediction": (predict_expense_breakdown, model_inputs['expense_prediction']),
+            "Overspending_Alert": (predict_overspending_alert, model_inputs['overspending_alert']),
+            "Anomaly_Detection": (detect_anomaly, model_inputs['anomaly_detection']),
+            "Savings_Target_Result": (predict_savings_efficiency, model_inputs['savings_efficiency']),
+            "Financial_Health_Score": (predict_financial_health_score, model_inputs['financial_health_score']),
+            "Personalized_Recommendations": (generate_spending_recommendation, model_inputs['personalized_spending']),
+        })
+    if errors:
+        results["errors"] = errors
+    return results
+
+
 @swagger_auto_schema(
     method='post',
     operation_summary="Unified AI Predictions (All-in-One)",
-    operation_description="Runs all AI models (expense prediction, anomaly detection, savings efficiency, etc.) and returns a single response.",
+    operation_description=(
+        "Runs all AI models (expense prediction, anomaly detection, savings efficiency, etc.) concurrently "
+        "and returns a single response. A model that fails or times out is returned as null and described "
+        "in `errors`."
+    ),
     tags=["AI-ML Models"],
     request_body=UnifiedFinancialInputSerializer,
     responses={
@@ -35,6 +72,11 @@ logger = logging.getLogger(__name__)
                     "Savings_Target_Result": openapi.Schema(type=openapi.TYPE_BOOLEAN),
                     "Financial_Health_Score": openapi.Schema(type=openapi.TYPE_NUMBER),
                     "Personalized_Recommendations": openapi.Schema(type=openapi.TYPE_OBJECT),
+                    "errors": openapi.Schema(type=openapi.TYPE_OBJECT, description="Per-model failures, if any"),
+                    "Model_Versions": openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description="Active model release and per-model artifact versions",
+                    ),
                 }
             )
         ),
@@ -44,42 +86,191 @@ logger = logging.getLogger(__name__)
 )
 @api_view(['POST'])
 def unified_prediction_view(request):
-    serializer = UnifiedFinancialInputSerializer(data=request.data)
-
-    if serializer.is_valid():
-        user_input = serializer.validated_data
-        model_inputs = compute_feature_sets(user_input)
+    with metrics.RequestTimer('unified') as timer:
+        with timer.stage('validate'):
+            user_input, errors = unified_input.validate(request.data)
+        if errors is not None:
+            return Response(errors, status=400)
 
+        start = time.perf_counter()
         try:
-            results = {
-                "Expense_Prediction": predict_expense_breakdown(model_inputs['expense_prediction']),
-                "Overspending_Alert": predict_overspending_alert(model_inputs['overspending_alert']),
-                "Anomaly_Detection": detect_anomaly(model_inputs['anomaly_detection']),
-                "Savings_Target_Result": predict_savings_efficiency(model_inputs['savings_efficiency']),
-                "Financial_Health_Score": predict_financial_health_score(model_inputs['financial_health_score']),
-                "Personalized_Recommendations": generate_spending_recommendation(model_inputs['personalized_spending']),
-            }
-            return Response(results, status=200)
-
+            with timer.stage('prediction'):
+                results, hit = prediction_cache.get_or_compute(
+                    'unified', user_input, lambda: run_unified_prediction(user_input),
+                    cacheable=lambda result: "errors" not in result,
+                )
+            timer.note('cache', 'hit' if hit else 'miss')
         except Exception as e:
             logger.exception("Unified prediction failed")
             return Response({"error": f"Prediction failed: {str(e)}"}, status=500)
+        with timer.stage('history'):
+            record_prediction('unified', user_input, results, (time.perf_counter() - start) * 1000, user=request.user)
+
+        errors = results.get("errors", {})
+        if errors and len(errors) == len(results) - 1:
+            logger.error("Unified prediction failed: %s", errors)
+            return Response({"error": "Prediction failed", "errors": errors}, status=500)
+        return Response({**results, "Model_Versions": registry.active_versions()}, status=200)
+
+
+# === BATCH VIEW ===
+@swagger_auto_schema(
+    method='post',
+    operation_summary="Batch AI Predictions",
+    operation_description="Runs all AI models over a list of unified inputs, calling each model once for the whole batch.",
+    tags=["AI-ML Models"],
+    request_body=UnifiedFinancialInputSerializer(many=True),
+    responses={
+        200: openapi.Response(description="`results`: combined predictions in input order; `Model_Versions`: active model versions"),
+        400: openapi.Response(description="Validation error"),
+        500: openapi.Response(description="Prediction failure"),
+    }
+)
+@api_view(['POST'])
+def batch_prediction_view(request):
+    if not isinstance(request.data, list) or not request.data:
+        return Response({"error": "Expected a non-empty list of inputs."}, status=400)
+    if len(request.data) > MAX_BATCH_SIZE:
+        return Response({"error": f"At most {MAX_BATCH_SIZE} inputs per batch."}, status=400)
+
+    user_inputs, columns, errors = unified_input.validate_many(request.data)
+    if errors is not None:
+        return Response(errors, status=400)
+
+    start = time.perf_counter()
+    try:
+        results = run_unified_columns(columns)
+    except Exception as e:
+        logger.exception("Batch prediction failed")
+        return Response({"error": f"Prediction failed: {str(e)}"}, status=500)
+
+    # Each row is logged with its share of the batch latency.
+    latency_ms = (time.perf_counter() - start) * 1000 / len(results)
+    for user_input, result in zip(user_inputs, results):
+        record_prediction('batch', user_input, result, latency_ms, user=request.user)
+    return Response({"results": results, "Model_Versions": registry.active_versions()}, status=200)
+
+
+# === WHAT-IF SCENARIOS ===
+@swagger_auto_schema(
+    method='post',
+    operation_summary="What-if Scenario Sweep",
+    operation_description=(
+        "Scores a base input plus every combination of a grid of perturbations in one request, e.g. "
+        "`{\"base\": {...}, \"grid\": {\"Eating_Out\": {\"scale\": [0.9, 0.8, 0.7, 0.6, 0.5]}, "
+        "\"Desired_Savings_Percentage\": {\"values\": [20, 25, 30]}}, \"models\": [\"Financial_Health_Score\", "
+        f"\"Overspending_Alert\"]}}`. Each model is called once for all scenarios (at most {MAX_SCENARIOS})."
+    ),
+    tags=["AI-ML Models"],
+    request_body=ScenarioSweepSerializer,
+    responses={
+        200: openapi.Response(
+            description=(
+                "`baseline`: predictions for the base input; `scenarios`: one entry per grid combination "
+                "(last grid field varying fastest) with the swept `inputs` and the predictions"
+            ),
+        ),
+        400: openapi.Response(description="Validation error"),
+        500: openapi.Response(description="Prediction failure"),
+    }
+)
+@api_view(['POST'])
+def scenario_prediction_view(request):
+    with metrics.RequestTimer('scenarios') as timer:
+        with timer.stage('validate'):
+            serializer = ScenarioSweepSerializer(data=request.data)
+            valid = serializer.is_valid()
+        if not valid:
+            return Response(serializer.errors, status=400)
+
+        data = serializer.validated_data
+        try:
+            results = run_scenarios(data['base'], data['grid'], data.get('models', tuple(BATCH_MODELS)))
+        except Exception as e:
+            logger.exception("Scenario prediction failed")
+            return Response({"error": f"Prediction failed: {str(e)}"}, status=500)
+        timer.note('scenarios', len(results['scenarios']))
+        return Response({**results, "Model_Versions": registry.active_versions()}, status=200)
 
-    return Response(serializer.errors, status=400)
+
+# === ANOMALY SCORES ===
+@swagger_auto_schema(
+    method='post',
+    operation_summary="Anomaly Scores with Personal Baseline",
+    operation_description=(
+        "Scores one unified input, or a list of them in time order, with the Isolation Forest and compares "
+        "each score with the rolling baseline of the user's earlier scores, which it is then added to. "
+        "Scores below 0 are anomalous for the population; `Deviation` is the distance from the user's own "
+        "baseline in standard deviations, reported once the user has enough earlier inputs. Results are "
+        "never cached, as every call moves the baseline."
+    ),
+    tags=["AI-ML Models"],
+    request_body=UnifiedFinancialInputSerializer,
+    responses={
+        200: openapi.Response(
+            description=(
+                "`results`: per input `Anomaly_Score`, `Anomaly_Detection`, `Baseline_Score`, `Baseline_Inputs`, "
+                "`Deviation` and `Unusual_For_User`"
+            ),
+        ),
+        400: openapi.Response(description="Validation error"),
+        500: openapi.Response(description="Prediction failure"),
+    }
+)
+@api_view(['POST'])
+def anomaly_score_view(request):
+    many = isinstance(request.data, list)
+    rows = request.data if many else [request.data]
+    if not rows:
+        return Response({"error": "Expected a non-empty list of inputs."}, status=400)
+    if len(rows) > MAX_BATCH_SIZE:
+        return Response({"error": f"At most {MAX_BATCH_SIZE} inputs per batch."}, status=400)
+
+    with metrics.RequestTimer('anomaly_score') as timer:
+        with timer.stage('validate'):
+            _, columns, errors = unified_input.validate_many(rows)
+        if errors is not None:
+            return Response(errors if many else errors[0], status=400)
+
+        try:
+            with timer.stage('features'):
+                features = compute_feature_batch(columns, keys=('anomaly_detection',))['anomaly_detection']
+            with timer.stage('models'):
+                results = score_anomalies([request.user.pk] * len(rows), features)
+        except Exception as e:
+            logger.exception("Anomaly scoring failed")
+            return Response({"error": f"Prediction failed: {str(e)}"}, status=500)
+        return Response({"results": results, "Model_Versions": registry.active_versions()}, status=200)
 
 
 # === SHARED VIEW HANDLER ===
+def _predict_single(feature_key, predictor_func, user_input):
+    if coalescer.enabled_for(feature_key):
+        with metrics.stage('coalesced'):
+            return coalescer.predict(feature_key, user_input)
+    with metrics.stage('features'):
+        model_input = compute_feature_sets(user_input, keys=(feature_key,))[feature_key]
+    with metrics.stage('models'):
+        return predictor_func(model_input)
+
+
 def process_model_view(request, feature_key, predictor_func, label):
-    serializer = UnifiedFinancialInputSerializer(data=request.data)
-    if serializer.is_valid():
+    with metrics.RequestTimer(feature_key) as timer:
+        with timer.stage('validate'):
+            user_input, errors = unified_input.validate(request.data)
+        if errors is not None:
+            return Response(errors, status=400)
+
         try:
-            features = compute_feature_sets(serializer.validated_data)
-            result = predictor_func(features[feature_key])
-            return Response({label: result})
+            with timer.stage('prediction'):
+                result, hit = prediction_cache.get_or_compute(
+                    feature_key, user_input, lambda: _predict_single(feature_key, predictor_func, user_input),
+                )
+            timer.note('cache', 'hit' if hit else 'miss')
+            return Response({label: result, "Model_Versions": registry.active_versions()})
         except Exception as e:
             logger.exception(f"{label} prediction failed")
             return Response({"error": f"{label} prediction failed: {str(e)}"}, status=500)
-    return Response(serializer.errors, status=400)
 
 
 # === INDIVIDUAL MODEL ENDPOINTS ===
@@ -160,3 +351,42 @@ def financial_score_view(request):
 @api_view(['POST'])
 def personalized_recommendation_view(request):
     return process_model_view(request, 'personalized_spending', generate_spending_recommendation, "Personalized_Recommendations")
+
+
+# === CACHE STATS ===
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Prediction cache hit/miss counters",
+    operation_description="Hit and miss counters of the prediction cache for the worker serving this request.",
+    tags=["AI-ML Models"],
+    responses={200: openapi.Response(description="Hits, misses and hit ratio")}
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def prediction_cache_stats_view(request):
+    return Response(prediction_cache.stats())
+
+
+# === METRICS ===
+class MetricsPermission(BasePermission):
+    """Staff only, unless PREDICTION_METRICS['PUBLIC'] opens the endpoint to scrapers."""
+
+    def has_permission(self, request, view):
+        return metrics.get_config()['PUBLIC'] or bool(request.user and request.user.is_staff)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Prediction latency metrics (Prometheus)",
+    operation_description=(
+        "Per-stage latency histograms of the prediction endpoints and per-model stage histograms "
+        "(feature row, scaler transform, predict), in the Prometheus text format. Counters are kept "
+        "per worker process."
+    ),
+    tags=["AI-ML Models"],
+    responses={200: openapi.Response(description="Prometheus text exposition format")}
+)
+@api_view(['GET'])
+@permission_classes([MetricsPermission])
+def prediction_metrics_view(request):
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
@@ -2,15 +2,20 @@
 # ✅ Imports
 # ──────────────────────────────────────────────────────────────────────────────
 from rest_framework import viewsets, generics, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from django.http import HttpResponse
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from io import BytesIO
 from reportlab.pdfgen import canvas
 import csv
+import json
 import random
 from datetime import date
 
@@ -19,7 +24,7 @@ from datetime import date
 # ──────────────────────────────────────────────────────────────────────────────
 from .models import (
     Budget, Transaction, RecurringTransaction, Notification,
-    OverspendingAlert, AIPrediction, UserInputProfile
+    OverspendingAlert, AIPrediction, UserInputProfile, TRANSACTION_UPSERT_FIELDS
 )
 from .serializers import (
     BudgetSerializer, TransactionSerializer, RecurringTransactionSerializer,
@@ -27,6 +32,11 @@ from .serializers import (
     AIPredictionSerializer, UserInputProfileSerializer
 )
 from .permissions import IsOwnerOrReadOnly, IsAdminOrOwner
+from .parsers import TransactionCSVParser
+from .importers import CountingLines, StatementError, StatementImporter
+from .pagination import (
+    BudgetPagination, NotificationPagination, RecurringTransactionPagination, TransactionPagination
+)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # ✅ 3. Budget Planning
@@ -34,6 +44,7 @@ from .permissions import IsOwnerOrReadOnly, IsAdminOrOwner
 class BudgetViewSet(viewsets.ModelViewSet):
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = BudgetPagination
     http_method_names = ['put', 'post', 'get', 'delete']
 
     @swagger_auto_schema(tags=["4. Budget Planning"])
@@ -51,9 +62,13 @@ class BudgetViewSet(viewsets.ModelViewSet):
 # ──────────────────────────────────────────────────────────────────────────────
 # ✅ 4. Transactions
 # ──────────────────────────────────────────────────────────────────────────────
+# Upper bound on rows accepted by one bulk ingest request
+MAX_BULK_TRANSACTIONS = 5000
+
 class TransactionViewSet(viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionPagination
     http_method_names = ['put', 'post', 'get', 'delete']
 
     @swagger_auto_schema(tags=["5. Transactions"], operation_summary="List all user transactions")
@@ -67,20 +82,124 @@ class TransactionViewSet(viewsets.ModelViewSet):
         return Transaction.objects.none()
     
     def perform_create(self, serializer):
-        user = self.request.user
         data = serializer.validated_data
-        existing = Transaction.objects.filter(
-            user=user,
-            merchant_name=data.get("merchant_name"),
-            transaction_date=data.get("transaction_date")
-        ).first()
-
-        if existing:
-            for attr, value in data.items():
-                setattr(existing, attr, value)
-            existing.save()
-        else:
-            serializer.save(user=user)
+        # A transaction with the merchant and date of an existing one replaces the
+        # fields it gives, in the same statement as the insert (no lookup, no race
+        # between requests); the fields it leaves out are read back for the response.
+        txn = Transaction(user=self.request.user, **data)
+        given = [field for field in TRANSACTION_UPSERT_FIELDS if field in data]
+        Transaction.objects.upsert([txn], update_fields=given)
+        omitted = [field for field in TRANSACTION_UPSERT_FIELDS if field not in data]
+        if omitted:
+            txn.refresh_from_db(fields=omitted)
+        serializer.instance = txn
+
+    def perform_update(self, serializer):
+        # Moving a transaction onto the merchant and date of another one would break
+        # the unique key; unlike a create it has no row to replace, so it is refused.
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({
+                'non_field_errors': ['You already have a transaction with this merchant_name and transaction_date.'],
+            })
+
+    @swagger_auto_schema(
+        tags=["5. Transactions"],
+        operation_summary="Bulk import transactions (JSON or CSV)",
+        operation_description=(
+            "Accepts up to 5000 transactions as a JSON list or as a `text/csv` body whose header row uses the "
+            "transaction field names or the CSV export headers (Date, Time, Amount, Category, Merchant, "
+            "Payment Method, Description). As with single creates, a row with the merchant and date of one of "
+            "your transactions replaces it. Rows are saved together, or not at all when any row is invalid."
+        ),
+        request_body=TransactionSerializer(many=True),
+        responses={
+            201: openapi.Response(
+                description="`created`/`updated` counts and per-row `results` with `row`, `status` and `id`",
+            ),
+            400: openapi.Response(description="Per-row `results` with the `errors` of each invalid row"),
+        },
+    )
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser, TransactionCSVParser])
+    def bulk(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'Expected a non-empty list of transactions.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_BULK_TRANSACTIONS:
+            return Response(
+                {'error': f'At most {MAX_BULK_TRANSACTIONS} transactions per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if not isinstance(errors, list):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+            invalid = sum(1 for row_errors in errors if row_errors)
+            return Response({
+                'error': f'{invalid} of {len(rows)} rows are invalid; nothing was saved.',
+                'results': [
+                    {'row': i, 'status': 'invalid', 'errors': row_errors} if row_errors else {'row': i, 'status': 'valid'}
+                    for i, row_errors in enumerate(errors)
+                ],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        saved = Transaction.objects.upsert_by_merchant_and_date(request.user, serializer.validated_data)
+        created = sum(1 for _, was_created in saved if was_created)
+        return Response({
+            'created': created,
+            'updated': len(saved) - created,
+            'results': [
+                {'row': i, 'status': 'created' if was_created else 'updated', 'id': txn.pk}
+                for i, (txn, was_created) in enumerate(saved)
+            ],
+        }, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        tags=["5. Transactions"],
+        operation_summary="Import a bank statement CSV (streamed)",
+        operation_description=(
+            "Multipart upload of a statement CSV in `file`, of any size. `columns` optionally maps statement "
+            "headers to transaction fields as a JSON object, e.g. `{\"Narration\": \"transaction_description\", "
+            "\"Value Date\": \"transaction_date\"}`; transaction field names and the CSV export headers work "
+            "without it. The file is validated and saved in chunks, each in its own database transaction; "
+            "invalid rows are skipped. The response is newline-delimited JSON: one progress object per chunk "
+            "(`rows`, `created`, `updated`, `invalid`, `percent`), then the final report with `done: true` and "
+            "the `errors` of the first invalid rows."
+        ),
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True),
+            openapi.Parameter('columns', openapi.IN_FORM, type=openapi.TYPE_STRING, description="JSON header mapping"),
+        ],
+        responses={
+            200: openapi.Response(description="application/x-ndjson progress reports, the last with `done: true`"),
+            400: openapi.Response(description="Missing file, bad mapping or unusable header row"),
+        },
+    )
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_statement(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload the statement CSV as `file`.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            columns = json.loads(request.data.get('columns') or '{}')
+            if not isinstance(columns, dict):
+                raise ValueError
+        except ValueError:
+            return Response({'error': '`columns` must be a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = CountingLines(upload, request.encoding or 'utf-8')
+        try:
+            progress = StatementImporter(request.user, columns=columns).run(lines, total_bytes=upload.size)
+        except (StatementError, UnicodeDecodeError) as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        # Header checked: the rows are imported while the response streams.
+        return StreamingHttpResponse(
+            (json.dumps(report) + '\n' for report in progress), content_type='application/x-ndjson',
+        )
 
 # ──────────────────────────────────────────────────────────────────────────────
 # ✅ 5. Recurring Transactions
@@ -88,6 +207,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
 class RecurringTransactionViewSet(viewsets.ModelViewSet):
     serializer_class = RecurringTransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = RecurringTransactionPagination
     http_method_names = ['put', 'post', 'get', 'delete']
 
     @swagger_auto_schema(tags=["6. Recurring Expenses"], operation_summary="List all recurring transactions")
@@ -108,6 +228,7 @@ class RecurringTransactionViewSet(viewsets.ModelViewSet):
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationPagination
 
     @swagger_auto_schema(
         tags=["10. Notifications"],
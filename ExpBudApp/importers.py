@@ -0,0 +1,152 @@
+"""
+Streaming import of bank statement CSVs into Transaction rows.
+
+The file is read line by line through a generator, so only one chunk of
+CHUNK_SIZE rows is held at a time whatever the file size. Each chunk is
+validated row by row with TransactionSerializer and saved with
+Transaction.objects.upsert_by_merchant_and_date (the duplicate semantics of
+single creates) in its own database transaction. Invalid rows are skipped
+and reported with their line numbers; the valid rows around them are saved.
+An error that stops the import part-way (undecodable bytes, a database
+failure) ends the stream with a final report carrying 'error'; the chunks
+saved before it stay saved.
+
+Used by `manage.py import_transactions` and /api/finance/transactions/import/.
+"""
+import codecs
+import csv
+import logging
+from itertools import islice
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from .models import Transaction
+from .parsers import EXPORT_HEADERS, TRANSACTION_FIELDS, map_columns
+from .serializers import TransactionSerializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'CHUNK_SIZE': 2000,   # rows validated and saved per database transaction
+    'MAX_ERRORS': 100,    # invalid rows reported in detail; the rest are only counted
+    'COLUMNS': {},        # statement header -> Transaction field, on top of the export headers
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'TRANSACTION_IMPORT', {})}
+
+
+class StatementError(ValueError):
+    """The file cannot be imported at all: no header row, or no column maps to a field."""
+
+
+class CountingLines:
+    """Text lines of a binary file-like object, counting the bytes read for progress reports."""
+
+    def __init__(self, stream, encoding='utf-8'):
+        self.stream = stream
+        self.encoding = encoding
+        self.bytes_read = 0
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        for line in self.stream:
+            self.bytes_read += len(line)
+            yield decoder.decode(line)
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+class StatementImporter:
+    """
+    Import one user's statement. run() checks the header row, then returns a
+    generator that imports the file as it is iterated: it yields a progress
+    dict after every chunk, and a last one with 'done': True (plus 'error'
+    when the import stopped early).
+    columns: statement header -> Transaction field, for this import only.
+    """
+
+    def __init__(self, user, columns=None, chunk_size=None):
+        config = get_config()
+        self.user = user
+        self.mapping = {**EXPORT_HEADERS, **config['COLUMNS'], **(columns or {})}
+        unknown = sorted(set(self.mapping.values()) - TRANSACTION_FIELDS)
+        if unknown:
+            raise StatementError(f"Not transaction fields: {', '.join(unknown)}.")
+        self.chunk_size = chunk_size or config['CHUNK_SIZE']
+        self.max_errors = config['MAX_ERRORS']
+        self.serializer = TransactionSerializer()
+        self.report = {
+            'done': False, 'rows': 0, 'created': 0, 'updated': 0, 'invalid': 0,
+            'ignored_columns': [], 'errors': [],
+        }
+
+    def run(self, lines, total_bytes=None):
+        """
+        lines: text lines of the CSV; a CountingLines adds 'percent' to the
+        progress reports when total_bytes is given.
+        Raises StatementError before anything is saved when the header is unusable.
+        """
+        reader = csv.reader(lines)
+        header = next(reader, None)
+        if not header:
+            raise StatementError("The file is empty; expected a header row.")
+        columns = map_columns(header, self.mapping)
+        if not any(columns):
+            raise StatementError(f"No column maps to a transaction field: {', '.join(header)}.")
+        self.report['ignored_columns'] = [name for name, column in zip(header, columns) if column is None]
+        return self._import(self._rows(reader, columns), lines, total_bytes)
+
+    def _rows(self, reader, columns):
+        """(line number, row dict or cell-count errors, well formed) per data row."""
+        width = len(columns)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != width:
+                yield reader.line_num, {'non_field_errors': [f"Expected {width} cells, got {len(row)}."]}, False
+                continue
+            # Empty cells are left out so the model defaults apply.
+            yield reader.line_num, {
+                column: value for column, value in zip(columns, row) if column is not None and value != ''
+            }, True
+
+    def _import(self, rows, lines, total_bytes):
+        try:
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                self.save_chunk(chunk)
+                # Error details come with the final report only
+                progress = {key: value for key, value in self.report.items() if key != 'errors'}
+                if total_bytes and isinstance(lines, CountingLines):
+                    progress['percent'] = round(100 * lines.bytes_read / total_bytes, 1)
+                yield progress
+        except Exception as exc:
+            # The response is already streaming, so the failure goes into the last report.
+            logger.exception("Statement import stopped after %d rows", self.report['rows'])
+            self.report['error'] = f"Import stopped after {self.report['rows']} rows: {exc}"
+        self.report['done'] = True
+        yield self.report
+
+    def save_chunk(self, chunk):
+        valid = []
+        for line, row, well_formed in chunk:
+            try:
+                if not well_formed:
+                    raise ValidationError(row)
+                valid.append(self.serializer.run_validation(row))
+            except ValidationError as exc:
+                self.report['invalid'] += 1
+                if len(self.report['errors']) < self.max_errors:
+                    self.report['errors'].append({'line': line, 'errors': exc.detail})
+
+        saved = Transaction.objects.upsert_by_merchant_and_date(self.user, valid)
+        created = sum(1 for _, was_created in saved if was_created)
+        self.report['rows'] += len(chunk)
+        self.report['created'] += created
+        self.report['updated'] += len(saved) - created
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from ExpBudApp.Model_Integration.anomaly_detection import anomaly_scores
+from ExpBudApp.Model_Integration.baselines import ScoreBaselines, get_config
+from ExpBudApp.Model_Integration.registry import registry
+from ExpBudApp.Model_Integration.utils.feature_engineering import compute_feature_batch, to_columns
+
+from .benchmark_predictors import synthetic_inputs
+
+
+class Command(BaseCommand):
+    help = (
+        "Time batch anomaly scoring with per-user baselines against scoring the same inputs one by one. "
+        "Only the in-memory update is timed; stored baselines add three queries per batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help="Inputs to score.")
+        parser.add_argument('--users', type=int, default=5000, help="Distinct users the inputs belong to.")
+        parser.add_argument('--loop-rows', type=int, default=500, help="Inputs scored one by one for comparison.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        inputs = synthetic_inputs(options['rows'], options['seed'])
+        user_ids = rng.integers(1, options['users'] + 1, size=len(inputs))
+        features = compute_feature_batch(to_columns(inputs), keys=('anomaly_detection',))['anomaly_detection']
+        registry.warm_up()
+        alpha = get_config()['ALPHA']
+
+        baselines = ScoreBaselines()
+        start = time.perf_counter()
+        baselines.observe(user_ids, anomaly_scores(features), alpha)
+        batch = time.perf_counter() - start
+
+        loop_rows = min(options['loop_rows'], len(inputs))
+        row_features = {name: values[:loop_rows] for name, values in features.items()}
+        row_baselines = ScoreBaselines()
+        start = time.perf_counter()
+        for i in range(loop_rows):
+            score = anomaly_scores({name: values[i:i + 1] for name, values in row_features.items()})
+            row_baselines.observe(user_ids[i:i + 1], score, alpha)
+        per_row = (time.perf_counter() - start) / loop_rows
+
+        self.stdout.write(
+            f"One pass: {len(inputs)} rows of {len(np.unique(user_ids))} users in {batch * 1e3:.1f}ms "
+            f"({batch / len(inputs) * 1e6:.1f}us/row); row by row: {per_row * 1e6:.1f}us/row "
+            f"({per_row * len(inputs) / batch:.0f}x slower)."
+        )
+        self.stdout.write(
+            f"Baselines of {baselines.stats()['users']} users in {baselines.stats()['bytes'] / 1024:.0f} KiB."
+        )
@@ -0,0 +1,102 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from ExpBudApp.Model_Integration import coalescer
+from ExpBudApp.Model_Integration.registry import registry
+from ExpBudApp.Model_Integration.utils.feature_engineering import compute_feature_sets
+
+from .benchmark_predictors import PREDICTORS, as_python, percentile_ms, synthetic_inputs
+
+
+def int_list(value):
+    return [int(part) for part in value.split(',')]
+
+
+def float_list(value):
+    return [float(part) for part in value.split(',')]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the prediction coalescer: throughput and p50/p99 latency of one model's single-row "
+        "path versus micro-batched calls, for several concurrency levels and batching windows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', default='financial_health_score',
+            help=f"Feature key of the model to call. Choices: {', '.join(key for key, _, _ in PREDICTORS)}",
+        )
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per run.")
+        parser.add_argument(
+            '--concurrency', type=int_list, default=[1, 8, 32],
+            help="Comma-separated numbers of concurrent callers (threads, as in a gthread worker).",
+        )
+        parser.add_argument(
+            '--windows', type=float_list, default=[0.5, 2.0, 5.0],
+            help="Comma-separated WINDOW_MS values to try.",
+        )
+        parser.add_argument('--max-batch', type=int, default=64, help="MAX_BATCH for the coalesced runs.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        predictors = {key: one for key, one, _ in PREDICTORS}
+        key = options['model']
+        if key not in predictors:
+            raise CommandError(f"Unknown model: {key}")
+        predict_one = predictors[key]
+
+        inputs = synthetic_inputs(options['requests'], options['seed'])
+        registry.warm_up()
+
+        def direct(user_input):
+            return predict_one(compute_feature_sets(user_input, keys=(key,))[key])
+
+        def coalesced(user_input):
+            return coalescer.predict(key, user_input)
+
+        expected = [as_python(direct(user_input)) for user_input in inputs[:100]]
+
+        self.stdout.write(
+            f"{key}: {len(inputs)} requests per run\n"
+            f"{'callers':>8}  {'path':<22}{'throughput':>14}{'p50':>10}{'p99':>10}{'mean batch':>12}"
+        )
+        for concurrency in options['concurrency']:
+            self.report(concurrency, 'single-row', *self.run(direct, inputs, concurrency))
+            for window in options['windows']:
+                config = {
+                    'ENABLED': True, 'MODELS': [key], 'WINDOW_MS': window,
+                    'MAX_BATCH': options['max_batch'], 'TIMEOUT': 60,
+                }
+                with override_settings(PREDICTION_COALESCING=config):
+                    batches = coalescer.BATCH_SIZES.labels(key)
+                    before = batches.snapshot()
+                    results, elapsed, latencies = self.run(coalesced, inputs, concurrency)
+                    after = batches.snapshot()
+
+                if [as_python(result) for result in results[:100]] != expected:
+                    raise CommandError(f"Coalesced {key} results differ from the single-row path.")
+                count = sum(after[0]) - sum(before[0])
+                mean_batch = (after[1] - before[1]) / count if count else 0
+                self.report(concurrency, f"coalesced {window:g}ms", results, elapsed, latencies, mean_batch)
+
+    def run(self, call, inputs, concurrency):
+        def timed(user_input):
+            start = time.perf_counter()
+            result = call(user_input)
+            return result, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(timed, inputs))
+        elapsed = time.perf_counter() - start
+        return [result for result, _ in outcomes], elapsed, [latency for _, latency in outcomes]
+
+    def report(self, concurrency, label, results, elapsed, latencies, mean_batch=1.0):
+        self.stdout.write(
+            f"{concurrency:>8}  {label:<22}{len(results) / elapsed:>10,.0f} r/s"
+            f"{percentile_ms(latencies, 50):>8.2f}ms{percentile_ms(latencies, 99):>8.2f}ms{mean_batch:>12.1f}"
+        )
@@ -0,0 +1,222 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ExpBudApp.Model_Integration.clustering import assign_cluster, cluster_matrix, get_assigner
+from ExpBudApp.Model_Integration.executor import build_executor, run_models
+from ExpBudApp.Model_Integration.utils.feature_engineering import (
+    compute_derived_batch, compute_feature_batch, compute_feature_sets, to_columns,
+)
+from ExpBudApp.Model_Integration.expense_prediction import (
+    predict_expense_breakdown, predict_expense_breakdown_batch,
+)
+from ExpBudApp.Model_Integration.overspending_alert import (
+    predict_overspending_alert, predict_overspending_alert_batch,
+)
+from ExpBudApp.Model_Integration.anomaly_detection import detect_anomaly, detect_anomaly_batch
+from ExpBudApp.Model_Integration.savings_efficiency_predictor import (
+    predict_savings_efficiency, predict_savings_efficiency_batch,
+)
+from ExpBudApp.Model_Integration.financial_score_predictor import (
+    predict_financial_health_score, predict_financial_health_score_batch,
+)
+from ExpBudApp.Model_Integration.personalized_recommender import (
+    generate_spending_recommendation, generate_spending_recommendation_batch,
+)
+
+EXPENSE_FIELDS = [
+    'Rent', 'Loan_Repayment', 'Insurance', 'Groceries', 'Transport', 'Eating_Out',
+    'Entertainment', 'Utilities', 'Healthcare', 'Education', 'Miscellaneous',
+]
+
+# (feature key, per-row predictor, batch predictor)
+PREDICTORS = [
+    ('expense_prediction', predict_expense_breakdown, predict_expense_breakdown_batch),
+    ('overspending_alert', predict_overspending_alert, predict_overspending_alert_batch),
+    ('anomaly_detection', detect_anomaly, detect_anomaly_batch),
+    ('savings_efficiency', predict_savings_efficiency, predict_savings_efficiency_batch),
+    ('financial_health_score', predict_financial_health_score, predict_financial_health_score_batch),
+    ('personalized_spending', generate_spending_recommendation, generate_spending_recommendation_batch),
+]
+
+
+def synthetic_columns(n, seed=0):
+    """Random numeric inputs as a column-oriented batch (see feature_engineering.to_columns)."""
+    rng = np.random.default_rng(seed)
+    income = rng.uniform(10000, 200000, n)
+    expenses = rng.uniform(0, 0.08, (n, len(EXPENSE_FIELDS))) * income[:, None]
+    columns = {'Income': income, 'Desired_Savings_Percentage': rng.uniform(5, 40, n)}
+    columns.update((field, expenses[:, j]) for j, field in enumerate(EXPENSE_FIELDS))
+    return columns
+
+
+def synthetic_inputs(n, seed=0):
+    """Random payloads shaped like UnifiedFinancialInputSerializer.validated_data."""
+    columns = synthetic_columns(n, seed)
+    values = {field: column.tolist() for field, column in columns.items()}
+    inputs = []
+    for i in range(n):
+        user_input = {
+            'Income': values['Income'][i],
+            'Age': 30,
+            'Dependents': 1,
+            'Occupation': 'Professional',
+            'City_Tier': 1,
+            'Desired_Savings_Percentage': values['Desired_Savings_Percentage'][i],
+        }
+        user_input.update((field, values[field][i]) for field in EXPENSE_FIELDS)
+        inputs.append(user_input)
+    return inputs
+
+
+def as_python(value):
+    """Normalise NumPy scalars/arrays inside a result so outputs compare by value."""
+    if isinstance(value, dict):
+        return {k: as_python(v) for k, v in value.items()}
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+def percentile_ms(samples, q):
+    return np.percentile(samples, q) * 1000
+
+
+def rate(n, seconds):
+    return f"{n / seconds:,.0f} rows/s" if seconds else "n/a"
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-row versus batched throughput of the Model_Integration predictors."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Number of synthetic users to score.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--check-parity', action='store_true',
+            help="Fail unless the single-row and batch paths (features and predictions) match exactly.",
+        )
+        parser.add_argument(
+            '--fanout', type=int, default=0, metavar='N',
+            help="Also time N unified requests with the six models run serially, on threads and on processes.",
+        )
+        parser.add_argument(
+            '--clusters', type=int, default=0, metavar='N',
+            help="Also time spending-cluster assignment for N users (e.g. 1000000).",
+        )
+
+    def handle(self, *args, **options):
+        n = options['rows']
+        inputs = synthetic_inputs(n, options['seed'])
+
+        start = time.perf_counter()
+        feature_sets = [compute_feature_sets(user_input) for user_input in inputs]
+        per_row = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compute_feature_batch(to_columns(inputs))
+        batched = time.perf_counter() - start
+
+        if options['check_parity']:
+            self.check_parity(inputs, feature_sets)
+
+        self.stdout.write(f"{'model':<24}{'per-row':>18}{'batched':>18}{'speedup':>10}")
+        self.stdout.write(
+            f"{'(feature engineering)':<24}{rate(n, per_row):>18}{rate(n, batched):>18}{per_row / batched:>9.1f}x"
+        )
+        for key, predict_one, predict_batch in PREDICTORS:
+            rows = [features[key] for features in feature_sets]
+
+            start = time.perf_counter()
+            for row in rows:
+                predict_one(row)
+            per_row = time.perf_counter() - start
+
+            start = time.perf_counter()
+            predict_batch(rows)
+            batched = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{key:<24}{rate(n, per_row):>18}{rate(n, batched):>18}{per_row / batched:>9.1f}x"
+            )
+
+        if options['fanout']:
+            self.benchmark_fanout(feature_sets[:options['fanout']])
+
+        if options['clusters']:
+            self.benchmark_clusters(options['clusters'], options['seed'])
+
+    def check_parity(self, inputs, feature_sets):
+        vectorized = compute_feature_batch(to_columns(inputs))
+        for key, columns in vectorized.items():
+            for column, values in columns.items():
+                expected = [features[key][column] for features in feature_sets]
+                if values.tolist() != expected:
+                    raise CommandError(f"{key}.{column}: vectorized features differ from compute_feature_sets")
+
+        for key, predict_one, predict_batch in PREDICTORS:
+            rows = [features[key] for features in feature_sets]
+            expected = as_python(predict_batch(rows))
+            for i, row in enumerate(rows):
+                actual = as_python(predict_one(row))
+                if actual != expected[i]:
+                    raise CommandError(f"{key}: row {i} differs: {actual!r} != {expected[i]!r}")
+        self.stdout.write(self.style.SUCCESS(f"Parity OK for {len(feature_sets)} rows across {len(PREDICTORS)} models."))
+
+    def benchmark_fanout(self, feature_sets):
+        self.stdout.write(f"\n{'fan-out':<24}{'mean':>10}{'p50':>10}{'p95':>10}")
+        for mode in ('serial', 'thread', 'process'):
+            executor = build_executor(mode, len(PREDICTORS))
+            try:
+                # Warm up: loads models in this process or in every pool worker.
+                for features in feature_sets[:len(PREDICTORS)]:
+                    run_models({key: (one, features[key]) for key, one, _ in PREDICTORS}, executor, timeout=60)
+
+                samples = []
+                for features in feature_sets:
+                    start = time.perf_counter()
+                    run_models({key: (one, features[key]) for key, one, _ in PREDICTORS}, executor, timeout=60)
+                    samples.append(time.perf_counter() - start)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+            self.stdout.write(
+                f"{mode:<24}{np.mean(samples) * 1000:>8.2f}ms"
+                f"{percentile_ms(samples, 50):>8.2f}ms{percentile_ms(samples, 95):>8.2f}ms"
+            )
+
+    def benchmark_clusters(self, n, seed):
+        assigner = get_assigner()
+        if assigner is None:
+            raise CommandError("No spending_clusters artifact for the active recommender; run train_spending_clusters first.")
+        k, d = assigner.centroids_t.shape[1], assigner.centroids_t.shape[0]
+
+        derived = compute_derived_batch(synthetic_columns(n, seed))
+        X = cluster_matrix(derived)
+
+        start = time.perf_counter()
+        labels = assigner.assign(X)
+        elapsed = time.perf_counter() - start
+
+        # Exact squared distances on a sample, to confirm the expanded form picks the same centroid.
+        sample = X[:100000]
+        centroids = assigner.centroids_t.T
+        Z = (sample - assigner.mean) * assigner.inv_scale
+        exact = assigner.labels[np.argmin(((Z[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2), axis=1)]
+        mismatches = int(np.count_nonzero(exact != labels[:len(sample)]))
+
+        single = [{name: derived[name][i] for name in derived} for i in range(1000)]
+        start = time.perf_counter()
+        for row in single:
+            assign_cluster(row)
+        per_row_us = (time.perf_counter() - start) / len(single) * 1e6
+
+        self.stdout.write(f"\nNearest-centroid assignment, k={k}, d={d}")
+        self.stdout.write(f"{'batch':<24}{n:>12,} users in {elapsed * 1000:,.1f} ms ({rate(n, elapsed)})")
+        self.stdout.write(f"{'single request':<24}{per_row_us:>12.1f} us per user")
+        self.stdout.write(f"{'cluster sizes':<24}{[int(np.count_nonzero(labels == label)) for label in assigner.labels]}")
+        if mismatches:
+            raise CommandError(f"{mismatches} of {len(sample)} sampled users differ from exact nearest-centroid")
+        self.stdout.write(self.style.SUCCESS(f"Matches exact nearest-centroid on {len(sample):,} sampled users."))
@@ -0,0 +1,222 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.constants import OnConflict
+
+from ExpBudApp.models import Budget, Transaction, User
+
+# Seeded users are recognised by this e-mail domain, so reruns reuse them and --cleanup removes them.
+BENCHMARK_DOMAIN = 'benchmark.invalid'
+
+CATEGORIES = [
+    'Groceries', 'Rent', 'Transport', 'Eating Out', 'Entertainment', 'Utilities',
+    'Healthcare', 'Education', 'Shopping', 'Travel', 'Insurance', 'General',
+]
+MERCHANTS = [f'Merchant {i:03d}' for i in range(300)]
+PAYMENT_METHODS = [choice for choice, _ in Transaction.PAYMENT_METHOD_CHOICES]
+FIRST_DAY = np.datetime64('2022-01-01')
+DAYS = 3 * 365
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed benchmark users with millions of transactions, then show the query plans and latencies of "
+        "the per-user transaction and budget queries without and with the composite indexes. It drops and "
+        "rebuilds those indexes, so run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000, help="Transactions to seed in total.")
+        parser.add_argument('--users', type=int, default=10_000, help="Benchmark users to spread them over.")
+        parser.add_argument(
+            '--heavy-share', type=float, default=0.01,
+            help="Share of the rows given to the first user, whose queries are measured.",
+        )
+        parser.add_argument('--chunk-size', type=int, default=20000, help="Rows per INSERT batch.")
+        parser.add_argument('--repeat', type=int, default=20, help="Runs per query; the median is reported.")
+        parser.add_argument('--cleanup', action='store_true', help="Delete the benchmark users and their rows.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--database', required=True,
+            help="Alias in DATABASES of the (migrated) scratch database to seed and re-index.",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help=f"Allow --database {DEFAULT_DB_ALIAS}, the database the site itself uses.",
+        )
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['users'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--rows, --users and --chunk-size must be positive.")
+        self.db = options['database']
+        if self.db not in connections:
+            raise CommandError(f"No database {self.db!r} in DATABASES.")
+        if self.db == DEFAULT_DB_ALIAS and not options['force']:
+            raise CommandError(
+                f"Refusing to seed millions of rows into and drop indexes on the {DEFAULT_DB_ALIAS} database. "
+                "Add a scratch database to DATABASES and pass its alias, or pass --force."
+            )
+        self.connection = connections[self.db]
+        if Transaction._meta.db_table not in self.connection.introspection.table_names():
+            raise CommandError(f"Database {self.db!r} has no tables yet; run `manage.py migrate --database {self.db}`.")
+        rng = np.random.default_rng(options['seed'])
+
+        user_ids = self.seed_users(options['users'])
+        self.seed_transactions(user_ids, options['rows'], options['heavy_share'], options['chunk_size'], rng)
+        self.seed_budgets(user_ids)
+
+        queries = self.queries(user_ids[0])
+        indexes = Transaction._meta.indexes + Budget._meta.indexes
+        present = self.existing_indexes()
+        try:
+            with self.connection.schema_editor() as editor:
+                for model, index in self.model_indexes():
+                    if index.name in present:
+                        editor.remove_index(model, index)
+            before = self.measure("Without composite indexes", queries, options['repeat'])
+
+            started = time.perf_counter()
+            with self.connection.schema_editor() as editor:
+                for model, index in self.model_indexes():
+                    editor.add_index(model, index)
+            self.stdout.write(f"Built {len(indexes)} indexes in {time.perf_counter() - started:.1f}s.")
+            after = self.measure("With composite indexes", queries, options['repeat'])
+        finally:
+            # Leave the schema as it was found, so migrations still apply cleanly.
+            now = self.existing_indexes()
+            with self.connection.schema_editor() as editor:
+                for model, index in self.model_indexes():
+                    if index.name in present and index.name not in now:
+                        editor.add_index(model, index)
+                    elif index.name not in present and index.name in now:
+                        editor.remove_index(model, index)
+
+        self.stdout.write(f"\n{'query':<40}{'before':>12}{'after':>12}{'speedup':>10}")
+        for label in queries:
+            self.stdout.write(
+                f"{label:<40}{before[label]:>10.2f}ms{after[label]:>10.2f}ms{before[label] / after[label]:>9.1f}x"
+            )
+
+        if options['cleanup']:
+            deleted, _ = User.objects.using(self.db).filter(email__endswith=f'@{BENCHMARK_DOMAIN}').delete()
+            self.stdout.write(f"Deleted {deleted} benchmark rows.")
+
+    def model_indexes(self):
+        return [(Transaction, index) for index in Transaction._meta.indexes] + [
+            (Budget, index) for index in Budget._meta.indexes
+        ]
+
+    def existing_indexes(self):
+        with self.connection.cursor() as cursor:
+            return {
+                name
+                for model in (Transaction, Budget)
+                for name in self.connection.introspection.get_constraints(cursor, model._meta.db_table)
+            }
+
+    def seed_users(self, count):
+        existing = User.objects.using(self.db).filter(email__endswith=f'@{BENCHMARK_DOMAIN}').count()
+        User.objects.using(self.db).bulk_create(
+            [
+                User(email=f'user{i}@{BENCHMARK_DOMAIN}', username=f'benchmark-{i}', password='!')
+                for i in range(existing, count)
+            ],
+            batch_size=5000,
+        )
+        return list(
+            User.objects.using(self.db).filter(email__endswith=f'@{BENCHMARK_DOMAIN}').order_by('pk').values_list('pk', flat=True)[:count]
+        )
+
+    def seed_transactions(self, user_ids, rows, heavy_share, chunk_size, rng):
+        missing = rows - Transaction.objects.using(self.db).filter(user__email__endswith=f'@{BENCHMARK_DOMAIN}').count()
+        if missing <= 0:
+            self.stdout.write(f"Reusing {rows} seeded transactions.")
+            return
+
+        meta = Transaction._meta
+        connection = self.connection
+        fields = ['user', 'amount', 'category', 'transaction_date', 'transaction_time', 'merchant_name', 'payment_method']
+        columns = ', '.join(connection.ops.quote_name(meta.get_field(name).column) for name in fields)
+        # Random rows that repeat a (user, merchant, date) key are skipped, as the unique constraint requires.
+        suffix = connection.ops.on_conflict_suffix_sql([meta.get_field(name) for name in fields], OnConflict.IGNORE, None, None)
+        sql = (
+            f"{connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)} {connection.ops.quote_name(meta.db_table)} "
+            f"({columns}) VALUES ({', '.join(['%s'] * len(fields))}) {suffix}"
+        )
+        users = np.asarray(user_ids)
+        heavy = rng.random(missing) < heavy_share
+
+        started = time.perf_counter()
+        for start in range(0, missing, chunk_size):
+            n = min(chunk_size, missing - start)
+            batch = list(zip(
+                np.where(heavy[start:start + n], users[0], rng.choice(users, n)).tolist(),
+                np.round(rng.gamma(2.0, 600.0, n), 2).tolist(),
+                rng.choice(CATEGORIES, n).tolist(),
+                np.datetime_as_string(FIRST_DAY + rng.integers(0, DAYS, n)).tolist(),
+                [f'{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}' for s in rng.integers(0, 86400, n).tolist()],
+                rng.choice(MERCHANTS, n).tolist(),
+                rng.choice(PAYMENT_METHODS, n).tolist(),
+            ))
+            with transaction.atomic(using=self.db), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            done = start + n
+            if done % (chunk_size * 50) < chunk_size or done == missing:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"  seeded {done:,}/{missing:,} transactions, {done / elapsed:,.0f} rows/s")
+
+    def seed_budgets(self, user_ids):
+        if Budget.objects.using(self.db).filter(user_id=user_ids[0]).exists():
+            return
+        months = [date(2024, month, 1) for month in range(1, 13)]
+        budgets = (
+            Budget(user_id=user_id, month=month, category=category, budget_limit=500)
+            for user_id in user_ids for month in months for category in CATEGORIES[:4]
+        )
+        batch = []
+        for budget in budgets:
+            batch.append(budget)
+            if len(batch) == 10000:
+                Budget.objects.using(self.db).bulk_create(batch)
+                batch = []
+        Budget.objects.using(self.db).bulk_create(batch)
+
+    def queries(self, user_id):
+        transactions = Transaction.objects.using(self.db).filter(user_id=user_id)
+        sample = transactions.values('merchant_name', 'transaction_date', 'category')[0]
+        month = sample['transaction_date'].replace(day=1)
+        next_month = (month + timedelta(days=31)).replace(day=1)
+        return {
+            # Upsert key lookup; served by the unique constraint in both runs
+            "duplicate lookup": transactions.filter(
+                merchant_name=sample['merchant_name'], transaction_date=sample['transaction_date'],
+            ).order_by('pk')[:1],
+            # Export views, first page
+            "newest 100 (exports)": transactions.order_by('-transaction_date')[:100],
+            "one month, by date": transactions.filter(
+                transaction_date__gte=month, transaction_date__lt=next_month,
+            ).order_by('-transaction_date')[:500],
+            "one category, newest 50": transactions.filter(category=sample['category']).order_by('-transaction_date')[:50],
+            "budget for month and category": Budget.objects.using(self.db).filter(
+                user_id=user_id, month=date(2024, 6, 1), category=CATEGORIES[0],
+            ),
+        }
+
+    def measure(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{title}"))
+        medians = {}
+        for label, queryset in queries.items():
+            self.stdout.write(f"{label}:")
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            medians[label] = statistics.median(timings)
+        return medians
@@ -0,0 +1,58 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from ExpBudApp.Model_Integration.serializers import UnifiedFinancialInputSerializer
+from ExpBudApp.Model_Integration.utils.feature_engineering import to_columns
+from ExpBudApp.Model_Integration.validation import unified_input
+
+from .benchmark_predictors import synthetic_inputs
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the compiled prediction payload validator against UnifiedFinancialInputSerializer "
+        "(PayloadValidationTests checks that both give the same validated data and errors)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help="Single payloads to validate.")
+        parser.add_argument('--batch', type=int, default=1000, help="Payloads per many=True batch.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Round-trip through JSON so the values have the types the JSON parser hands to the views.
+        payloads = json.loads(json.dumps(synthetic_inputs(options['requests'], options['seed'])))
+
+        start = time.perf_counter()
+        for payload in payloads:
+            serializer = UnifiedFinancialInputSerializer(data=payload)
+            serializer.is_valid()
+        drf = (time.perf_counter() - start) / len(payloads)
+
+        start = time.perf_counter()
+        for payload in payloads:
+            unified_input.validate(payload)
+        compiled = (time.perf_counter() - start) / len(payloads)
+
+        batch = payloads[:options['batch']]
+        start = time.perf_counter()
+        serializer = UnifiedFinancialInputSerializer(data=batch, many=True)
+        serializer.is_valid()
+        to_columns(serializer.validated_data)
+        drf_batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        unified_input.validate_many(batch)
+        compiled_batch = time.perf_counter() - start
+
+        self.stdout.write(f"{'':<36}{'DRF':>12}{'compiled':>12}{'speedup':>10}")
+        self.stdout.write(
+            f"{'single payload':<36}{drf * 1e6:>10.1f}us{compiled * 1e6:>10.1f}us{drf / compiled:>9.1f}x"
+        )
+        self.stdout.write(
+            f"{f'batch of {len(batch)} + feature columns':<36}{drf_batch * 1e3:>10.1f}ms"
+            f"{compiled_batch * 1e3:>10.1f}ms{drf_batch / compiled_batch:>9.1f}x"
+        )
+        self.stdout.write(f"Saved per prediction request: {(drf - compiled) * 1e6:.1f}us")
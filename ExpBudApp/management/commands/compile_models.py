@@ -0,0 +1,123 @@
+import time
+
+import joblib
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ExpBudApp.Model_Integration import (
+    anomaly_detection, expense_prediction, financial_score_predictor,
+    overspending_alert, personalized_recommender, savings_efficiency_predictor,
+)
+from ExpBudApp.Model_Integration.compiled import compile_estimator, load_compiled
+from ExpBudApp.Model_Integration.registry import registry
+from ExpBudApp.Model_Integration.utils.feature_engineering import compute_feature_batch, to_columns
+from ExpBudApp.Model_Integration.utils.feature_matrix import as_feature_matrix, unnamed_features
+
+from .benchmark_predictors import synthetic_inputs
+
+# Tree models -> the feature columns their estimator is called with
+FEATURE_COLUMNS = {
+    'expense_prediction': expense_prediction.selected_features,
+    'overspending_alert': overspending_alert.alert_features,
+    'anomaly_detection': anomaly_detection.anomaly_features,
+    'savings_efficiency': savings_efficiency_predictor.FEATURE_COLUMNS,
+    'financial_health_score': financial_score_predictor.features,
+    'personalized_spending': personalized_recommender.FEATURE_COLUMNS,
+}
+
+COMPILABLE = list(FEATURE_COLUMNS) + ['feature_scaler']
+
+PER_ROW_SAMPLES = 200
+
+
+def per_row_us(predict, X):
+    rows = X[:PER_ROW_SAMPLES]
+    start = time.perf_counter()
+    for i in range(len(rows)):
+        predict(rows[i:i + 1])
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def batch_rate(predict, X):
+    start = time.perf_counter()
+    predict(X)
+    return len(X) / (time.perf_counter() - start)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile the tree-ensemble models into flattened NumPy artifacts under models/compiled/ "
+        "(served when PREDICTION_MODEL_FORMAT = 'compiled')."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help=f"Models to compile (default: all). Choices: {', '.join(COMPILABLE)}",
+        )
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Check compiled output against the original estimator and compare latency/throughput.",
+        )
+        parser.add_argument('--rows', type=int, default=5000, help="Synthetic rows used by --verify.")
+
+    def handle(self, *args, **options):
+        names = options['models'] or COMPILABLE
+        unknown = [name for name in names if name not in COMPILABLE]
+        if unknown:
+            raise CommandError(f"Cannot compile: {', '.join(unknown)}")
+
+        for name in names:
+            estimator = joblib.load(registry.path(name))
+            compiled = compile_estimator(estimator)
+            compiled.save(registry.compiled_path(name))
+            if compiled.kind == 'standard_scaler':
+                self.stdout.write(f"{name}: {compiled.meta['source']} -> {compiled.kind}")
+            else:
+                self.stdout.write(
+                    f"{name}: {compiled.meta['source']} -> {compiled.kind}, "
+                    f"{compiled.n_trees} trees, depth {compiled.max_depth}"
+                )
+
+        if options['verify']:
+            self.verify(names, options['rows'])
+
+    def verify(self, names, n_rows):
+        features = compute_feature_batch(to_columns(synthetic_inputs(n_rows)))
+        failed = []
+
+        self.stdout.write(
+            f"\n{'model':<24}{'mismatch':>10}{'max |diff|':>12}"
+            f"{'row us (orig/comp)':>22}{'rows/s (orig/comp)':>26}"
+        )
+        # The originals are fed arrays in their fitted column order
+        with unnamed_features():
+            for name in names:
+                # The scaler is fed the expense features; the expense model their scaled form.
+                key = 'expense_prediction' if name == 'feature_scaler' else name
+                X = as_feature_matrix(features[key], FEATURE_COLUMNS[key])
+                if name == 'expense_prediction':
+                    X = joblib.load(registry.path('feature_scaler')).transform(X)
+
+                original = joblib.load(registry.path(name))
+                compiled = load_compiled(registry.compiled_path(name))
+
+                method = 'transform' if compiled.kind == 'standard_scaler' else 'predict'
+                original_fn, compiled_fn = getattr(original, method), getattr(compiled, method)
+                expected, actual = original_fn(X), compiled_fn(X)
+                if compiled.kind == 'isolation_forest':
+                    expected, actual = original.score_samples(X), compiled.score_samples(X)
+                diff = np.abs(np.asarray(expected, dtype=np.float64) - np.asarray(actual, dtype=np.float64))
+                mismatches = int(np.count_nonzero(diff > 1e-6))
+                if mismatches:
+                    failed.append(name)
+
+                self.stdout.write(
+                    f"{name:<24}{mismatches:>10}{diff.max():>12.2e}"
+                    f"{per_row_us(original_fn, X):>12.0f} /{per_row_us(compiled_fn, X):>7.0f}"
+                    f"{batch_rate(original_fn, X):>14,.0f} /{batch_rate(compiled_fn, X):>10,.0f}"
+                )
+
+        if failed:
+            raise CommandError(f"Compiled output differs from the original for: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("Compiled models match the original estimators."))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min
+
+from ExpBudApp.models import TRANSACTION_KEY, Transaction
+
+# Primary keys per DELETE statement
+DELETE_BATCH = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Keep one transaction per user, merchant and date (the one with the lowest id) and delete the others, "
+        "storing a missing merchant as ''. Run it before the migration that adds txn_user_merchant_date_uniq, "
+        "which fails while duplicates exist."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Count the duplicates and roll back instead of deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # NULL and '' are the same key once the constraint exists
+            missing = Transaction.objects.filter(merchant_name__isnull=True).update(merchant_name='')
+
+            keep = {
+                (row['user'], row['merchant_name'], row['transaction_date']): row['keep']
+                for row in Transaction.objects.values(*TRANSACTION_KEY)
+                .annotate(keep=Min('pk'), rows=Count('pk')).filter(rows__gt=1).order_by()
+            }
+            duplicates = [
+                pk for pk, user_id, merchant, day in Transaction.objects.filter(
+                    user_id__in={user_id for user_id, _, _ in keep},
+                ).values_list('pk', 'user_id', 'merchant_name', 'transaction_date').iterator()
+                if keep.get((user_id, merchant, day), pk) != pk
+            ]
+            for start in range(0, len(duplicates), DELETE_BATCH):
+                Transaction.objects.filter(pk__in=duplicates[start:start + DELETE_BATCH]).delete()
+
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(duplicates)} duplicate transactions of {len(keep)} merchants and dates; "
+            f"{missing} transactions without a merchant {'would be' if options['dry_run'] else 'were'} stored as ''."
+        ))
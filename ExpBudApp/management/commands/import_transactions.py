@@ -0,0 +1,68 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ExpBudApp.importers import CountingLines, StatementError, StatementImporter
+from ExpBudApp.models import User
+
+
+def column_mapping(value):
+    header, sep, field = value.partition('=')
+    if not sep:
+        raise ValueError(value)
+    return header.strip(), field.strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a bank statement CSV into a user's transactions, streaming the file in fixed-size chunks. "
+        "Rows matching a transaction on merchant and date update it, as with single creates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row.")
+        parser.add_argument('--user', required=True, help="E-mail of the user the transactions belong to.")
+        parser.add_argument(
+            '--map', type=column_mapping, action='append', default=[], metavar='HEADER=FIELD',
+            help="Map a statement column to a Transaction field, e.g. --map 'Narration=transaction_description'. "
+                 "Repeatable; adds to TRANSACTION_IMPORT['COLUMNS'].",
+        )
+        parser.add_argument('--chunk-size', type=int, help="Rows per database transaction.")
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with e-mail {options['user']}.")
+        if options['chunk_size'] is not None and options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        importer = StatementImporter(user, columns=dict(options['map']), chunk_size=options['chunk_size'])
+        started = time.perf_counter()
+        with open(options['path'], 'rb') as f:
+            lines = CountingLines(f, options['encoding'])
+            try:
+                progress = importer.run(lines, total_bytes=os.fstat(f.fileno()).st_size)
+                for report in progress:
+                    if not report['done']:
+                        self.stdout.write(
+                            f"  {report['percent']:5.1f}%  {report['rows']:,} rows: {report['created']:,} created, "
+                            f"{report['updated']:,} updated, {report['invalid']:,} invalid"
+                        )
+            except (StatementError, UnicodeDecodeError) as exc:
+                raise CommandError(str(exc))
+
+        if report['ignored_columns']:
+            self.stdout.write(f"Ignored columns: {', '.join(report['ignored_columns'])}")
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"Line {error['line']}: {json.dumps(error['errors'])}"))
+        if 'error' in report:
+            raise CommandError(report['error'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['rows']:,} rows in {elapsed:.1f}s ({report['rows'] / elapsed if elapsed else 0:,.0f} rows/s): "
+            f"{report['created']:,} created, {report['updated']:,} updated, {report['invalid']:,} invalid."
+        ))
@@ -0,0 +1,137 @@
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .benchmark_predictors import percentile_ms, synthetic_inputs
+
+REQUEST_TIMEOUT = 30  # seconds before a request counts as failed
+
+# label -> (gunicorn application, extra gunicorn args, prediction path)
+DEPLOYMENTS = {
+    'wsgi': ('Project.wsgi:application', [], '/api/predict/'),
+    'asgi': ('Project.asgi:application', ['-k', 'uvicorn.workers.UvicornWorker'], '/api/async/predict/'),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=5)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise CommandError(f"Server at {url} did not start within {timeout}s")
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent load test of /api/predict/ (sync DRF under WSGI) against /api/async/predict/ "
+        "(async views under ASGI). Starts both with gunicorn at the same --workers count, or targets "
+        "running deployments given by --wsgi-url/--asgi-url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help="User to mint an access token for (default: first active user).")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per deployment.")
+        parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once.")
+        parser.add_argument('--workers', type=int, default=2, help="Server workers for each deployment.")
+        parser.add_argument('--wsgi-url', help="Full prediction URL of a running WSGI deployment.")
+        parser.add_argument('--asgi-url', help="Full prediction URL of a running ASGI deployment.")
+
+    def handle(self, *args, **options):
+        token = self.access_token(options['email'])
+        seed = int(time.time())
+
+        self.stdout.write(
+            f"{options['requests']} requests, concurrency {options['concurrency']}, "
+            f"{options['workers']} workers per deployment\n"
+        )
+        self.stdout.write(f"{'deployment':<12}{'ok':>6}{'failed':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+        for i, label in enumerate(DEPLOYMENTS):
+            # Fresh payloads per deployment (plus a warm-up set), so the
+            # prediction cache never answers for the models.
+            payloads = synthetic_inputs(options['requests'] + options['concurrency'], seed=seed + i)
+            url = options[f'{label}_url']
+            server = None
+            if url is None:
+                server, url = self.start_server(label, options['workers'])
+            try:
+                self.report(label, *self.run(url, token, payloads, options['concurrency']))
+            finally:
+                if server is not None:
+                    server.terminate()
+                    server.wait()
+
+    def access_token(self, email):
+        users = get_user_model().objects.filter(is_active=True)
+        user = users.filter(email=email).first() if email else users.order_by('pk').first()
+        if user is None:
+            raise CommandError("No active user to authenticate as; create one or pass --email.")
+        return str(AccessToken.for_user(user))
+
+    def start_server(self, label, workers):
+        application, extra_args, path = DEPLOYMENTS[label]
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', application, '-w', str(workers),
+             '-b', f'127.0.0.1:{port}', '--log-level', 'warning', *extra_args],
+            cwd=settings.BASE_DIR,
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            wait_until_up(base_url + '/')
+        except CommandError:
+            server.terminate()
+            raise
+        return server, base_url + path
+
+    def run(self, url, token, payloads, concurrency):
+        headers = {'Authorization': f'Bearer {token}'}
+        session = requests.Session()
+        session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+        def call(payload):
+            start = time.perf_counter()
+            try:
+                status = session.post(url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT).status_code
+            except requests.RequestException:
+                status = None
+            return status, time.perf_counter() - start
+
+        warm_up, payloads = payloads[:concurrency], payloads[concurrency:]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            # Concurrent, so every worker loads its models before timing starts.
+            list(pool.map(call, warm_up))
+
+            start = time.perf_counter()
+            outcomes = list(pool.map(call, payloads))
+            elapsed = time.perf_counter() - start
+
+        latencies = [seconds for status, seconds in outcomes if status == 200]
+        return len(latencies), len(outcomes) - len(latencies), elapsed, latencies
+
+    def report(self, label, ok, failed, elapsed, latencies):
+        if not latencies:
+            self.stdout.write(self.style.ERROR(f"{label:<12}{ok:>6}{failed:>8}  every request failed"))
+            return
+        self.stdout.write(
+            f"{label:<12}{ok:>6}{failed:>8}{ok / elapsed:>10.1f}"
+            f"{percentile_ms(latencies, 50):>10.1f}{percentile_ms(latencies, 95):>10.1f}"
+            f"{percentile_ms(latencies, 99):>10.1f}"
+        )
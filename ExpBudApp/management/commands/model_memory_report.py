@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ExpBudApp.Model_Integration.registry import registry
+
+from .compile_models import COMPILABLE
+
+MEMORY_FIELDS = {'Rss': 'rss', 'Pss': 'pss', 'Shared_Clean': 'shared'}
+
+
+def process_memory(pid='self'):
+    """RSS, PSS and shared-clean bytes of a process, from /proc/<pid>/smaps_rollup (Linux)."""
+    memory = {'rss': None, 'pss': None, 'shared': None}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in MEMORY_FIELDS:
+                    memory[MEMORY_FIELDS[key]] = int(rest.split()[0]) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+def megabytes(num_bytes):
+    return f"{num_bytes / (1024 * 1024):.1f} MB" if num_bytes is not None else "n/a"
+
+
+def _worker(model_format, mmap, barrier, results):
+    settings.PREDICTION_MODEL_FORMAT = model_format
+    settings.PREDICTION_MODEL_MMAP = mmap
+
+    before = process_memory()
+    registry.warm_up()
+    # Measure once every worker has loaded, so PSS reflects the pages they share.
+    barrier.wait()
+    results.put((os.getpid(), before, process_memory()))
+    barrier.wait()
+
+
+class Command(BaseCommand):
+    help = (
+        "Report per-worker memory of the loaded models: N simulated workers loading pickles "
+        "(before) and memory-mapped compiled artifacts (after), or live processes given by --pids."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Simulated worker processes per scenario.")
+        parser.add_argument('--pids', type=int, nargs='+', help="Report live processes (e.g. Gunicorn workers) instead.")
+
+    def handle(self, *args, **options):
+        if options['pids']:
+            self.report([(pid, None, process_memory(pid)) for pid in options['pids']])
+            return
+
+        missing = [name for name in COMPILABLE
+                   if not os.path.isfile(os.path.join(registry.compiled_path(name), 'meta.json'))]
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f"No compiled artifact for {', '.join(missing)} (run compile_models); those load from pickle."
+            ))
+
+        for title, model_format, mmap in (
+            ("Before: joblib pickles", 'joblib', False),
+            ("After: compiled artifacts, mmap_mode='r'", 'compiled', True),
+        ):
+            self.stdout.write(f"\n{title}")
+            self.report(self.simulate(options['workers'], model_format, mmap))
+
+    def simulate(self, n_workers, model_format, mmap):
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(n_workers)
+        results = context.Queue()
+        workers = [
+            context.Process(target=_worker, args=(model_format, mmap, barrier, results))
+            for _ in range(n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        rows = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        return sorted(rows)
+
+    def report(self, rows):
+        self.stdout.write(f"{'pid':>8}{'RSS before':>14}{'RSS after':>14}{'PSS after':>14}{'shared':>14}")
+        total_pss = 0
+        for pid, before, after in rows:
+            total_pss += after['pss'] or 0
+            self.stdout.write(
+                f"{pid:>8}{megabytes(before['rss'] if before else None):>14}"
+                f"{megabytes(after['rss']):>14}{megabytes(after['pss']):>14}{megabytes(after['shared']):>14}"
+            )
+        self.stdout.write(f"{'total PSS':>36}{megabytes(total_pss):>28}")
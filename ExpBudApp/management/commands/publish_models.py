@@ -0,0 +1,102 @@
+import os
+import shutil
+
+import joblib
+from django.core.management.base import BaseCommand, CommandError
+
+from ExpBudApp.Model_Integration.compiled import compile_estimator
+from ExpBudApp.Model_Integration.registry import VERSIONS_DIR, registry
+
+from .compile_models import COMPILABLE
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish a model release under models/versions/<release>/ and make it current. Artifacts not "
+        "given are carried over from the current release. Running workers pick the release up within "
+        "PREDICTION_MODEL_RELOAD_INTERVAL seconds, without a restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('release', nargs='?', help="Name of the new release, e.g. 2025-06-01.")
+        parser.add_argument(
+            'files', nargs='*',
+            help=f"Replacement artifacts, matched by file name: {', '.join(registry.artifacts.values())}",
+        )
+        parser.add_argument('--no-activate', action='store_true', help="Publish without switching to it.")
+        parser.add_argument('--activate', metavar='RELEASE', help="Switch to an existing release (e.g. roll back).")
+        parser.add_argument('--list', action='store_true', help="List published releases.")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            current = registry.current_release()
+            for release in registry.releases():
+                self.stdout.write(f"{'*' if release == current else ' '} {release}")
+            return
+
+        if options['activate']:
+            self.activate(options['activate'])
+            return
+
+        release = options['release']
+        if not release:
+            raise CommandError("Give a release name, --activate RELEASE or --list.")
+        if os.sep in release or release.startswith('.'):
+            raise CommandError(f"Invalid release name: {release}")
+        target = registry.release_dir(release)
+        if os.path.exists(target):
+            raise CommandError(f"Release {release} already exists.")
+
+        by_file = {filename: name for name, filename in registry.artifacts.items()}
+        replacements = {}
+        for path in options['files']:
+            name = by_file.get(os.path.basename(path))
+            if name is None:
+                raise CommandError(f"{path} is not a model artifact ({', '.join(by_file)})")
+            replacements[name] = path
+
+        # Build in a hidden directory, then rename it into place in one step.
+        staging = os.path.join(registry.models_dir, VERSIONS_DIR, f'.{release}.tmp')
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        try:
+            self.build(staging, replacements)
+            os.rename(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self.stdout.write(f"Published release {release} to {target}")
+        if not options['no_activate']:
+            self.activate(release)
+
+    def build(self, staging, replacements):
+        base = registry.release_dir(registry.current_release())
+        for name, filename in registry.artifacts.items():
+            base_compiled = os.path.join(base, 'compiled', name)
+            compiled = os.path.join(staging, 'compiled', name)
+
+            if name not in replacements:
+                if not os.path.isfile(os.path.join(base, filename)):
+                    continue  # optional artifact the current release does not have
+                shutil.copy2(os.path.join(base, filename), os.path.join(staging, filename))
+                if os.path.isdir(base_compiled):
+                    shutil.copytree(base_compiled, compiled)
+                continue
+
+            # Unpickle once here, so a broken artifact never becomes current.
+            try:
+                estimator = joblib.load(replacements[name])
+            except Exception as e:
+                raise CommandError(f"Could not load {replacements[name]}: {e}")
+            shutil.copy2(replacements[name], os.path.join(staging, filename))
+            if name in COMPILABLE and os.path.isdir(base_compiled):
+                compile_estimator(estimator).save(compiled)
+            self.stdout.write(f"{name}: {replacements[name]}")
+
+    def activate(self, release):
+        try:
+            registry.activate(release)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Current model release: {release}"))
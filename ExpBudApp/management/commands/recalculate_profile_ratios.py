@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from ExpBudApp.models import UserInputProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the derived ratios of every UserInputProfile in SQL, one UPDATE per primary-key range, "
+        "e.g. after importing profiles with bulk_create or raw SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help="Primary keys per UPDATE statement, to keep each transaction short.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        bounds = UserInputProfile.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write("No profiles to update.")
+            return
+
+        started = time.perf_counter()
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+            updated += UserInputProfile.objects.filter(
+                pk__gte=start, pk__lt=start + chunk_size,
+            ).recalculate_ratios()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Recalculated ratios of {updated} profiles in {elapsed:.2f}s "
+            f"({updated / elapsed if elapsed else 0:,.0f} rows/s)."
+        ))
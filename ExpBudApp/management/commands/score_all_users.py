@@ -0,0 +1,169 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ExpBudApp.models import UserFinancialScore, UserInputProfile
+from ExpBudApp.Model_Integration.registry import registry
+from ExpBudApp.Model_Integration.scoring import (
+    DEFAULT_DESIRED_SAVINGS, PROFILE_FIELDS, init_worker, score_profiles,
+)
+
+SCORE_FIELDS = [
+    'financial_health_score', 'overspending_alert', 'anomaly_detected',
+    'savings_target_met', 'predictions', 'model_versions', 'scored_at',
+]
+
+
+class Checkpoint:
+    """Last profile pk whose scores are committed, kept in a small JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Score every UserInputProfile with all six models in vectorized batches, across a process pool, "
+        "and store the results in UserFinancialScore. Resumable from a checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Profiles per batch (and per DB round trip).")
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Scoring processes (0 scores in this process).",
+        )
+        parser.add_argument('--checkpoint', default='score_all_users.checkpoint.json', help="Checkpoint file.")
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and score everyone.")
+        parser.add_argument(
+            '--desired-savings', type=float, default=DEFAULT_DESIRED_SAVINGS,
+            help="Desired_Savings_Percentage assumed for every profile.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        checkpoint = Checkpoint(options['checkpoint'])
+        state = None if options['restart'] else checkpoint.load()
+        if state and state.get('model_versions') != registry.active_versions():
+            self.stdout.write(self.style.WARNING("Models changed since the checkpoint; scoring everyone again."))
+            state = None
+        state = state or {'last_pk': 0, 'scored': 0, 'model_versions': registry.active_versions()}
+
+        profiles = UserInputProfile.objects.filter(pk__gt=state['last_pk']).order_by('pk')
+        total = profiles.count()
+        if state['last_pk']:
+            self.stdout.write(f"Resuming after profile {state['last_pk']} ({state['scored']} already scored).")
+        self.stdout.write(f"Scoring {total} profiles in chunks of {chunk_size} with {options['workers']} workers.")
+
+        self.started = time.perf_counter()
+        self.done = 0
+        pool = None
+        if options['workers'] > 0:
+            pool = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+            )
+
+        # Results are written in submission order, so the checkpoint only ever
+        # moves past profiles whose scores are committed.
+        pending = deque()
+        try:
+            for chunk in self.chunks(profiles, chunk_size):
+                values = chunk[2]
+                if pool is None:
+                    pending.append((chunk, score_profiles(values, options['desired_savings'])))
+                else:
+                    pending.append((chunk, pool.submit(score_profiles, values, options['desired_savings'])))
+                while len(pending) > max(1, options['workers'] * 2):
+                    self.write(*pending.popleft(), state, checkpoint, total)
+            while pending:
+                self.write(*pending.popleft(), state, checkpoint, total)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        checkpoint.clear()
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {self.done} profiles in {elapsed:.1f}s ({self.done / elapsed if elapsed else 0:,.0f} rows/s)."
+        ))
+
+    def chunks(self, profiles, chunk_size):
+        """(user ids, profile pks, values matrix) per chunk, streamed with a server-side cursor."""
+        user_ids, pks, values = [], [], []
+        for pk, user_id, *row in profiles.values_list('pk', 'user_id', *PROFILE_FIELDS).iterator(chunk_size=chunk_size):
+            pks.append(pk)
+            user_ids.append(user_id)
+            values.append(row)
+            if len(pks) == chunk_size:
+                yield user_ids, pks, np.array(values, dtype=np.float64)
+                user_ids, pks, values = [], [], []
+        if pks:
+            yield user_ids, pks, np.array(values, dtype=np.float64)
+
+    def write(self, chunk, results, state, checkpoint, total):
+        user_ids, pks, _ = chunk
+        if not isinstance(results, list):
+            results = results.result()
+
+        scored_at = timezone.now()
+        versions = state['model_versions']
+        scores = [
+            UserFinancialScore(
+                user_id=user_id,
+                financial_health_score=result['Financial_Health_Score'],
+                overspending_alert=result['Overspending_Alert'],
+                anomaly_detected=result['Anomaly_Detection'],
+                savings_target_met=bool(result['Savings_Target_Result']),
+                predictions=result,
+                model_versions=versions,
+                scored_at=scored_at,
+            )
+            for user_id, result in zip(user_ids, results)
+        ]
+
+        # One INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE per chunk; bulk_update's
+        # CASE WHEN form was ~10x slower for re-scored users. MySQL infers the
+        # conflicting key itself and rejects unique_fields.
+        unique_fields = ['user'] if connection.features.supports_update_conflicts_with_target else None
+        with transaction.atomic():
+            UserFinancialScore.objects.bulk_create(
+                scores, update_conflicts=True, unique_fields=unique_fields, update_fields=SCORE_FIELDS,
+            )
+
+        self.done += len(results)
+        state['last_pk'] = pks[-1]
+        state['scored'] += len(results)
+        checkpoint.save(state)
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(f"  {self.done}/{total} profiles, {self.done / elapsed:,.0f} rows/s")
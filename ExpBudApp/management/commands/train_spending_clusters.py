@@ -0,0 +1,83 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from ExpBudApp.Model_Integration.clustering import (
+    CLUSTER_FEATURES, MODEL_NAME, RECOMMENDER, NearestCentroid, centroid_artifact, cluster_matrix,
+)
+from ExpBudApp.Model_Integration.registry import file_version, registry
+from ExpBudApp.Model_Integration.utils.feature_engineering import INPUT_FIELDS, compute_derived_batch
+
+LABEL_COLUMN = 'Cluster_Label'
+
+
+class Command(BaseCommand):
+    help = (
+        "Fit the centroids behind Cluster_Label of the personalized recommender to the labels in its "
+        f"training data, and save them as {registry.artifacts[MODEL_NAME]}. The artifact is tied to that "
+        "recommender; any other recommender version keeps the fallback cluster."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'training_data',
+            help=f"CSV the recommender was trained on, with columns {', '.join(INPUT_FIELDS)} and {LABEL_COLUMN}.",
+        )
+        parser.add_argument(
+            '--recommender',
+            help=f"Recommender artifact trained on that data (default: {RECOMMENDER} of the current release).",
+        )
+        parser.add_argument(
+            '--min-agreement', type=float, default=0.9,
+            help="Share of training rows the centroids must assign their own label (default 0.9).",
+        )
+        parser.add_argument(
+            '--output',
+            help="Artifact path (default: the models directory; required once releases are published).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            frame = pd.read_csv(options['training_data'], usecols=INPUT_FIELDS + [LABEL_COLUMN]).dropna()
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {options['training_data']}: {e}")
+        if frame.empty:
+            raise CommandError("The training data has no complete rows.")
+
+        release = registry.current_release()
+        output = options['output']
+        if output is None:
+            if release is not None:
+                raise CommandError("Releases are never changed in place; give --output and publish it with publish_models.")
+            output = os.path.join(registry.models_dir, registry.artifacts[MODEL_NAME])
+        recommender = file_version(
+            options['recommender'] or os.path.join(registry.release_dir(release), registry.artifacts[RECOMMENDER])
+        )
+
+        columns = {field: frame[field].to_numpy(dtype=np.float64) for field in INPUT_FIELDS}
+        labels = frame[LABEL_COLUMN].to_numpy().astype(np.int64)
+        X = cluster_matrix(compute_derived_batch(columns))
+        artifact = centroid_artifact(X, labels, recommender=recommender)
+        assigned = NearestCentroid(artifact).assign(X)
+        artifact['agreement'] = float(np.mean(assigned == labels))
+
+        self.stdout.write(f"Fitted {len(artifact['labels'])} centroids on {len(X)} rows for {RECOMMENDER} {recommender}")
+        for label, centroid in zip(artifact['labels'], artifact['centroids']):
+            rows = labels == label
+            share = centroid * artifact['scale'] + artifact['mean']
+            self.stdout.write(
+                f"  cluster {label}: {np.count_nonzero(rows):>8} rows, {np.mean(assigned[rows] == label):6.1%} kept, "
+                + ", ".join(f"{name}={value:.3f}" for name, value in zip(CLUSTER_FEATURES, share))
+            )
+        if artifact['agreement'] < options['min_agreement']:
+            raise CommandError(
+                f"The centroids reproduce {artifact['agreement']:.1%} of the training labels "
+                f"(--min-agreement {options['min_agreement']:.0%}); nothing saved."
+            )
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        joblib.dump(artifact, output)
+        self.stdout.write(self.style.SUCCESS(f"Saved {output} ({artifact['agreement']:.1%} of labels reproduced)"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ExpBudApp.Model_Integration.registry import registry
+
+
+def megabytes(num_bytes):
+    return f"{num_bytes / (1024 * 1024):.1f} MB" if num_bytes is not None else "n/a"
+
+
+class Command(BaseCommand):
+    help = "Load the Model_Integration artifacts now and report per-model load time and memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help=f"Models to load (default: all). Choices: {', '.join(registry.artifacts)}",
+        )
+
+    def handle(self, *args, **options):
+        names = options['models'] or list(registry.artifacts)
+        unknown = [name for name in names if name not in registry.artifacts]
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}")
+
+        stats = registry.warm_up(names)
+
+        self.stdout.write(f"{'model':<24}{'load time':>12}{'RSS delta':>12}{'file size':>12}")
+        for name in names:
+            stat = stats[name]
+            self.stdout.write(
+                f"{name:<24}{stat['load_seconds']:>11.3f}s"
+                f"{megabytes(stat['rss_delta_bytes']):>12}{megabytes(stat['file_bytes']):>12}"
+            )
@@ -1,11 +1,14 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
 from django.utils.timezone import now
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from datetime import date
 from django.utils import timezone
 from decimal import Decimal
+from rest_framework.utils.encoders import JSONEncoder
 # ----------------------------
 # Custom User & User Manager
 # ----------------------------
@@ -74,10 +77,119 @@ class Budget(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'month', 'category'], name='budget_user_month_cat_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} | {self.month.strftime('%B %Y')} | {self.category} | ₹{self.budget_limit}"
 
 
+# The unique key of a transaction, and the fields an upsert overwrites on a conflict
+TRANSACTION_KEY = ['user', 'merchant_name', 'transaction_date']
+TRANSACTION_UPSERT_FIELDS = ['amount', 'category', 'transaction_time', 'payment_method', 'transaction_description']
+
+# Merchants looked up per query by pks_by_key, which keeps the IN lists and the SQL short
+KEY_LOOKUP_BATCH = 300
+
+
+class TransactionQuerySet(models.QuerySet):
+    def pks_by_key(self, keys):
+        """
+        {(user_id, merchant_name, transaction_date): pk} for the transactions
+        with one of `keys`. One query per user and KEY_LOOKUP_BATCH merchants
+        (merchant IN ... AND date IN ...), narrowed to the exact keys here: a
+        condition per key would nest too deep for SQLite on large imports.
+        """
+        dates = {}
+        for user_id, merchant, day in keys:
+            dates.setdefault(user_id, {}).setdefault(merchant, set()).add(day)
+
+        found = {}
+        for user_id, by_merchant in dates.items():
+            merchants = list(by_merchant)
+            for start in range(0, len(merchants), KEY_LOOKUP_BATCH):
+                batch = merchants[start:start + KEY_LOOKUP_BATCH]
+                days = set().union(*(by_merchant[merchant] for merchant in batch))
+                for pk, merchant, day in self.filter(
+                    user_id=user_id, merchant_name__in=batch, transaction_date__in=days,
+                ).values_list('pk', 'merchant_name', 'transaction_date'):
+                    if day in by_merchant[merchant]:
+                        found[user_id, merchant, day] = pk
+        return found
+
+    def upsert(self, objs, batch_size=None, update_fields=TRANSACTION_UPSERT_FIELDS):
+        """
+        Insert transactions in one statement per batch, each replacing the
+        transaction of the same user, merchant and date (the txn_user_merchant_date_uniq
+        constraint) if there is one: INSERT ... ON CONFLICT DO UPDATE, or
+        ON DUPLICATE KEY UPDATE on MySQL. A replaced row takes the
+        update_fields of its new version and keeps its other fields, so only
+        pass the fields that were given (an empty list keeps the row as it
+        is). Keys must be distinct within one call.
+        A missing merchant is saved as '', so those rows share keys too.
+        Sets the pk of each object; MySQL returns none, so there the pks are
+        looked up by key afterwards.
+        """
+        for obj in objs:
+            if obj.merchant_name is None:
+                obj.merchant_name = ''
+        features = connections[self.db].features
+        self.bulk_create(
+            objs, batch_size=batch_size, update_conflicts=True,
+            unique_fields=TRANSACTION_KEY if features.supports_update_conflicts_with_target else None,
+            # The conflict clause needs a column: setting the date to itself changes nothing
+            update_fields=list(update_fields) or ['transaction_date'],
+        )
+        missing = [obj for obj in objs if obj.pk is None]
+        if missing:
+            keys = [(obj.user_id, obj.merchant_name, obj.transaction_date) for obj in missing]
+            pks = self.pks_by_key(keys)
+            for obj, key in zip(missing, keys):
+                obj.pk = pks.get(key)
+        return objs
+
+    def upsert_by_merchant_and_date(self, user, rows, batch_size=1000):
+        """
+        Save many transactions of one user with the semantics of
+        TransactionViewSet.perform_create: a row with the merchant_name and
+        transaction_date of a transaction of the user replaces the fields it
+        gives and keeps the others. Rows apply in order, so of several rows
+        with the same key the last to give a field sets it.
+        rows: validated TransactionSerializer data.
+        Returns: one (transaction, created) pair per row; rows with the same
+        key share one transaction, with the pk and the fields given.
+        Written with upsert() in a single database transaction. A lookup
+        beforehand (pks_by_key) finds which keys exist, to tell created from
+        updated rows.
+        """
+        keys, merged = [], {}
+        for row in rows:
+            key = (user.pk, row.get('merchant_name') or '', row.get('transaction_date', date.today()))
+            keys.append(key)
+            merged[key] = {**merged.get(key, {}), **row, 'merchant_name': key[1], 'transaction_date': key[2]}
+        existing = self.pks_by_key(merged)
+
+        # Rows replace only the fields they give, so they are written in groups
+        # of rows that give the same fields
+        latest, groups = {}, {}
+        for key, data in merged.items():
+            latest[key] = self.model(user=user, **data)
+            fields = tuple(field for field in TRANSACTION_UPSERT_FIELDS if field in data)
+            groups.setdefault(fields, []).append(latest[key])
+
+        results, seen = [], set()
+        for key in keys:
+            results.append((latest[key], key not in existing and key not in seen))
+            seen.add(key)
+
+        with transaction.atomic(using=self.db):
+            for fields, txns in groups.items():
+                self.upsert(txns, batch_size=batch_size, update_fields=fields)
+        return results
+
+
 class Transaction(models.Model):
     PAYMENT_METHOD_CHOICES = [
         ('Cash', 'Cash'),
@@ -93,10 +205,25 @@ class Transaction(models.Model):
     category = models.CharField(max_length=50, default="General")
     transaction_date = models.DateField(default=date.today)
     transaction_time = models.TimeField(default=now)
-    merchant_name = models.CharField(max_length=100, null=True, blank=True)
+    # '' rather than NULL when there is none: NULLs never match in the unique key
+    merchant_name = models.CharField(max_length=100, blank=True, default='')
     payment_method = models.CharField(max_length=50, choices=PAYMENT_METHOD_CHOICES, default='Cash')
     transaction_description = models.TextField(null=True, blank=True)
 
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        # Every access path is one user's rows: listed and exported by date, upserted
+        # by merchant and date (the unique key, see TransactionQuerySet.upsert), or
+        # filtered by category.
+        indexes = [
+            models.Index(fields=['user', 'transaction_date'], name='txn_user_date_idx'),
+            models.Index(fields=['user', 'category', 'transaction_date'], name='txn_user_category_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=TRANSACTION_KEY, name='txn_user_merchant_date_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.category} - ₹{self.amount}"
 
@@ -186,6 +313,54 @@ class AIPrediction(models.Model):
         return f"{self.user.username} - {self.prediction_type}"
 
 
+class PredictionRecord(models.Model):
+    """One served /api/predict/ result, written in batches by Model_Integration.history."""
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    endpoint = models.CharField(max_length=50)
+    inputs_hash = models.CharField(max_length=64, db_index=True)
+    model_versions = models.JSONField(default=dict)
+    # DRF's encoder, as the outputs hold the same NumPy scalars the API renders
+    outputs = models.JSONField(encoder=JSONEncoder)
+    latency_ms = models.FloatField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.endpoint} - {self.inputs_hash[:12]} - {self.created_at:%Y-%m-%d %H:%M:%S}"
+
+
+class UserFinancialScore(models.Model):
+    """Latest offline scores of a user's input profile, written by `manage.py score_all_users`."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='financial_score')
+    financial_health_score = models.FloatField(null=True, blank=True)
+    overspending_alert = models.BooleanField(default=False)
+    anomaly_detected = models.BooleanField(default=False)
+    savings_target_met = models.BooleanField(default=False)
+    predictions = models.JSONField(encoder=JSONEncoder)
+    model_versions = models.JSONField(default=dict)
+    scored_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user.email} - Financial Score {self.financial_health_score}"
+
+
+class AnomalyBaseline(models.Model):
+    """Rolling anomaly score baseline of a user, shared by every worker (see Model_Integration.baselines)."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='anomaly_baseline',
+    )
+    count = models.IntegerField(default=0)
+    mean = models.FloatField(default=0.0)
+    var = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.count} inputs, mean {self.mean:.4f}"
+
+
 # ----------------------------
 # User Profile & Input Models
 # ----------------------------
@@ -198,6 +373,45 @@ class UserProfile(models.Model):
         return self.full_name
 
 
+# Inputs of UserInputProfile.calculate_ratios(), and the columns it derives from them
+PROFILE_EXPENSE_FIELDS = (
+    'rent', 'loan_repayment', 'groceries', 'transport', 'eating_out',
+    'entertainment', 'utilities', 'healthcare', 'education', 'miscellaneous',
+)
+PROFILE_RATIO_INPUTS = ('income',) + PROFILE_EXPENSE_FIELDS
+PROFILE_RATIO_FIELDS = (
+    'savings_efficiency', 'rent_to_income_ratio', 'groceries_to_income_ratio', 'total_expenses_to_income_ratio',
+)
+
+
+class UserInputProfileQuerySet(models.QuerySet):
+    def recalculate_ratios(self):
+        """
+        Recompute the derived ratios of every profile in the queryset with one
+        UPDATE, without loading the rows. Meant for imports and data migrations
+        that write profiles in bulk (bulk_create, update(), raw SQL), which
+        bypass save(). Returns the number of rows updated.
+        """
+        income = Cast('income', FloatField())
+        expenses = sum((F(name) for name in PROFILE_EXPENSE_FIELDS[1:]), F(PROFILE_EXPENSE_FIELDS[0]))
+
+        def share(amount):
+            return Case(When(income=0, then=Value(0.0)), default=Cast(amount, FloatField()) / income)
+
+        total_ratio = share(expenses)
+        return self.update(
+            total_expenses_to_income_ratio=total_ratio,
+            rent_to_income_ratio=share(F('rent')),
+            groceries_to_income_ratio=share(F('groceries')),
+            savings_efficiency=Value(1.0) - total_ratio,
+        )
+
+
+class UserInputProfileManager(models.Manager.from_queryset(UserInputProfileQuerySet)):
+    # Available to RunPython data migrations through apps.get_model()
+    use_in_migrations = True
+
+
 class UserInputProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='input_profile')
 
@@ -226,6 +440,22 @@ class UserInputProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserInputProfileManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_ratio_inputs = instance._ratio_inputs()
+        return instance
+
+    def _ratio_inputs(self):
+        # Read from __dict__ so deferred fields are not fetched just to compare them
+        return tuple(self.__dict__.get(name, models.DEFERRED) for name in PROFILE_RATIO_INPUTS)
+
+    def ratio_inputs_changed(self):
+        """True if income or an expense differs from what was loaded (always for new profiles)."""
+        return getattr(self, '_loaded_ratio_inputs', None) != self._ratio_inputs()
+
     def calculate_ratios(self):
         try:
             income = float(self.income)
@@ -244,8 +474,17 @@ class UserInputProfile(models.Model):
             raise ValueError(f"Error calculating ratios: {e}")
 
     def save(self, *args, **kwargs):
-        self.calculate_ratios()
+        # Ratios only depend on income and the expenses, so saves that leave
+        # those alone (occupation, age, ...) skip the Decimal arithmetic.
+        update_fields = kwargs.get('update_fields')
+        writes_inputs = update_fields is None or not set(PROFILE_RATIO_INPUTS).isdisjoint(update_fields)
+        if writes_inputs and self.ratio_inputs_changed():
+            self.calculate_ratios()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *PROFILE_RATIO_FIELDS}
         super().save(*args, **kwargs)
+        if writes_inputs:
+            self._loaded_ratio_inputs = self._ratio_inputs()
 
     def __str__(self):
         return f"{self.user.email} - User Input Profile"
@@ -0,0 +1,114 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset pagination over a unique, non-null ordering such as
+    ('-transaction_date', '-id'). The cursor token holds the ordering values
+    of the row a page starts after, so the next page is one indexed range
+    scan, and rows added or deleted elsewhere never shift or repeat a page.
+    Responses keep CursorPagination's {"next", "previous", "results"} shape.
+    The default page size is settings.API_PAGE_SIZE.
+    """
+    ordering = ('-id',)
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        self.page_size = getattr(settings, 'API_PAGE_SIZE', 100)
+        return super().get_page_size(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.request = request
+        model = queryset.model
+        names = [field.lstrip('-') for field in self.ordering]
+        values, reverse = self.decode_keyset(request, [model._meta.get_field(name) for name in names])
+
+        if values is not None:
+            queryset = queryset.filter(self._beyond(values, reverse))
+        ordering = [self._flip(field) for field in self.ordering] if reverse else list(self.ordering)
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        # Going back from a page means there is a page after it, and vice versa.
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = has_more if reverse else values is not None
+        self.first_values = [getattr(rows[0], name) for name in names] if rows else values
+        self.last_values = [getattr(rows[-1], name) for name in names] if rows else values
+        return rows
+
+    def _flip(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _beyond(self, values, reverse):
+        """Rows after `values` in the ordering (before them when reverse), compared field by field."""
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, values))):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            beyond = Q(**{f'{name}__{lookup}': value})
+            condition = beyond if condition is None else beyond | (Q(**{name: value}) & condition)
+        return condition
+
+    def decode_keyset(self, request, fields):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            values = [field.to_python(value) for field, value in zip(fields, cursor['p'])]
+            if len(cursor['p']) != len(fields) or any(value is None for value in values):
+                raise ValueError
+            return values, bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_keyset(self, values, reverse):
+        payload = {'p': [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]}
+        if reverse:
+            payload['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_keyset(self.last_values, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_keyset(self.first_values, reverse=True)
+
+
+class TransactionPagination(KeysetPagination):
+    ordering = ('-transaction_date', '-id')
+
+
+class BudgetPagination(KeysetPagination):
+    ordering = ('-month', '-id')
+
+
+class RecurringTransactionPagination(KeysetPagination):
+    ordering = ('next_due_date', 'id')
+
+
+class NotificationPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
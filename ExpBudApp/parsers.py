@@ -0,0 +1,68 @@
+import codecs
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+# Headers written by the CSV exports -> Transaction fields, so an export can be imported again
+EXPORT_HEADERS = {
+    'Date': 'transaction_date',
+    'Time': 'transaction_time',
+    'Amount': 'amount',
+    'Category': 'category',
+    'Merchant': 'merchant_name',
+    'Payment Method': 'payment_method',
+    'Description': 'transaction_description',
+}
+
+TRANSACTION_FIELDS = set(EXPORT_HEADERS.values())
+
+
+def map_columns(header, mapping=EXPORT_HEADERS):
+    """
+    Transaction field of each CSV column, or None for columns that name no field.
+    header: the header row; a column is looked up in `mapping` (header -> field)
+    and otherwise taken as a field name.
+    """
+    if header:
+        header[0] = header[0].lstrip('\ufeff')
+    columns = [mapping.get(name.strip(), name.strip()) for name in header]
+    return [column if column in TRANSACTION_FIELDS else None for column in columns]
+
+
+def read_transaction_csv(lines):
+    """
+    Yield one dict per data row of a transactions CSV.
+    lines: iterable of text lines, e.g. codecs.iterdecode(stream, 'utf-8').
+    The header row names the columns, as Transaction field names or as the
+    export headers. Empty cells are left out so the model defaults apply.
+    Raises ParseError for unknown columns and for rows of the wrong width.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        raise ParseError("CSV body is empty; expected a header row.")
+    columns = map_columns(header)
+    unknown = [name for name, column in zip(header, columns) if column is None]
+    if unknown:
+        raise ParseError(f"Unknown CSV columns: {', '.join(unknown)}.")
+
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(columns):
+            raise ParseError(f"CSV line {reader.line_num}: expected {len(columns)} cells, got {len(row)}.")
+        yield {column: value for column, value in zip(columns, row) if value != ''}
+
+
+class TransactionCSVParser(BaseParser):
+    """text/csv request bodies of transactions, parsed to a list of dicts (see read_transaction_csv)."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            return list(read_transaction_csv(codecs.iterdecode(stream, encoding)))
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f"CSV parse error - {exc}")
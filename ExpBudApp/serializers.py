@@ -63,6 +63,11 @@ class TransactionSerializer(serializers.ModelSerializer):
         model = Transaction
         fields = '__all__'
         read_only_fields = ['user']
+        # Part of the unique key, which DRF would make required; no merchant (omitted or null) is ''
+        extra_kwargs = {'merchant_name': {'default': '', 'allow_null': True}}
+
+    def validate_merchant_name(self, value):
+        return value or ''
 
 class RecurringTransactionSerializer(serializers.ModelSerializer):
     class Meta:
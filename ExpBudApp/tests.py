@@ -1,3 +1,1462 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection, connections
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from sklearn.cluster import KMeans
+from sklearn.ensemble import IsolationForest, RandomForestClassifier, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier, XGBRegressor
+
+from .Model_Integration import (
+    anomaly_detection, expense_prediction, financial_score_predictor,
+    overspending_alert, personalized_recommender, savings_efficiency_predictor,
+)
+from .Model_Integration import cache as prediction_cache
+from .Model_Integration import clustering, coalescer
+from .Model_Integration import serializers as prediction_serializers
+from .Model_Integration import views as prediction_views
+from .Model_Integration.baselines import ScoreBaselines, observe_stored
+from .Model_Integration.batch import BATCH_MODELS
+from .Model_Integration.compiled import compile_estimator, load_compiled
+from .Model_Integration.executor import arun_models, run_models
+from .Model_Integration.history import PredictionHistoryBuffer
+from .Model_Integration.registry import ARTIFACTS, ModelRegistry, ModelSet, registry
+from .Model_Integration.serializers import UnifiedFinancialInputSerializer
+from .Model_Integration.utils.feature_engineering import (
+    INPUT_FIELDS, compute_derived_batch, compute_feature_batch, compute_feature_sets, to_columns,
+)
+from .Model_Integration.utils.feature_matrix import UNNAMED_FEATURES_WARNING, as_feature_row, unnamed_features
+from .Model_Integration.validation import unified_input
+from .management.commands.benchmark_predictors import synthetic_columns, synthetic_inputs
+from .models import AnomalyBaseline, PredictionRecord, Transaction, User, UserInputProfile
+
+# Feature set -> the columns its estimator is called with
+MODEL_COLUMNS = {
+    'expense_prediction': expense_prediction.selected_features,
+    'overspending_alert': overspending_alert.alert_features,
+    'anomaly_detection': anomaly_detection.anomaly_features,
+    'savings_efficiency': savings_efficiency_predictor.FEATURE_COLUMNS,
+    'financial_health_score': financial_score_predictor.features,
+    'personalized_spending': personalized_recommender.FEATURE_COLUMNS,
+}
+
+# Validated unified inputs: typical, zero income, no savings goal, overspending, all zero.
+USER_INPUTS = [
+    {
+        'Income': 50000.0, 'Desired_Savings_Percentage': 20.0, 'Rent': 12000.0, 'Loan_Repayment': 3000.0,
+        'Insurance': 1500.0, 'Groceries': 6000.0, 'Transport': 2500.0, 'Eating_Out': 1800.0,
+        'Entertainment': 1200.0, 'Utilities': 2200.0, 'Healthcare': 900.0, 'Education': 1000.0,
+        'Miscellaneous': 700.0,
+    },
+    {
+        'Income': 0.0, 'Desired_Savings_Percentage': 10.0, 'Rent': 4000.0, 'Loan_Repayment': 0.0,
+        'Insurance': 0.0, 'Groceries': 1500.0, 'Transport': 300.0, 'Eating_Out': 0.0,
+        'Entertainment': 0.0, 'Utilities': 400.0, 'Healthcare': 0.0, 'Education': 0.0,
+        'Miscellaneous': 100.0,
+    },
+    {
+        'Income': 82000.5, 'Desired_Savings_Percentage': 0.0, 'Rent': 20500.25, 'Loan_Repayment': 8000.0,
+        'Insurance': 2500.0, 'Groceries': 7300.0, 'Transport': 4100.0, 'Eating_Out': 5200.0,
+        'Entertainment': 3900.0, 'Utilities': 2800.0, 'Healthcare': 1200.0, 'Education': 6000.0,
+        'Miscellaneous': 2400.0,
+    },
+    {
+        'Income': 30000.0, 'Desired_Savings_Percentage': 35.0, 'Rent': 15000.0, 'Loan_Repayment': 6000.0,
+        'Insurance': 2000.0, 'Groceries': 5000.0, 'Transport': 2000.0, 'Eating_Out': 2500.0,
+        'Entertainment': 1500.0, 'Utilities': 1800.0, 'Healthcare': 700.0, 'Education': 0.0,
+        'Miscellaneous': 900.0,
+    },
+    {
+        'Income': 0.0, 'Desired_Savings_Percentage': 0.0, 'Rent': 0.0, 'Loan_Repayment': 0.0,
+        'Insurance': 0.0, 'Groceries': 0.0, 'Transport': 0.0, 'Eating_Out': 0.0,
+        'Entertainment': 0.0, 'Utilities': 0.0, 'Healthcare': 0.0, 'Education': 0.0,
+        'Miscellaneous': 0.0,
+    },
+]
+
+# USER_INPUTS as request payloads
+PAYLOADS = [
+    {**user_input, 'Age': 30, 'Dependents': 1, 'Occupation': 'Professional', 'City_Tier': 1}
+    for user_input in USER_INPUTS
+]
+
+# compute_feature_sets() of USER_INPUTS[0], [1], [2] and [4], frozen from its original
+# implementation (before derived features were shared across sets).
+GOLDEN_FEATURE_SETS = [
+    {
+        'expense_prediction': {
+            'Income': 50000.0, 'Rent': 12000.0, 'Loan_Repayment': 3000.0, 'Groceries': 6000.0, 'Transport':
+            2500.0, 'Eating_Out': 1800.0, 'Entertainment': 1200.0, 'Utilities': 2200.0, 'Healthcare': 900.0,
+            'Education': 1000.0, 'Miscellaneous': 700.0, 'Savings_Efficiency': 1.72, 'Rent_to_Income_Ratio':
+            0.24, 'Groceries_to_Income_Ratio': 0.12, 'Total_Expenses_to_Income_Ratio': 0.656
+        },
+        'overspending_alert': {
+            'Income': 50000.0, 'Total_Expenses': 32800.0, 'Rent_to_Income_Ratio': 0.24,
+            'Groceries_to_Income_Ratio': 0.12, 'Total_Expenses_to_Income_Ratio': 0.656, 'Savings_Efficiency':
+            1.72, 'Essential_Expenses': 11600.0, 'Non_Essential_Expenses': 3700.0
+        },
+        'anomaly_detection': {
+            'Income': 50000.0, 'Total_Expenses': 32800.0, 'Rent_to_Income_Ratio': 0.24,
+            'Groceries_to_Income_Ratio': 0.12, 'Total_Expenses_to_Income_Ratio': 0.656, 'Savings_Efficiency':
+            1.72, 'Discretionary_to_Income_Ratio': 0.074, 'Savings_Target_Efficiency': 34.4
+        },
+        'savings_efficiency': {
+            'Income': 50000.0, 'Disposable_Income': 17200.0, 'Essential_Expenses': 11600.0,
+            'Non_Essential_Expenses': 3700.0, 'Total_Expenses_to_Income_Ratio': 0.656,
+            'Desired_Savings_Percentage': 20.0, 'Calculated_Savings_Efficiency': 34.4,
+            'Potential_Savings_Groceries': 600.0, 'Potential_Savings_Transport': 250.0,
+            'Potential_Savings_Eating_Out': 180.0, 'Potential_Savings_Entertainment': 120.0
+        },
+        'financial_health_score': {
+            'Income': 50000.0, 'Disposable_Income': 17200.0, 'Essential_Expenses': 11600.0,
+            'Non_Essential_Expenses': 3700.0, 'Total_Expenses_to_Income_Ratio': 0.656,
+            'Desired_Savings_Percentage': 20.0, 'Savings_Efficiency': 1.72, 'Debt_to_Income_Ratio': 0.09
+        },
+        'personalized_spending': {
+            'Income': 50000.0, 'Essential_Expenses': 11600.0, 'Discretionary_vs_Essential': 0.31896551696640907,
+            'Savings_Gap': -14.399999999999999, 'Cluster_Label': 1
+        },
+    },
+    {
+        'expense_prediction': {
+            'Income': 0.0, 'Rent': 4000.0, 'Loan_Repayment': 0.0, 'Groceries': 1500.0, 'Transport': 300.0,
+            'Eating_Out': 0.0, 'Entertainment': 0.0, 'Utilities': 400.0, 'Healthcare': 0.0, 'Education': 0.0,
+            'Miscellaneous': 100.0, 'Savings_Efficiency': 0, 'Rent_to_Income_Ratio': 0,
+            'Groceries_to_Income_Ratio': 0, 'Total_Expenses_to_Income_Ratio': 0
+        },
+        'overspending_alert': {
+            'Income': 0.0, 'Total_Expenses': 6300.0, 'Rent_to_Income_Ratio': 0, 'Groceries_to_Income_Ratio': 0,
+            'Total_Expenses_to_Income_Ratio': 0, 'Savings_Efficiency': 0, 'Essential_Expenses': 2200.0,
+            'Non_Essential_Expenses': 100.0
+        },
+        'anomaly_detection': {
+            'Income': 0.0, 'Total_Expenses': 6300.0, 'Rent_to_Income_Ratio': 0, 'Groceries_to_Income_Ratio': 0,
+            'Total_Expenses_to_Income_Ratio': 0, 'Savings_Efficiency': 0, 'Discretionary_to_Income_Ratio': 0,
+            'Savings_Target_Efficiency': 0
+        },
+        'savings_efficiency': {
+            'Income': 0.0, 'Disposable_Income': -6300.0, 'Essential_Expenses': 2200.0, 'Non_Essential_Expenses':
+            100.0, 'Total_Expenses_to_Income_Ratio': 0, 'Desired_Savings_Percentage': 10.0,
+            'Calculated_Savings_Efficiency': 0, 'Potential_Savings_Groceries': 150.0,
+            'Potential_Savings_Transport': 30.0, 'Potential_Savings_Eating_Out': 0.0,
+            'Potential_Savings_Entertainment': 0.0
+        },
+        'financial_health_score': {
+            'Income': 0.0, 'Disposable_Income': -6300.0, 'Essential_Expenses': 2200.0, 'Non_Essential_Expenses':
+            100.0, 'Total_Expenses_to_Income_Ratio': 0, 'Desired_Savings_Percentage': 10.0,
+            'Savings_Efficiency': 0, 'Debt_to_Income_Ratio': 0
+        },
+        'personalized_spending': {
+            'Income': 0.0, 'Essential_Expenses': 2200.0, 'Discretionary_vs_Essential': 0.04545454524793388,
+            'Savings_Gap': 10.0, 'Cluster_Label': 1
+        },
+    },
+    {
+        'expense_prediction': {
+            'Income': 82000.5, 'Rent': 20500.25, 'Loan_Repayment': 8000.0, 'Groceries': 7300.0, 'Transport':
+            4100.0, 'Eating_Out': 5200.0, 'Entertainment': 3900.0, 'Utilities': 2800.0, 'Healthcare': 1200.0,
+            'Education': 6000.0, 'Miscellaneous': 2400.0, 'Savings_Efficiency': 0, 'Rent_to_Income_Ratio':
+            0.2500015243809489, 'Groceries_to_Income_Ratio': 0.08902384741556454,
+            'Total_Expenses_to_Income_Ratio': 0.7792665898378669
+        },
+        'overspending_alert': {
+            'Income': 82000.5, 'Total_Expenses': 63900.25, 'Rent_to_Income_Ratio': 0.2500015243809489,
+            'Groceries_to_Income_Ratio': 0.08902384741556454, 'Total_Expenses_to_Income_Ratio':
+            0.7792665898378669, 'Savings_Efficiency': 0, 'Essential_Expenses': 15400.0,
+            'Non_Essential_Expenses': 11500.0
+        },
+        'anomaly_detection': {
+            'Income': 82000.5, 'Total_Expenses': 63900.25, 'Rent_to_Income_Ratio': 0.2500015243809489,
+            'Groceries_to_Income_Ratio': 0.08902384741556454, 'Total_Expenses_to_Income_Ratio':
+            0.7792665898378669, 'Savings_Efficiency': 0, 'Discretionary_to_Income_Ratio': 0.14024304729849207,
+            'Savings_Target_Efficiency': 22.073341016213316
+        },
+        'savings_efficiency': {
+            'Income': 82000.5, 'Disposable_Income': 18100.25, 'Essential_Expenses': 15400.0,
+            'Non_Essential_Expenses': 11500.0, 'Total_Expenses_to_Income_Ratio': 0.7792665898378669,
+            'Desired_Savings_Percentage': 0.0, 'Calculated_Savings_Efficiency': 22.073341016213316,
+            'Potential_Savings_Groceries': 730.0, 'Potential_Savings_Transport': 410.0,
+            'Potential_Savings_Eating_Out': 520.0, 'Potential_Savings_Entertainment': 390.0
+        },
+        'financial_health_score': {
+            'Income': 82000.5, 'Disposable_Income': 18100.25, 'Essential_Expenses': 15400.0,
+            'Non_Essential_Expenses': 11500.0, 'Total_Expenses_to_Income_Ratio': 0.7792665898378669,
+            'Desired_Savings_Percentage': 0.0, 'Savings_Efficiency': 0, 'Debt_to_Income_Ratio':
+            0.12804799970731887
+        },
+        'personalized_spending': {
+            'Income': 82000.5, 'Essential_Expenses': 15400.0, 'Discretionary_vs_Essential': 0.746753246268342,
+            'Savings_Gap': -22.073341016213316, 'Cluster_Label': 1
+        },
+    },
+    {
+        'expense_prediction': {
+            'Income': 0.0, 'Rent': 0.0, 'Loan_Repayment': 0.0, 'Groceries': 0.0, 'Transport': 0.0, 'Eating_Out':
+            0.0, 'Entertainment': 0.0, 'Utilities': 0.0, 'Healthcare': 0.0, 'Education': 0.0, 'Miscellaneous':
+            0.0, 'Savings_Efficiency': 0, 'Rent_to_Income_Ratio': 0, 'Groceries_to_Income_Ratio': 0,
+            'Total_Expenses_to_Income_Ratio': 0
+        },
+        'overspending_alert': {
+            'Income': 0.0, 'Total_Expenses': 0.0, 'Rent_to_Income_Ratio': 0, 'Groceries_to_Income_Ratio': 0,
+            'Total_Expenses_to_Income_Ratio': 0, 'Savings_Efficiency': 0, 'Essential_Expenses': 0.0,
+            'Non_Essential_Expenses': 0.0
+        },
+        'anomaly_detection': {
+            'Income': 0.0, 'Total_Expenses': 0.0, 'Rent_to_Income_Ratio': 0, 'Groceries_to_Income_Ratio': 0,
+            'Total_Expenses_to_Income_Ratio': 0, 'Savings_Efficiency': 0, 'Discretionary_to_Income_Ratio': 0,
+            'Savings_Target_Efficiency': 0
+        },
+        'savings_efficiency': {
+            'Income': 0.0, 'Disposable_Income': 0.0, 'Essential_Expenses': 0.0, 'Non_Essential_Expenses': 0.0,
+            'Total_Expenses_to_Income_Ratio': 0, 'Desired_Savings_Percentage': 0.0,
+            'Calculated_Savings_Efficiency': 0, 'Potential_Savings_Groceries': 0.0,
+            'Potential_Savings_Transport': 0.0, 'Potential_Savings_Eating_Out': 0.0,
+            'Potential_Savings_Entertainment': 0.0
+        },
+        'financial_health_score': {
+            'Income': 0.0, 'Disposable_Income': 0.0, 'Essential_Expenses': 0.0, 'Non_Essential_Expenses': 0.0,
+            'Total_Expenses_to_Income_Ratio': 0, 'Desired_Savings_Percentage': 0.0, 'Savings_Efficiency': 0,
+            'Debt_to_Income_Ratio': 0
+        },
+        'personalized_spending': {
+            'Income': 0.0, 'Essential_Expenses': 0.0, 'Discretionary_vs_Essential': 0.0, 'Savings_Gap': 0.0,
+            'Cluster_Label': 1
+        },
+    },
+]
+
+
+def fitted_on_frame(columns, seed=0):
+    """A small forest fitted on a named DataFrame, as the shipped estimators were."""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(200, len(columns))) * 1000, columns=columns)
+    return RandomForestRegressor(n_estimators=5, random_state=seed).fit(X, rng.normal(size=200))
+
+
+def dump_synthetic_models(directory, seed=0):
+    """
+    A small estimator for every required artifact, fitted on synthetic inputs
+    with the feature names of the shipped ones, so the API can run end to end.
+    """
+    features = compute_feature_batch(synthetic_columns(400, seed=seed))
+    frames = {key: pd.DataFrame({name: features[key][name] for name in columns}) for key, columns in MODEL_COLUMNS.items()}
+    ratio = frames['overspending_alert']['Total_Expenses_to_Income_Ratio']
+    scaler = StandardScaler().fit(frames['expense_prediction'])
+    models = {
+        'feature_scaler': scaler,
+        'expense_prediction': RandomForestRegressor(n_estimators=5, random_state=seed).fit(
+            scaler.transform(frames['expense_prediction']), frames['savings_efficiency']['Disposable_Income'],
+        ),
+        'overspending_alert': RandomForestClassifier(n_estimators=5, random_state=seed).fit(
+            frames['overspending_alert'], ratio > ratio.median(),
+        ),
+        'anomaly_detection': IsolationForest(n_estimators=10, random_state=seed).fit(frames['anomaly_detection']),
+        'savings_efficiency': RandomForestClassifier(n_estimators=5, random_state=seed).fit(
+            frames['savings_efficiency'], (ratio < ratio.median()).astype(int),
+        ),
+        'financial_health_score': RandomForestRegressor(n_estimators=5, random_state=seed).fit(
+            frames['financial_health_score'], 100 * (1 - ratio.clip(0, 1)),
+        ),
+        'personalized_spending': RandomForestRegressor(n_estimators=5, random_state=seed).fit(
+            frames['personalized_spending'], 20 - 10 * ratio.clip(0, 1),
+        ),
+    }
+    for name, model in models.items():
+        joblib.dump(model, os.path.join(directory, ARTIFACTS[name]))
+
+
+class SyntheticModelsMixin:
+    """
+    Serves the prediction endpoints from dump_synthetic_models() artifacts
+    through a fresh active release, with an empty prediction cache and no
+    history writes.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.models_dir = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.models_dir)
+        dump_synthetic_models(cls.models_dir)
+
+    def setUp(self):
+        super().setUp()
+        settings = override_settings(
+            PREDICTION_MODELS_DIR=self.models_dir, PREDICTION_MODEL_RELOAD_INTERVAL=0,
+            PREDICTION_HISTORY={'ENABLED': False},
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.reload_models()
+        caches[prediction_cache.get_config()['ALIAS']].clear()
+
+        self.user = User.objects.create_user(email='predict@example.com', username='predict', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def reload_models(self):
+        patcher = mock.patch.object(registry, '_active', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class FeatureRowTests(SimpleTestCase):
+    """as_feature_row feeds the estimators what pd.DataFrame([input])[columns] used to."""
+
+    def test_row_matches_dataframe_values(self):
+        for user_input in USER_INPUTS:
+            feature_sets = compute_feature_sets(user_input)
+            for key, columns in MODEL_COLUMNS.items():
+                # Reversed key order: the columns are picked by name, not position
+                features = dict(reversed(list(feature_sets[key].items())))
+                with self.subTest(key=key, income=user_input['Income']):
+                    expected = pd.DataFrame([features])[columns].to_numpy(dtype=np.float64)
+                    row = as_feature_row(features, columns)
+                    self.assertEqual(row.shape, (1, len(columns)))
+                    self.assertEqual(row.dtype, np.float64)
+                    np.testing.assert_array_equal(row, expected)
+
+    def test_predictions_match_dataframe_path(self):
+        for key, columns in MODEL_COLUMNS.items():
+            model = fitted_on_frame(columns)
+            for user_input in USER_INPUTS:
+                features = compute_feature_sets(user_input, keys=(key,))[key]
+                with self.subTest(key=key, income=user_input['Income']), unnamed_features():
+                    self.assertEqual(
+                        model.predict(as_feature_row(features, columns))[0],
+                        model.predict(pd.DataFrame([features])[columns])[0],
+                    )
+
+    def test_missing_feature_raises(self):
+        with self.assertRaises(KeyError):
+            as_feature_row({'Income': 1.0}, overspending_alert.alert_features)
+
+
+class UnnamedFeaturesTests(SimpleTestCase):
+    def setUp(self):
+        self.columns = overspending_alert.alert_features
+        self.model = fitted_on_frame(self.columns)
+        self.row = as_feature_row(compute_feature_sets(USER_INPUTS[0])['overspending_alert'], self.columns)
+
+    def predict_warnings(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.model.predict(self.row)
+        return [w for w in caught if UNNAMED_FEATURES_WARNING in str(w.message)]
+
+    def test_silenced_only_inside_block(self):
+        filters = list(warnings.filters)
+        with unnamed_features():
+            with warnings.catch_warnings(record=True) as caught:
+                self.model.predict(self.row)
+            self.assertFalse([w for w in caught if UNNAMED_FEATURES_WARNING in str(w.message)])
+        self.assertEqual(warnings.filters, filters)
+        self.assertTrue(self.predict_warnings())
+
+    def test_overlapping_threads_leave_no_filter(self):
+        filters = list(warnings.filters)
+        entered, release = threading.Barrier(4), threading.Event()
+
+        def predict():
+            with unnamed_features():
+                entered.wait()
+                release.wait()
+                self.model.predict(self.row)
+
+        threads = [threading.Thread(target=predict) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        entered.wait()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(warnings.filters, filters)
+        self.assertTrue(self.predict_warnings())
+
+
+# The original feature engineering always labelled inputs with cluster 1
+@mock.patch('ExpBudApp.Model_Integration.clustering.get_assigner', return_value=None)
+class FeatureSetGoldenTests(SimpleTestCase):
+    """The shared derivation reproduces the original per-set feature dicts."""
+
+    golden_inputs = [USER_INPUTS[i] for i in (0, 1, 2, 4)]
+
+    def test_feature_sets_match_golden(self, _):
+        for user_input, expected in zip(self.golden_inputs, GOLDEN_FEATURE_SETS):
+            with self.subTest(income=user_input['Income']):
+                self.assertEqual(compute_feature_sets(user_input), expected)
+
+    def test_feature_batch_matches_golden(self, _):
+        batch = compute_feature_batch(to_columns(self.golden_inputs))
+        for i, expected in enumerate(GOLDEN_FEATURE_SETS):
+            for key, features in expected.items():
+                with self.subTest(row=i, key=key):
+                    self.assertEqual(list(batch[key]), list(features))
+                    np.testing.assert_allclose(
+                        [batch[key][name][i] for name in features], list(features.values()), rtol=1e-12,
+                    )
+
+
+def validation_edge_cases(payload):
+    """Payloads around every branch of the compiled validation plan, valid and invalid."""
+    return [
+        payload,
+        {**payload, 'Income': 5000},
+        {**payload, 'Income': '5000.5'},
+        {**payload, 'Income': 'abc'},
+        {**payload, 'Income': None},
+        {**payload, 'Income': True},
+        {**payload, 'Income': 10 ** 400},
+        {**payload, 'Income': '1' * 2000},
+        {**payload, 'Age': 30.0},
+        {**payload, 'Age': 30.5},
+        {**payload, 'Age': '30'},
+        {**payload, 'Age': False},
+        {**payload, 'Occupation': ''},
+        {**payload, 'Occupation': '   '},
+        {**payload, 'Occupation': '  Engineer  '},
+        {**payload, 'Occupation': 'Eng\x00ineer'},
+        {**payload, 'Occupation': 'Ingénieur'},
+        {**payload, 'Occupation': '\ud800'},
+        {**payload, 'Occupation': 42},
+        {**payload, 'Occupation': ['Engineer']},
+        {**payload, 'Unknown_Field': 1},
+        {key: value for key, value in payload.items() if key != 'Rent'},
+        {},
+        [payload],
+        'payload',
+        None,
+    ]
+
+
+def as_comparable(errors):
+    """Serializer errors with their codes, so both the messages and the codes are compared."""
+    if isinstance(errors, dict):
+        return {key: as_comparable(value) for key, value in errors.items()}
+    if isinstance(errors, list):
+        return [as_comparable(value) for value in errors]
+    return (str(errors), getattr(errors, 'code', None))
+
+
+class PayloadValidationTests(SimpleTestCase):
+    """The compiled validator accepts, converts and rejects exactly as UnifiedFinancialInputSerializer."""
+
+    def setUp(self):
+        # Through JSON, so the values have the types the JSON parser hands to the views
+        self.payloads = json.loads(json.dumps(synthetic_inputs(50, seed=4)))
+        self.cases = validation_edge_cases(self.payloads[0])
+
+    def test_single_payloads_match_serializer(self):
+        for i, case in enumerate(self.cases):
+            serializer = UnifiedFinancialInputSerializer(data=case)
+            valid = serializer.is_valid()
+            validated, errors = unified_input.validate(case)
+            with self.subTest(case=i):
+                self.assertEqual(validated, serializer.validated_data if valid else None)
+                self.assertEqual(as_comparable(errors), as_comparable(None if valid else serializer.errors))
+
+    def test_batches_match_serializer(self):
+        for i, rows in enumerate((self.payloads, self.payloads[:10] + self.cases, self.cases[:3], 'not a list')):
+            serializer = UnifiedFinancialInputSerializer(data=rows, many=True)
+            valid = serializer.is_valid()
+            validated, columns, errors = unified_input.validate_many(rows)
+            with self.subTest(batch=i):
+                self.assertEqual(valid, errors is None)
+                if valid:
+                    self.assertEqual(validated, serializer.validated_data)
+                    expected = to_columns(serializer.validated_data)
+                    self.assertEqual({field: columns[field].tolist() for field in expected},
+                                     {field: values.tolist() for field, values in expected.items()})
+                else:
+                    self.assertEqual(as_comparable(errors), as_comparable(serializer.errors))
+
+
+class CompiledModelTests(SimpleTestCase):
+    """Compiled tree ensembles reproduce the estimators they were compiled from."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(7)
+        cls.X = rng.normal(size=(300, 6)) * [1, 10, 100, 1000, 1, 0.01]
+        cls.y = cls.X[:, 0] + np.log1p(np.abs(cls.X[:, 3])) + rng.normal(size=300)
+        cls.labels = (cls.y > np.median(cls.y)).astype(int)
+        cls.rows = rng.normal(size=(500, 6)) * [1, 10, 100, 1000, 1, 0.01]
+
+    def assert_round_trip(self, estimator, *methods):
+        compiled = compile_estimator(estimator)
+        with tempfile.TemporaryDirectory() as directory:
+            compiled.save(directory)
+            loaded = load_compiled(directory, mmap_mode='r')
+            for method in methods:
+                expected = getattr(estimator, method)(self.rows)
+                for model in (compiled, loaded):
+                    with self.subTest(estimator=type(estimator).__name__, method=method):
+                        np.testing.assert_allclose(getattr(model, method)(self.rows), expected, rtol=1e-6, atol=1e-6)
+
+    def test_random_forest_regressor(self):
+        self.assert_round_trip(RandomForestRegressor(n_estimators=10, random_state=0).fit(self.X, self.y), 'predict')
+
+    def test_random_forest_classifier(self):
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(self.X, self.labels)
+        self.assert_round_trip(model, 'predict', 'predict_proba')
+
+    def test_isolation_forest(self):
+        model = IsolationForest(n_estimators=20, max_features=0.5, random_state=0).fit(self.X)
+        self.assert_round_trip(model, 'predict', 'score_samples', 'decision_function')
+
+    def test_xgb_regressor(self):
+        self.assert_round_trip(XGBRegressor(n_estimators=20, max_depth=4).fit(self.X, self.y), 'predict')
+
+    def test_xgb_classifier(self):
+        self.assert_round_trip(XGBClassifier(n_estimators=20, max_depth=4).fit(self.X, self.labels), 'predict', 'predict_proba')
+
+    def test_standard_scaler(self):
+        self.assert_round_trip(StandardScaler().fit(self.X), 'transform')
+
+
+class ModelExecutorTests(SimpleTestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.release = threading.Event()
+        self.addCleanup(self.executor.shutdown)
+        self.addCleanup(self.release.set)
+
+    def occupy_worker(self):
+        # Another request's model, holding the only worker until released
+        self.executor.submit(self.release.wait, 5)
+
+    def slow(self, value):
+        self.release.wait(5)
+        return value
+
+    def fail(self, value):
+        raise ValueError(f"bad input {value}")
+
+    def test_partial_results(self):
+        self.executor = ThreadPoolExecutor(max_workers=3)
+        tasks = {'fast': (abs, -2), 'slow': (self.slow, 1), 'failing': (self.fail, 3)}
+        with self.assertLogs('ExpBudApp.Model_Integration.executor', 'WARNING'):
+            results, errors = run_models(tasks, self.executor, timeout=0.2)
+            self.assertEqual((results, errors), (
+                {'fast': 2, 'slow': None, 'failing': None},
+                {'slow': 'timed out after 0.2s', 'failing': 'bad input 3'},
+            ))
+            self.assertEqual(asyncio.run(arun_models(tasks, self.executor, timeout=0.2)), (results, errors))
+
+    def test_time_in_queue_is_not_model_time(self):
+        self.occupy_worker()
+        threading.Timer(0.3, self.release.set).start()
+        started = time.monotonic()
+        self.assertEqual(run_models({'queued': (abs, -1)}, self.executor, timeout=0.1, queue_timeout=5), ({'queued': 1}, {}))
+        self.assertGreater(time.monotonic() - started, 0.25)
+
+        self.release.clear()
+        self.occupy_worker()
+        threading.Timer(0.3, self.release.set).start()
+        self.assertEqual(asyncio.run(arun_models({'queued': (abs, -1)}, self.executor, timeout=0.1, queue_timeout=5)), ({'queued': 1}, {}))
+
+    def test_queue_wait_is_bounded(self):
+        self.occupy_worker()
+        expected = ({'queued': None}, {'queued': 'no free worker within 0.1s'})
+        with self.assertLogs('ExpBudApp.Model_Integration.executor', 'WARNING'):
+            self.assertEqual(run_models({'queued': (abs, -1)}, self.executor, timeout=5, queue_timeout=0.1), expected)
+            self.assertEqual(asyncio.run(arun_models({'queued': (abs, -1)}, self.executor, timeout=5, queue_timeout=0.1)), expected)
+
+
+@override_settings(PREDICTION_HISTORY={'MAX_PENDING': 5, 'BATCH_SIZE': 100})
+class PredictionHistoryBufferTests(SimpleTestCase):
+    def setUp(self):
+        self.buffer = PredictionHistoryBuffer()
+        ensure_thread = mock.patch.object(PredictionHistoryBuffer, '_ensure_thread')
+        ensure_thread.start()
+        self.addCleanup(ensure_thread.stop)
+
+    def record(self, *latencies):
+        for latency in latencies:
+            self.buffer.record('test', {'n': latency}, {}, latency)
+
+    def pending_latencies(self):
+        return [row['latency_ms'] for row in self.buffer._pending]
+
+    def test_oldest_rows_dropped_past_max_pending(self):
+        self.record(*range(7))
+        self.assertEqual(self.pending_latencies(), [2, 3, 4, 5, 6])
+        self.assertEqual(self.buffer.stats(), {'pending': 5, 'dropped': 2})
+
+    def test_failed_flush_keeps_rows(self):
+        self.record(0, 1, 2)
+
+        def record_during_flush(*args, **kwargs):
+            self.record(3, 4, 5)
+            raise OperationalError
+
+        failing = mock.patch.object(PredictionRecord.objects, 'bulk_create', side_effect=record_during_flush)
+        with self.assertLogs('ExpBudApp.Model_Integration.history', 'ERROR'), failing:
+            self.assertEqual(self.buffer.flush(), 0)
+        # Requeued rows go back in front; the oldest one no longer fits.
+        self.assertEqual(self.pending_latencies(), [1, 2, 3, 4, 5])
+        self.assertEqual(self.buffer.stats(), {'pending': 5, 'dropped': 1})
+
+        with mock.patch.object(PredictionRecord.objects, 'bulk_create') as succeeding:
+            self.assertEqual(self.buffer.flush(), 5)
+        self.assertEqual([r.latency_ms for r in succeeding.call_args.args[0]], [1, 2, 3, 4, 5])
+        self.assertEqual(self.buffer.stats(), {'pending': 0, 'dropped': 1})
+
+    def test_rejected_rows_are_not_retried(self):
+        self.record(0, 1)
+        rejecting = mock.patch.object(PredictionRecord.objects, 'bulk_create', side_effect=IntegrityError)
+        with self.assertLogs('ExpBudApp.Model_Integration.history', 'ERROR'), rejecting:
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.stats(), {'pending': 0, 'dropped': 2})
+
+
+class ModelRegistryTests(SimpleTestCase):
+    artifacts = {'first': 'first.pkl', 'second': 'second.pkl'}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.models_dir = directory.name
+        for release in ('r1', 'r2'):
+            os.makedirs(os.path.join(self.models_dir, 'versions', release))
+            for name, filename in self.artifacts.items():
+                joblib.dump({'name': name, 'release': release}, os.path.join(self.models_dir, 'versions', release, filename))
+        settings = override_settings(PREDICTION_MODELS_DIR=self.models_dir, PREDICTION_MODEL_RELOAD_INTERVAL=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.registry = ModelRegistry(self.artifacts)
+
+    def model_set(self, release):
+        return ModelSet(self.artifacts, self.registry.release_dir(release), release)
+
+    def test_refresh_preloads_every_artifact(self):
+        self.registry.activate('r1')
+        self.assertEqual(self.registry.get('first'), {'name': 'first', 'release': 'r1'})
+        self.registry.activate('r2')
+        self.assertTrue(self.registry.refresh())
+        self.assertEqual(sorted(self.registry.active.loaded()), ['first', 'second'])
+        self.assertEqual(self.registry.get('second'), {'name': 'second', 'release': 'r2'})
+
+    def test_load_does_not_wait_for_other_release(self):
+        preloading, active = self.model_set('r2'), self.model_set('r1')
+        started, release = threading.Event(), threading.Event()
+        load = joblib.load
+
+        def slow_load(path, *args, **kwargs):
+            if os.sep + 'r2' + os.sep in path:
+                started.set()
+                release.wait(5)
+            return load(path, *args, **kwargs)
+
+        with mock.patch('ExpBudApp.Model_Integration.registry.joblib.load', side_effect=slow_load):
+            preload = threading.Thread(target=preloading.get, args=('first',))
+            preload.start()
+            try:
+                self.assertTrue(started.wait(5))
+                # The active release loads while the other release's load is still in progress.
+                self.assertEqual(active.get('first')['release'], 'r1')
+                self.assertFalse(preloading.is_loaded('first'))
+            finally:
+                release.set()
+                preload.join()
+        self.assertEqual(preloading.get('first')['release'], 'r2')
+
+
+class SpendingClustersTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.models_dir = directory.name
+        for name, filename in ARTIFACTS.items():
+            if name != clustering.MODEL_NAME:
+                joblib.dump({'stand-in': name}, os.path.join(self.models_dir, filename))
+        settings = override_settings(PREDICTION_MODELS_DIR=self.models_dir, PREDICTION_MODEL_RELOAD_INTERVAL=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.use_fresh_registry()
+
+        # Training rows labelled by a k-means fit, as the recommender's training labels were
+        self.columns = synthetic_columns(3000, seed=3)
+        self.derived = compute_derived_batch(self.columns)
+        X = clustering.cluster_matrix(self.derived)
+        self.labels = KMeans(n_clusters=3, n_init=10, random_state=0).fit_predict((X - X.mean(axis=0)) / X.std(axis=0))
+        self.training_data = os.path.join(self.models_dir, 'training.csv')
+        self.write_training_data(self.labels)
+
+    def use_fresh_registry(self):
+        patcher = mock.patch.object(clustering, 'registry', ModelRegistry(ARTIFACTS))
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_training_data(self, labels):
+        frame = pd.DataFrame({field: self.columns[field] for field in INPUT_FIELDS})
+        frame['Cluster_Label'] = labels
+        frame.to_csv(self.training_data, index=False)
+
+    def train(self, *args):
+        call_command('train_spending_clusters', self.training_data, *args, stdout=io.StringIO())
+
+    def test_assigns_training_labels(self):
+        self.train()
+        labels = clustering.assign_clusters(self.derived)
+        self.assertGreater(np.mean(labels == self.labels), 0.9)
+        first = {name: values[0] for name, values in self.derived.items()}
+        self.assertEqual(clustering.assign_cluster(first), labels[0])
+
+    def test_artifact_for_other_recommender_is_ignored(self):
+        self.train()
+        joblib.dump({'stand-in': 'retrained'}, os.path.join(self.models_dir, ARTIFACTS['personalized_spending']))
+        self.use_fresh_registry()
+        with self.assertLogs('ExpBudApp.Model_Integration.clustering', 'WARNING'):
+            self.assertIsNone(clustering.get_assigner())
+        np.testing.assert_array_equal(clustering.assign_clusters(self.derived), clustering.FALLBACK_CLUSTER)
+
+    def test_labels_centroids_cannot_reproduce_are_not_saved(self):
+        self.write_training_data(np.random.default_rng(0).integers(0, 3, len(self.labels)))
+        with self.assertRaisesMessage(CommandError, 'nothing saved'):
+            self.train()
+        self.assertFalse(self.registry.has(clustering.MODEL_NAME))
+
+    def test_presence_checked_once(self):
+        with mock.patch('ExpBudApp.Model_Integration.registry.os.path.isfile', return_value=False) as isfile:
+            for _ in range(3):
+                self.assertIsNone(clustering.get_assigner())
+        self.assertEqual(isfile.call_count, 1)
+
+
+def legacy_recommendation(income, cluster, predicted_savings_percentage):
+    """Reference: the per-user recommendation before the allocation table."""
+    rent, groceries, discretionary = {0: (0.20, 0.15, 0.10), 1: (0.25, 0.15, 0.10)}.get(cluster, (0.30, 0.20, 0.15))
+    recommendations = {
+        'Rent': income * rent,
+        'Groceries': income * groceries,
+        'Savings': income * (predicted_savings_percentage / 100),
+        'Discretionary': income * discretionary,
+    }
+    return {k: round(float(v), 2) for k, v in recommendations.items()}
+
+
+class SpendingAllocationTests(SimpleTestCase):
+    def test_half_cent_ties_round_like_python(self):
+        self.assertEqual(personalized_recommender.allocate(40504.1, 1, 10.0)[0].tolist(), [10126.02, 6075.61, 4050.41, 4050.41])
+
+    def test_cent_valued_incomes_match_reference(self):
+        rng = np.random.default_rng(0)
+        income = rng.integers(100_000, 20_000_000, 20000) / 100
+        cluster = rng.integers(0, 4, 20000)
+        savings = rng.integers(0, 4000, 20000) / 100
+        amounts = personalized_recommender.allocate(income, cluster, savings)
+        expected = [
+            list(legacy_recommendation(*row).values())
+            for row in zip(income.tolist(), cluster.tolist(), savings.tolist())
+        ]
+        self.assertEqual(amounts.tolist(), expected)
+
+
+def naive_baselines(user_ids, scores, alpha):
+    """Reference: the baseline recurrence one row at a time, in plain Python."""
+    state, seen = {}, []
+    for user_id, score in zip(user_ids, scores):
+        count, mean, var = state.get(user_id, (0, 0.0, 0.0))
+        seen.append((count, mean, math.sqrt(var)))
+        weight = max(alpha, 1.0 / (count + 1))
+        diff = score - mean
+        state[user_id] = (count + 1, mean + weight * diff, (1 - weight) * (var + diff * weight * diff))
+    return seen, state
+
+
+class AnomalyBaselineTests(TestCase):
+    alpha = 0.1
+
+    def assert_matches_reference(self, observed, user_ids, scores):
+        expected, _ = naive_baselines(user_ids, scores, self.alpha)
+        count, mean, std = observed
+        np.testing.assert_array_equal(count, [row[0] for row in expected])
+        np.testing.assert_allclose(mean, [row[1] for row in expected], rtol=1e-12, atol=1e-15)
+        np.testing.assert_allclose(std, [row[2] for row in expected], rtol=1e-12, atol=1e-15)
+
+    def test_vectorized_matches_row_by_row_reference(self):
+        rng = np.random.default_rng(0)
+        user_ids = rng.integers(0, 50, 2000)
+        scores = rng.normal(0.1, 0.05, 2000)
+        observed = ScoreBaselines(capacity=16).observe(user_ids, scores, self.alpha)
+        self.assert_matches_reference(observed, user_ids.tolist(), scores.tolist())
+
+    def test_stored_baselines_shared_across_batches(self):
+        users = [User.objects.create_user(email=f'baseline{i}@example.com', username=f'baseline{i}', password='x') for i in range(4)]
+        rng = np.random.default_rng(1)
+        user_ids = rng.choice([user.pk for user in users], 300)
+        scores = rng.normal(0.1, 0.05, 300)
+
+        # Separate batches, as separate requests or worker processes would send them
+        observed = [observe_stored(user_ids[start:start + 60], scores[start:start + 60], self.alpha)
+                    for start in range(0, 300, 60)]
+        self.assert_matches_reference(
+            [np.concatenate(part) for part in zip(*observed)], user_ids.tolist(), scores.tolist(),
+        )
+
+        _, state = naive_baselines(user_ids.tolist(), scores.tolist(), self.alpha)
+        for stored in AnomalyBaseline.objects.all():
+            count, mean, var = state[stored.user_id]
+            self.assertEqual(stored.count, count)
+            self.assertAlmostEqual(stored.mean, mean, places=12)
+            self.assertAlmostEqual(stored.var, var, places=12)
+        self.assertEqual(AnomalyBaseline.objects.count(), len(state))
+
+    def test_negative_scores_are_detected_anomalies(self):
+        features = compute_feature_batch(synthetic_columns(500, seed=2), keys=('anomaly_detection',))['anomaly_detection']
+        X = pd.DataFrame({name: features[name] for name in anomaly_detection.anomaly_features})
+        model = IsolationForest(n_estimators=20, random_state=0).fit(X)
+        with mock.patch.object(anomaly_detection, 'get_model', return_value=model):
+            scores = anomaly_detection.anomaly_scores(features)
+            np.testing.assert_array_equal(scores < 0, anomaly_detection.detect_anomaly_batch(features))
+        self.assertTrue((scores < 0).any())
+
+
+@override_settings(TRANSACTION_IMPORT={'CHUNK_SIZE': 2})
+class StatementImportTests(TestCase):
+    url = '/api/finance/transactions/import/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='importer@example.com', username='importer', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def statement(self, rows, tail=b''):
+        lines = ['Date,Time,Amount,Category,Merchant,Payment Method'] + [
+            f'2024-06-{day:02d},12:00:00,{day}.00,Groceries,Shop {day},UPI' for day in range(1, rows + 1)
+        ]
+        return SimpleUploadedFile('statement.csv', '\n'.join(lines).encode() + b'\n' + tail, content_type='text/csv')
+
+    def reports(self, upload):
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_complete_import(self):
+        reports = self.reports(self.statement(5))
+        self.assertEqual([report['done'] for report in reports], [False, False, False, True])
+        self.assertEqual(reports[-1]['created'], 5)
+        self.assertNotIn('error', reports[-1])
+
+    def test_undecodable_bytes_end_stream_with_error(self):
+        with self.assertLogs('ExpBudApp.importers', 'ERROR'):
+            reports = self.reports(self.statement(4, tail=b'2024-06-30,12:00:00,1.00,Caf\xe9,Shop,UPI\n'))
+        self.assertTrue(reports[-1]['done'])
+        self.assertIn("Import stopped after 4 rows", reports[-1]['error'])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 4)
+
+    def test_database_error_ends_stream_with_error(self):
+        upsert = Transaction.objects.upsert_by_merchant_and_date
+        calls = []
+
+        def failing_second_chunk(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OperationalError('database is locked')
+            return upsert(*args, **kwargs)
+
+        with mock.patch.object(Transaction.objects, 'upsert_by_merchant_and_date', side_effect=failing_second_chunk), \
+                self.assertLogs('ExpBudApp.importers', 'ERROR'):
+            reports = self.reports(self.statement(5))
+        self.assertEqual(reports[-1]['error'], "Import stopped after 2 rows: database is locked")
+        self.assertEqual(reports[-1]['created'], 2)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+
+
+class TransactionUpsertTests(TestCase):
+    url = '/api/finance/transactions/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='upsert@example.com', username='upsert', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def transaction(self, merchant, amount='10.00', day='2024-06-01', **fields):
+        return {
+            'amount': amount, 'category': 'Groceries', 'merchant_name': merchant,
+            'transaction_date': day, 'transaction_time': '12:00:00', 'payment_method': 'UPI', **fields,
+        }
+
+    def test_bulk_with_many_merchants(self):
+        rows = [self.transaction(f'Merchant {i}', day=f'2024-06-{i % 28 + 1:02d}') for i in range(1500)]
+        response = self.client.post(f'{self.url}bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['updated']), (1500, 0))
+
+        response = self.client.post(f'{self.url}bulk/', [{**row, 'amount': '20.00'} for row in rows], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 1500))
+        self.assertEqual(
+            [result['id'] for result in response.data['results']],
+            list(Transaction.objects.filter(user=self.user).order_by('pk').values_list('pk', flat=True)),
+        )
+        self.assertFalse(Transaction.objects.filter(user=self.user).exclude(amount='20.00').exists())
+
+    def test_key_lookup_is_batched_and_exact(self):
+        for i in range(700):
+            Transaction.objects.create(user=self.user, merchant_name=f'Merchant {i}', transaction_date=date(2024, 6, 1))
+        keys = [(self.user.pk, f'Merchant {i}', date(2024, 6, 1)) for i in range(700)]
+        # Merchant 0 exists on 06-01 only: (Merchant 0, 06-02) must not match through the IN lists
+        keys.append((self.user.pk, 'Merchant 0', date(2024, 6, 2)))
+        keys.append((self.user.pk, 'Merchant 701', date(2024, 6, 2)))
+        with self.assertNumQueries(3):
+            found = Transaction.objects.pks_by_key(keys)
+        self.assertEqual(set(found), set(keys[:700]))
+
+    def test_missing_merchant_is_a_key(self):
+        first = self.client.post(self.url, self.transaction(None), format='json')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.data['merchant_name'], '')
+        row = self.transaction('', amount='15.00')
+        del row['merchant_name']
+        second = self.client.post(self.url, row, format='json')
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Transaction.objects.get(user=self.user).amount, Decimal('15.00'))
+
+    def test_reimported_blank_merchants_update(self):
+        statement = (
+            'Date,Time,Amount,Category,Merchant,Payment Method\n'
+            '2024-06-01,12:00:00,5.00,Groceries,,UPI\n'
+            '2024-06-02,12:00:00,6.00,Transport,,Cash\n'
+        ).encode()
+        for expected in ((2, 0), (0, 2)):
+            upload = SimpleUploadedFile('statement.csv', statement, content_type='text/csv')
+            response = self.client.post(f'{self.url}import/', {'file': upload}, format='multipart')
+            report = json.loads(b''.join(response.streaming_content).splitlines()[-1])
+            self.assertEqual((report['created'], report['updated']), expected)
+        self.assertEqual(Transaction.objects.filter(user=self.user, merchant_name='').count(), 2)
+
+    def test_update_keeps_fields_not_given(self):
+        first = self.client.post(self.url, self.transaction('Cafe', transaction_description='Lunch'), format='json')
+        second = self.client.post(self.url, {'merchant_name': 'Cafe', 'transaction_date': '2024-06-01', 'amount': '12.00'}, format='json')
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual((second.data['transaction_description'], second.data['category']), ('Lunch', 'Groceries'))
+
+        rows = [
+            {'merchant_name': 'Cafe', 'transaction_date': '2024-06-01', 'category': 'Dining'},
+            {'merchant_name': 'Cafe', 'transaction_date': '2024-06-01', 'amount': '14.00'},
+            self.transaction('Bakery'),
+        ]
+        response = self.client.post(f'{self.url}bulk/', rows, format='json')
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 2))
+        txn = Transaction.objects.get(pk=first.data['id'])
+        self.assertEqual(
+            (txn.amount, txn.category, txn.payment_method, txn.transaction_description),
+            (Decimal('14.00'), 'Dining', 'UPI', 'Lunch'),
+        )
+
+
+    def test_update_onto_another_key_is_refused(self):
+        self.client.post(self.url, self.transaction('A'), format='json')
+        moved = self.client.post(self.url, self.transaction('B', amount='5.00'), format='json').data['id']
+        response = self.client.put(f'{self.url}{moved}/', self.transaction('A'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data)
+        self.assertEqual(Transaction.objects.get(pk=moved).merchant_name, 'B')
+
+        response = self.client.put(f'{self.url}{moved}/', self.transaction('C', amount='7.00'), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Transaction.objects.get(pk=moved).merchant_name, 'C')
+
+class TransactionCreateRaceTests(TransactionTestCase):
+    # Real commits, so that parallel requests each see the others' rows
+    url = '/api/finance/transactions/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='race@example.com', username='race', password='x')
+
+    def post(self, merchant, amount):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.post(self.url, {
+            'amount': f'{amount}.00', 'category': 'Groceries', 'merchant_name': merchant, 'transaction_date': '2024-06-01',
+            'transaction_time': '12:00:00', 'payment_method': 'UPI', 'transaction_description': '',
+        }, format='json')
+
+    def test_parallel_creates_keep_one_row_per_key(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("Threads cannot write to a shared in-memory SQLite database at once")
+        threads, rounds, keys = 8, 10, 3
+        barrier = threading.Barrier(threads)
+        statuses = []
+
+        def client(number):
+            try:
+                for i in range(rounds):
+                    # Every client sends the same key at once, each with its own amount
+                    barrier.wait()
+                    statuses.append(self.post(f'Merchant {i % keys}', number * rounds + i).status_code)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(statuses, [201] * threads * rounds)
+        self.assertEqual(
+            sorted(Transaction.objects.filter(user=self.user).values_list('merchant_name', flat=True)),
+            [f'Merchant {i}' for i in range(keys)],
+        )
+
+    def test_create_is_one_statement(self):
+        # MySQL returns no pks from the insert, which costs a lookup by key. The
+        # COMMIT is logged too, and on SQLite the BEGIN.
+        statements = 1 if connection.features.can_return_rows_from_bulk_insert else 2
+        transaction_control = 2 if connection.vendor == 'sqlite' else 1
+        for amount in (1, 2):
+            with self.assertNumQueries(statements + transaction_control):
+                response = self.post('Cafe', amount)
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(Transaction.objects.get(user=self.user).amount, Decimal('2.00'))
+
+
+class DedupeTransactionsTests(TransactionTestCase):
+    # The duplicates of a database from before txn_user_merchant_date_uniq
+    def setUp(self):
+        self.constraint = next(c for c in Transaction._meta.constraints if c.name == 'txn_user_merchant_date_uniq')
+        # SQLite rebuilds the table from the model's constraints, so the model must lack it too
+        others = [c for c in Transaction._meta.constraints if c is not self.constraint]
+        with mock.patch.object(Transaction._meta, 'constraints', others), connection.schema_editor() as editor:
+            editor.remove_constraint(Transaction, self.constraint)
+        self.user = User.objects.create_user(email='dedupe@example.com', username='dedupe', password='x')
+
+    def tearDown(self):
+        Transaction.objects.all().delete()
+        with connection.schema_editor() as editor:
+            editor.add_constraint(Transaction, self.constraint)
+
+    def test_keeps_the_lowest_id_per_key(self):
+        kept = [
+            Transaction.objects.create(user=self.user, merchant_name=merchant, transaction_date=day, amount=1)
+            for merchant, day in (('Cafe', date(2024, 6, 1)), ('Cafe', date(2024, 6, 2)), ('', date(2024, 6, 1)))
+        ]
+        for amount in (2, 3):
+            for txn in kept[::2]:
+                Transaction.objects.create(user=self.user, merchant_name=txn.merchant_name, transaction_date=txn.transaction_date, amount=amount)
+
+        out = io.StringIO()
+        call_command('dedupe_transactions', '--dry-run', stdout=out)
+        self.assertIn('Would delete 4 duplicate transactions of 2 merchants and dates', out.getvalue())
+        self.assertEqual(Transaction.objects.count(), 7)
+
+        call_command('dedupe_transactions', stdout=io.StringIO())
+        self.assertEqual(sorted(Transaction.objects.values_list('pk', flat=True)), [txn.pk for txn in kept])
+        self.assertFalse(Transaction.objects.exclude(amount=1).exists())
+
+
+class PredictionCacheTests(SyntheticModelsMixin, TestCase):
+    url = '/api/predict/'
+
+    def hits_and_misses(self):
+        stats = prediction_cache.stats()
+        return stats['hits'], stats['misses']
+
+    def test_equivalent_inputs_share_an_entry(self):
+        hits, misses = self.hits_and_misses()
+        first = self.client.post(self.url, PAYLOADS[0], format='json')
+        self.assertEqual(first.status_code, 200)
+        # Other key order and numbers as strings: the same validated input
+        reordered = {field: str(value) for field, value in reversed(list(PAYLOADS[0].items()))}
+        second = self.client.post(self.url, reordered, format='json')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(self.hits_and_misses(), (hits + 1, misses + 1))
+
+        self.client.post(self.url, {**PAYLOADS[0], 'Rent': 12000.5}, format='json')
+        self.assertEqual(self.hits_and_misses(), (hits + 1, misses + 2))
+
+    def test_new_model_files_start_a_new_key_space(self):
+        hits, misses = self.hits_and_misses()
+        self.client.post(self.url, PAYLOADS[0], format='json')
+        key = prediction_cache.make_key('unified', unified_input.validate(PAYLOADS[0])[0])
+
+        models_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, models_dir)
+        dump_synthetic_models(models_dir, seed=1)
+        with override_settings(PREDICTION_MODELS_DIR=models_dir):
+            self.reload_models()
+            self.assertNotEqual(prediction_cache.make_key('unified', unified_input.validate(PAYLOADS[0])[0]), key)
+            response = self.client.post(self.url, PAYLOADS[0], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.hits_and_misses(), (hits, misses + 2))
+
+    def test_cache_failures_fall_back_to_computing(self):
+        broken = mock.patch.object(type(caches['predictions']), 'get', side_effect=ConnectionError('cache down'))
+        with self.assertLogs('ExpBudApp.Model_Integration.cache', 'WARNING'), broken:
+            response = self.client.post(self.url, PAYLOADS[0], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Financial_Health_Score', response.data)
+
+    def test_missing_model_files_are_a_json_error(self):
+        with tempfile.TemporaryDirectory() as empty, override_settings(PREDICTION_MODELS_DIR=empty):
+            self.reload_models()
+            with self.assertLogs('ExpBudApp.Model_Integration', 'WARNING'):
+                response = self.client.post(self.url, PAYLOADS[0], format='json')
+                single = self.client.post('/api/predict/score/', PAYLOADS[0], format='json')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(set(response.data['errors']), set(BATCH_MODELS))
+        self.assertEqual(single.status_code, 500)
+        self.assertIn('error', single.data)
+
+
+class KeysetPaginationTests(TestCase):
+    url = '/api/finance/transactions/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='pages@example.com', username='pages', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, merchant, day):
+        return Transaction.objects.create(user=self.user, merchant_name=merchant, transaction_date=day).pk
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, page_size):
+        ids, data = [], self.get(self.url, page_size=page_size)
+        while True:
+            ids += [row['id'] for row in data['results']]
+            if data['next'] is None:
+                return ids
+            data = self.get(data['next'])
+
+    def test_ties_on_date_are_ordered_by_id(self):
+        for i in range(5):
+            self.add(f'Shop {i}', date(2024, 6, 1))
+        self.add('Later', date(2024, 6, 2))
+        self.add('Earlier', date(2024, 5, 31))
+        expected = list(Transaction.objects.filter(user=self.user).order_by('-transaction_date', '-id').values_list('pk', flat=True))
+        for page_size in (1, 2, 3, 7):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), expected)
+
+    def test_cursor_is_stable_under_inserts(self):
+        for i in range(4):
+            self.add(f'Shop {i}', date(2024, 6, 1))
+        first = self.get(self.url, page_size=2)
+        seen = [row['id'] for row in first['results']]
+
+        # A newer row would shift an offset page; a row further down must still be reached
+        self.add('Newest', date(2024, 7, 1))
+        oldest = self.add('Oldest', date(2024, 5, 1))
+        second = self.get(first['next'])
+        rest = [row['id'] for row in second['results']]
+        while second['next']:
+            second = self.get(second['next'])
+            rest += [row['id'] for row in second['results']]
+        self.assertFalse(set(seen) & set(rest))
+        self.assertEqual(rest[-1], oldest)
+        self.assertEqual(len(seen) + len(rest), 5)
+
+        back = self.get(self.get(first['next'])['previous'])
+        self.assertEqual([row['id'] for row in back['results']], seen)
+
+    def test_page_size_bounds(self):
+        Transaction.objects.bulk_create(
+            Transaction(user=self.user, merchant_name=f'Shop {i}', transaction_date=date(2024, 6, 1)) for i in range(1005)
+        )
+        with override_settings(API_PAGE_SIZE=3):
+            self.assertEqual(len(self.get(self.url)['results']), 3)
+            self.assertEqual(len(self.get(self.url, page_size='abc')['results']), 3)
+            self.assertEqual(len(self.get(self.url, page_size=0)['results']), 3)
+        self.assertEqual(len(self.get(self.url, page_size=5000)['results']), 1000)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.add('Shop', date(2024, 6, 1))
+        wrong_values = base64.urlsafe_b64encode(b'{"p":["2024-06-01"]}').decode()
+        for cursor in ('garbage', wrong_values, base64.urlsafe_b64encode(b'{"p":["x",1]}').decode()):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 404)
+
+    def test_every_list_is_paginated(self):
+        for url in (self.url, '/api/finance/budget/', '/api/finance/recurring-transactions/', '/api/finance/notifications/'):
+            with self.subTest(url=url):
+                self.assertEqual(set(self.get(url)), {'next', 'previous', 'results'})
+
+
+class UnifiedPredictionTests(SyntheticModelsMixin, TestCase):
+    url = '/api/predict/'
+
+    def test_all_models(self):
+        response = self.client.post(self.url, PAYLOADS[0], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), set(BATCH_MODELS) | {'Model_Versions'})
+
+    def test_failed_model_leaves_the_others(self):
+        failing = mock.patch('ExpBudApp.Model_Integration.views.predict_financial_health_score', side_effect=ValueError('broken'))
+        with failing, self.assertLogs('ExpBudApp.Model_Integration.executor', 'ERROR'):
+            response = self.client.post(self.url, PAYLOADS[0], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['Financial_Health_Score'])
+        self.assertEqual(response.data['errors'], {'Financial_Health_Score': 'broken'})
+        self.assertIn('Disposable_Income', response.data['Expense_Prediction'])
+
+        # A partial result is not cached
+        response = self.client.post(self.url, PAYLOADS[0], format='json')
+        self.assertNotIn('errors', response.data)
+
+
+class UserInputProfileRatioTests(TestCase):
+    ratios = ['savings_efficiency', 'rent_to_income_ratio', 'groceries_to_income_ratio', 'total_expenses_to_income_ratio']
+
+    def setUp(self):
+        self.users = [User.objects.create_user(email=f'profile{i}@example.com', username=f'profile{i}', password='x') for i in range(4)]
+
+    def profile(self, user, income, **expenses):
+        return UserInputProfile(user=user, income=Decimal(income), **{name: Decimal(value) for name, value in expenses.items()})
+
+    def assert_ratios(self, profile, expected):
+        for name in self.ratios:
+            self.assertAlmostEqual(getattr(profile, name), getattr(expected, name), places=12, msg=name)
+
+    def test_unrelated_save_skips_recalculation(self):
+        self.profile(self.users[0], '50000', rent='12000', groceries='6000').save()
+        profile = UserInputProfile.objects.get(user=self.users[0])
+        with mock.patch.object(UserInputProfile, 'calculate_ratios') as calculate:
+            profile.occupation = 'Engineer'
+            profile.save()
+            profile.age = 40
+            profile.save(update_fields=['age'])
+        calculate.assert_not_called()
+        self.assertAlmostEqual(UserInputProfile.objects.get(pk=profile.pk).rent_to_income_ratio, 0.24)
+
+    def test_saving_income_writes_the_ratios(self):
+        self.profile(self.users[0], '50000', rent='12000', groceries='6000').save()
+        profile = UserInputProfile.objects.get(user=self.users[0])
+        profile.income = Decimal('40000')
+        profile.save(update_fields=['income'])
+        stored = UserInputProfile.objects.get(pk=profile.pk)
+        self.assertAlmostEqual(stored.rent_to_income_ratio, 0.3)
+        self.assertAlmostEqual(stored.total_expenses_to_income_ratio, 0.45)
+        self.assertAlmostEqual(stored.savings_efficiency, 0.55)
+
+    def test_sql_recalculation_matches_calculate_ratios(self):
+        profiles = [
+            self.profile(self.users[0], '50000', rent='12000', groceries='6000', transport='2500', miscellaneous='700.55'),
+            self.profile(self.users[1], '0', rent='4000', groceries='1500'),
+            self.profile(self.users[2], '82000.50', rent='20500.25', loan_repayment='8000', education='6000'),
+            self.profile(self.users[3], '30000', rent='15000', eating_out='2500', healthcare='700', utilities='1800'),
+        ]
+        # bulk_create bypasses save(), so the stored ratios are the defaults
+        UserInputProfile.objects.bulk_create(profiles)
+        self.assertEqual(UserInputProfile.objects.recalculate_ratios(), len(profiles))
+        for expected in profiles:
+            expected.calculate_ratios()
+            self.assert_ratios(UserInputProfile.objects.get(user=expected.user), expected)
+
+
+@override_settings(PREDICTION_COALESCING={'ENABLED': True, 'WINDOW_MS': 200, 'MAX_BATCH': 64, 'TIMEOUT': 2.0})
+class CoalescerTests(SimpleTestCase):
+    def setUp(self):
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+        self.addCleanup(self.release.set)
+        self.batcher = coalescer.MicroBatcher('test', self.double)
+
+    def double(self, items):
+        self.batches.append(list(items))
+        self.release.wait(5)
+        return [item * 2 for item in items]
+
+    def test_requests_within_the_window_share_a_batch(self):
+        futures = [self.batcher.submit(i) for i in range(5)]
+        self.assertEqual([future.result(timeout=5) for future in futures], [0, 2, 4, 6, 8])
+        self.assertEqual(self.batches, [[0, 1, 2, 3, 4]])
+
+    @override_settings(PREDICTION_COALESCING={'WINDOW_MS': 200, 'MAX_BATCH': 2})
+    def test_batches_are_capped(self):
+        futures = [self.batcher.submit(i) for i in range(5)]
+        self.assertEqual([future.result(timeout=5) for future in futures], [0, 2, 4, 6, 8])
+        self.assertEqual(self.batches, [[0, 1], [2, 3], [4]])
+
+    @override_settings(PREDICTION_COALESCING={'WINDOW_MS': 10, 'MAX_BATCH': 64})
+    def test_requests_after_the_window_wait_for_the_next_batch(self):
+        self.assertEqual(self.batcher.submit(1).result(timeout=5), 2)
+        time.sleep(0.05)
+        self.assertEqual(self.batcher.submit(2).result(timeout=5), 4)
+        self.assertEqual(self.batches, [[1], [2]])
+
+    @override_settings(PREDICTION_COALESCING={'WINDOW_MS': 0, 'MAX_BATCH': 64, 'TIMEOUT': 0.05})
+    def test_timed_out_callers_are_dropped(self):
+        self.release.clear()
+        running = self.batcher.submit(1)
+        while not self.batches:
+            time.sleep(0.001)
+        # Queued behind the stuck batch: the caller gives up and its row is never predicted
+        with mock.patch.object(coalescer, 'get_batcher', return_value=self.batcher):
+            with self.assertRaisesMessage(TimeoutError, 'within 0.05s'):
+                coalescer.predict('test', 2)
+        self.release.set()
+        self.assertEqual(running.result(timeout=5), 2)
+        self.assertEqual(self.batcher.submit(3).result(timeout=5), 6)
+        self.assertEqual(self.batches, [[1], [3]])
+
+
+class SingleModelPredictionTests(SyntheticModelsMixin, TestCase):
+    url = '/api/predict/score/'
+
+    def test_cache_outcome_is_logged(self):
+        with self.assertLogs('ExpBudApp.Model_Integration.metrics', 'DEBUG') as logs:
+            first = self.client.post(self.url, PAYLOADS[0], format='json')
+            second = self.client.post(self.url, PAYLOADS[0], format='json')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(
+            [line.rsplit('cache=', 1)[-1] for line in logs.output if 'financial_health_score prediction' in line],
+            ['miss', 'hit'],
+        )
+
+    def test_coalesced_prediction_matches_direct(self):
+        direct = self.client.post(self.url, PAYLOADS[2], format='json')
+        caches[prediction_cache.get_config()['ALIAS']].clear()
+        with override_settings(PREDICTION_COALESCING={'ENABLED': True, 'WINDOW_MS': 1, 'MAX_BATCH': 64, 'TIMEOUT': 2.0}):
+            coalesced = self.client.post(self.url, PAYLOADS[2], format='json')
+        self.assertEqual(coalesced.status_code, 200)
+        self.assertEqual(coalesced.data, direct.data)
+
+
+class BatchPredictionTests(SyntheticModelsMixin, TestCase):
+    url = '/api/predict_batch/'
+
+    def test_results_in_input_order(self):
+        # The all-zero input has no expense shares (NaN), which JSON cannot carry
+        payloads = PAYLOADS[:4]
+        response = self.client.post(self.url, payloads, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'results', 'Model_Versions'})
+        self.assertEqual(len(response.data['results']), len(payloads))
+        # Compared as rendered, where NumPy and Python scalars look the same
+        for payload, result in zip(payloads, json.loads(response.content)['results']):
+            single = json.loads(self.client.post('/api/predict/', payload, format='json').content)
+            self.assertEqual(result, {label: single[label] for label in BATCH_MODELS})
+
+    def test_rejected_batches(self):
+        with mock.patch.object(prediction_views, 'MAX_BATCH_SIZE', 3):
+            too_many = self.client.post(self.url, PAYLOADS[:4], format='json')
+        self.assertEqual(too_many.status_code, 400)
+        self.assertEqual(too_many.data, {'error': 'At most 3 inputs per batch.'})
+        for body in ([], PAYLOADS[0]):
+            self.assertEqual(self.client.post(self.url, body, format='json').status_code, 400)
+
+        invalid = self.client.post(self.url, [PAYLOADS[0], {**PAYLOADS[1], 'Income': 'abc'}], format='json')
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(invalid.data[0], {})
+        self.assertIn('Income', invalid.data[1])
+
+
+
+class ScenarioSweepTests(SyntheticModelsMixin, TestCase):
+    url = '/api/predict/scenarios/'
+
+    def sweep(self, grid, **extra):
+        return self.client.post(self.url, {'base': PAYLOADS[0], 'grid': grid, **extra}, format='json')
+
+    def test_every_combination_last_field_fastest(self):
+        models = ['Financial_Health_Score', 'Overspending_Alert']
+        response = self.sweep({'Rent': {'scale': [1.0, 0.5]}, 'Groceries': {'values': [6000, 3000, 1500]}}, models=models)
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.content)
+        self.assertEqual(
+            [scenario['inputs'] for scenario in body['scenarios']],
+            [{'Rent': rent, 'Groceries': groceries} for rent in (12000.0, 6000.0) for groceries in (6000.0, 3000.0, 1500.0)],
+        )
+        self.assertEqual(set(body['baseline']), set(models))
+
+        batch = json.loads(self.client.post('/api/predict_batch/', PAYLOADS[:1], format='json').content)
+        self.assertEqual(body['baseline'], {label: batch['results'][0][label] for label in models})
+        # Scale 1 with the base groceries is the base input again
+        unchanged = body['scenarios'][0]
+        self.assertEqual({label: unchanged[label] for label in models}, body['baseline'])
+
+    def test_grid_limits(self):
+        with mock.patch.object(prediction_serializers, 'MAX_SCENARIOS', 6):
+            self.assertEqual(self.sweep({'Rent': {'scale': [1, 0.5]}, 'Groceries': {'values': [1, 2, 3]}}).status_code, 200)
+            too_many = self.sweep({'Rent': {'scale': [1, 0.5]}, 'Groceries': {'values': [1, 2, 3, 4]}})
+        self.assertEqual(too_many.status_code, 400)
+        self.assertEqual(too_many.data['grid'], ['At most 6 scenarios per request.'])
+
+        for grid in (
+            {},
+            {'Age': {'values': [20, 40]}},
+            {'Rent': {'scale': [0.5], 'values': [100]}},
+            {'Rent': {}},
+            {'Rent': {'scale': []}},
+            {'Rent': {'scale': [-0.5]}},
+        ):
+            with self.subTest(grid=grid):
+                response = self.sweep(grid)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('grid', response.data)
+        self.assertEqual(self.sweep({'Rent': {'scale': [0.5]}}, models=['Unknown']).status_code, 400)
+
+
+class AsyncPredictionTests(SyntheticModelsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.async_client = AsyncClient()
+
+    async def post(self, url, data, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return await self.async_client.post(url, data, content_type='application/json', headers=headers)
+
+    async def test_requests_need_a_valid_token_of_an_active_user(self):
+        url = '/api/async/predict/score/'
+        expired = AccessToken.for_user(self.user)
+        expired.set_exp(lifetime=-timedelta(minutes=1))
+        for token in (None, 'not-a-token', str(expired)):
+            with self.subTest(token=token):
+                response = await self.post(url, PAYLOADS[0], token)
+                self.assertEqual(response.status_code, 401)
+
+        response = await self.post(url, PAYLOADS[0], AccessToken.for_user(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Financial_Health_Score', response.json())
+
+        self.user.is_active = False
+        await self.user.asave(update_fields=['is_active'])
+        self.assertEqual((await self.post(url, PAYLOADS[0], AccessToken.for_user(self.user))).status_code, 401)
+
+    async def test_matches_sync_endpoints(self):
+        token = AccessToken.for_user(self.user)
+        for url, data in (('predict/', PAYLOADS[0]), ('predict_batch/', PAYLOADS[:3]), ('predict/recommendation/', PAYLOADS[2])):
+            with self.subTest(url=url):
+                response = await self.post(f'/api/async/{url}', data, token)
+                self.assertEqual(response.status_code, 200)
+                expected = await sync_to_async(self.client.post)(f'/api/{url}', data, format='json')
+                self.assertEqual(response.json(), json.loads(expected.content))
+
+        invalid = await self.post('/api/async/predict/', {**PAYLOADS[0], 'Income': 'abc'}, token)
+        self.assertEqual(invalid.status_code, 400)
+        self.assertIn('Income', invalid.json())
@@ -45,13 +45,19 @@ from ExpBudApp.views.export_views import (
 # Model Integration Views (AI Predictions)
 from ExpBudApp.Model_Integration.views import (
     unified_prediction_view,
+    batch_prediction_view,
+    scenario_prediction_view,
     expense_prediction_view,
     overspending_alert_view,
     anomaly_detection_view,
+    anomaly_score_view,
     savings_efficiency_view,
     financial_score_view,
     personalized_recommendation_view,
+    prediction_cache_stats_view,
+    prediction_metrics_view,
 )
+from ExpBudApp.Model_Integration import async_views
 
 # Optional (if used in urls)
 from ExpBudApp.views.dashboard_views import DashboardView
@@ -105,13 +111,30 @@ urlpatterns = [
 
     # 🤖 AI Predictions
     path('predict/', unified_prediction_view, name='unified_prediction'),
+    path('predict_batch/', batch_prediction_view, name='batch_prediction'),
+    path('predict/scenarios/', scenario_prediction_view, name='scenario_prediction'),
 
     path('predict/expense/', expense_prediction_view, name='expense_prediction'),
     path('predict/overspending/', overspending_alert_view, name='overspending_alert'),
     path('predict/anomaly/', anomaly_detection_view, name='anomaly_detection'),
+    path('predict/anomaly/score/', anomaly_score_view, name='anomaly_score'),
     path('predict/savings/', savings_efficiency_view, name='savings_efficiency'),
     path('predict/score/', financial_score_view, name='financial_score'),
     path('predict/recommendation/', personalized_recommendation_view, name='personalized_recommendation'),
+    path('predict/cache/stats/', prediction_cache_stats_view, name='prediction_cache_stats'),
+    path('metrics/', prediction_metrics_view, name='prediction_metrics'),
+
+    # ⚡ Async AI Predictions (serve with an ASGI server)
+    path('async/', include([
+        path('predict/', async_views.unified_prediction_view, name='async_unified_prediction'),
+        path('predict_batch/', async_views.batch_prediction_view, name='async_batch_prediction'),
+        path('predict/expense/', async_views.expense_prediction_view, name='async_expense_prediction'),
+        path('predict/overspending/', async_views.overspending_alert_view, name='async_overspending_alert'),
+        path('predict/anomaly/', async_views.anomaly_detection_view, name='async_anomaly_detection'),
+        path('predict/savings/', async_views.savings_efficiency_view, name='async_savings_efficiency'),
+        path('predict/score/', async_views.financial_score_view, name='async_financial_score'),
+        path('predict/recommendation/', async_views.personalized_recommendation_view, name='async_personalized_recommendation'),
+    ])),
 
     # ⬇️ Export
     path('export/csv/', ExportTransactionsCSV.as_view(), name='export_csv'),
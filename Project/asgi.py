@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Project.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.PREDICTION_WARM_UP:
+    from ExpBudApp.Model_Integration.registry import registry  # noqa: E402
+    registry.warm_up()
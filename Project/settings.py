@@ -61,6 +61,11 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Rows per page of the transaction, budget, recurring transaction and
+# notification lists (keyset pagination, see ExpBudApp.pagination). Clients
+# may ask for up to 1000 with ?page_size= and follow the `next` links.
+API_PAGE_SIZE = 100
+
 CLERK_FRONTEND_API = "http://localhost:3000"
  
 AUTH_USER_MODEL = 'ExpBudApp.User'
@@ -160,8 +165,108 @@ CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",  # For dev/testing
         "LOCATION": "ai-expenses-cache",
-    }
+    },
+    # Prediction results; LocMemCache evicts least-recently-used entries past MAX_ENTRIES.
+    # In production point this at Redis, e.g.
+    #   "BACKEND": "django_redis.cache.RedisCache",
+    #   "LOCATION": "redis://127.0.0.1:6379/1",
+    # with maxmemory-policy allkeys-lru on the Redis server.
+    "predictions": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ai-predictions-cache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+# Cache in front of the /api/predict/ endpoints, keyed on the validated input
+# plus a fingerprint of the model artifacts. TIMEOUT is the TTL in seconds.
+PREDICTION_CACHE = {
+    'ALIAS': 'predictions',
+    'TIMEOUT': 600,
+}
+# AI model artifacts (ExpBudApp/Model_Integration)
+# Models load lazily on first prediction; PREDICTION_WARM_UP loads them all
+# when a WSGI/ASGI worker starts instead.
+PREDICTION_MODELS_DIR = os.path.join(BASE_DIR, 'ExpBudApp', 'Model_Integration', 'models')
+PREDICTION_WARM_UP = False
+# 'compiled' serves tree models from the NumPy artifacts written by
+# `manage.py compile_models` (falling back to the pickle when none exists).
+PREDICTION_MODEL_FORMAT = 'joblib'
+# Open compiled artifacts with mmap_mode='r' so all workers share one copy
+# through the OS page cache.
+PREDICTION_MODEL_MMAP = True
+# Seconds between checks of models/CURRENT. A new release (see
+# `manage.py publish_models`) is preloaded in the background and swapped in
+# without restarting workers. 0 disables the check.
+PREDICTION_MODEL_RELOAD_INTERVAL = 30
+
+# How unified_prediction_view fans out to the six models: 'thread' (default),
+# 'process' (each worker preloads every model) or 'serial'. TIMEOUT is the
+# per-model budget in seconds, counted from when the model starts running;
+# QUEUE_TIMEOUT bounds the wait for a free worker. Slower models come back as
+# null with an error.
+PREDICTION_EXECUTOR = {
+    'MODE': 'thread',
+    'MAX_WORKERS': 8,
+    'TIMEOUT': 2.0,
+    'QUEUE_TIMEOUT': 10.0,
+}
+
+# Every /api/predict/ and /api/predict_batch/ result is saved as a PredictionRecord.
+# Rows are buffered in memory and written with bulk_create by a background
+# thread every FLUSH_INTERVAL seconds, or once BATCH_SIZE rows are waiting.
+PREDICTION_HISTORY = {
+    'ENABLED': True,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_PENDING': 10000,
 }
+
+# Opt-in micro-batching of the single-model /api/predict/<model>/ endpoints:
+# requests for the same model arriving within WINDOW_MS of each other (up to
+# MAX_BATCH) share one vectorized predict call. Only requests handled by the
+# same worker process are coalesced, so use threaded or ASGI workers. MODELS
+# limits it to some feature keys, e.g. ['financial_health_score'].
+PREDICTION_COALESCING = {
+    'ENABLED': False,
+    'MODELS': None,
+    'WINDOW_MS': 2.0,
+    'MAX_BATCH': 64,
+    'TIMEOUT': 2.0,
+}
+
+# Per-stage latency histograms of the prediction endpoints, served in the
+# Prometheus text format at /api/metrics/ (staff only unless PUBLIC). Each
+# request's stage breakdown is logged by ExpBudApp.Model_Integration.metrics
+# at DEBUG, or at WARNING when it takes longer than SLOW_REQUEST_MS.
+PREDICTION_METRICS = {
+    'ENABLED': True,
+    'SLOW_REQUEST_MS': 250,
+    'PUBLIC': False,
+}
+
+# Rolling per-user baselines of the anomaly score served by
+# /api/predict/anomaly/score/ (see ExpBudApp.Model_Integration.baselines).
+# ALPHA is the weight of the newest score; a score more than Z_THRESHOLD
+# deviations below the baseline is unusual once a user has MIN_HISTORY
+# earlier inputs.
+PREDICTION_ANOMALY_BASELINE = {
+    'ALPHA': 0.1,
+    'MIN_HISTORY': 5,
+    'Z_THRESHOLD': 3.0,
+    'MIN_STD': 0.01,
+}
+
+# Statement CSV imports (`manage.py import_transactions` and
+# /api/finance/transactions/import/, see ExpBudApp.importers). Rows are saved
+# CHUNK_SIZE at a time; COLUMNS maps extra statement headers to Transaction
+# fields, e.g. {'Narration': 'transaction_description'}.
+TRANSACTION_IMPORT = {
+    'CHUNK_SIZE': 2000,
+    'MAX_ERRORS': 100,
+    'COLUMNS': {},
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Project.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.PREDICTION_WARM_UP:
+    from ExpBudApp.Model_Integration.registry import registry  # noqa: E402
+    registry.warm_up()
@@ -29,6 +29,7 @@ st.set_page_config(
 
 # Constants
 BASE_URL = "http://127.0.0.1:8000/api"
+TRANSACTIONS_PAGE_SIZE = 100
 
 # Session state initialization
 if "access_token" not in st.session_state:
@@ -80,6 +81,15 @@ def save_token(token):
 def get_headers():
     return {"Authorization": f"Bearer {st.session_state.access_token}"} if st.session_state.access_token else {}
 
+def iter_pages(url, params=None):
+    """Yield the results of each page of a paginated list endpoint, following its `next` links"""
+    while url:
+        response = requests.get(url, headers=get_headers(), params=params)
+        response.raise_for_status()
+        page = response.json()
+        yield page["results"]
+        url, params = page["next"], None
+
 # Authentication Functions
 def login_user():
     """User login using JWT with unique form keys"""
@@ -149,6 +159,7 @@ def logout():
     st.session_state.user_email = ""
     st.session_state.active_section = None
     st.session_state.active_subsection = None
+    forget_transactions()
     st.success("Logged out successfully!")
     
 ### ✅ Navigation & Main App
@@ -476,7 +487,8 @@ def view_budget():
     response = requests.get(f"{BASE_URL}/finance/budget/", headers=get_headers())
 
     if response.status_code == 200:
-        budgets = response.json()
+        first_page = response.json()
+        budgets = first_page["results"] + [budget for page in iter_pages(first_page["next"]) for budget in page]
 
         if not budgets:
             st.warning("You don't have any budgets yet.")
@@ -597,6 +609,7 @@ def log_transaction():
             response = requests.post(f"{BASE_URL}/finance/transactions/", headers=get_headers(), json=payload)
 
             if response.status_code == 201:
+                forget_transactions()
                 st.success("✅ Transaction added successfully!")
             else:
                 st.error(f"Failed to log transaction: {response.json()}")
@@ -636,15 +649,41 @@ def recurring_transaction():
             else:
                 st.error(f"Failed to save recurring transaction: {response.json()}")
 
+def load_transactions_page():
+    """Append the next page of transactions to the ones already shown"""
+    response = requests.get(st.session_state.transactions_next, headers=get_headers())
+    if response.status_code != 200:
+        st.session_state.transactions_failed = True
+        return
+    page = response.json()
+    st.session_state.transactions += page["results"]
+    st.session_state.transactions_next = page["next"]
+
+def reload_transactions():
+    """Start again from the newest page of transactions"""
+    st.session_state.transactions = []
+    st.session_state.transactions_next = f"{BASE_URL}/finance/transactions/?page_size={TRANSACTIONS_PAGE_SIZE}"
+    st.session_state.transactions_failed = False
+    load_transactions_page()
+
+def forget_transactions():
+    """Drop the loaded pages so the history is fetched again on its next visit"""
+    st.session_state.pop("transactions", None)
+
 def list_transactions():
-    """List all transactions with proper columns and action buttons"""
+    """List transactions page by page, newest first, with proper columns and action buttons"""
     st.subheader("📜 Transaction History")
-    response = requests.get(f"{BASE_URL}/finance/transactions/", headers=get_headers())
-    recurring_response = requests.get(f"{BASE_URL}/finance/recurring-transactions/", headers=get_headers())
+    if "transactions" not in st.session_state:
+        reload_transactions()
+    try:
+        recurring_transactions = [
+            r_txn for page in iter_pages(f"{BASE_URL}/finance/recurring-transactions/") for r_txn in page
+        ]
+    except requests.exceptions.RequestException:
+        recurring_transactions = None
 
-    if response.status_code == 200 and recurring_response.status_code == 200:
-        transactions = response.json()
-        recurring_transactions = recurring_response.json()
+    if not st.session_state.transactions_failed and recurring_transactions is not None:
+        transactions = st.session_state.transactions
 
         if transactions or recurring_transactions:
             # Regular Transactions
@@ -682,6 +721,10 @@ def list_transactions():
                     hide_index=True,
                     use_container_width=True
                 )
+                st.caption(f"Showing the latest {len(transactions)} transactions.")
+                if st.session_state.transactions_next:
+                    st.button("⬇️ Load more", key="transactions_load_more", on_click=load_transactions_page)
+                st.button("🔄 Refresh", key="transactions_refresh", on_click=reload_transactions)
                               
             # Recurring Transactions
             st.write("### Recurring Transactions")
@@ -715,6 +758,7 @@ def list_transactions():
         else:
             st.info("No transactions found.")
     else:
+        forget_transactions()
         st.error("❌ Failed to fetch transactions.")
 
 def update_transaction():
@@ -803,6 +847,7 @@ def update_transaction():
                     )
                     
                     if response.status_code == 200:
+                        forget_transactions()
                         st.success("✅ Transaction updated successfully!")
                         st.rerun()
                     else:
@@ -844,6 +889,7 @@ def delete_transaction():
                     )
                     
                     if response.status_code == 204:
+                        forget_transactions()
                         st.success("✅ Transaction deleted successfully!")
                         time.sleep(1.5)
                         st.rerun()